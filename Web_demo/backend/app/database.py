@@ -1,18 +1,72 @@
 # app/database.py
-from sqlalchemy import create_engine
+import os
+import threading
+from contextlib import nullcontext
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./news.db"  # file news.db đặt cạnh main.py
+# Mặc định file news.db đặt cạnh main.py; DATABASE_URL=postgresql+psycopg://... để chạy trên Postgres
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./news.db")
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# SQLITE_TUNED=0 → cấu hình mặc định của SQLite (rollback journal, synchronous=FULL)
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "1") != "0"
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Pool: DB_READERS người đọc + 1 người ghi
+DB_READERS = int(os.getenv("DB_READERS", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "4"))
+
+if IS_SQLITE:
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={
+            "check_same_thread": False,  # bắt buộc với SQLite + nhiều thread
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        pool_size=DB_READERS + 1,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_READERS + 1,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+
+
+if IS_SQLITE and SQLITE_TUNED:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        """WAL: đọc không chặn ghi; synchronous=NORMAL: chỉ fsync lúc checkpoint."""
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")  # số âm = KiB
+        cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # bắt buộc với SQLite + nhiều thread
-)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+_write_lock = threading.RLock()
+
+
+def db_writer():
+    """
+    Bọc đoạn ghi DB. SQLite chỉ có 1 người ghi → xếp hàng bằng lock trong process
+    thay vì tranh khoá file rồi chờ busy_timeout; Postgres → không khoá.
+    """
+    return _write_lock if IS_SQLITE else nullcontext()
+
 
 # Dependency dùng trong FastAPI
 def get_db():
@@ -1,21 +1,51 @@
 #\app\main.py
 import os
+import threading
+from contextlib import asynccontextmanager
 
 # Disable warnings
 os.environ["TRANSFORMERS_NO_ADVISORY_WARNINGS"] = "1"
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import Base, engine
+from fastapi.responses import JSONResponse
+from app.database import engine
+from app.migrations import migrate
 from app.routers import news
+from app.services.summarizer import readiness, warm_up
+from app.services.near_dup import get_near_dup_index
+from app.services.url_index import get_url_index
+from app.services.worker_pool import POOL_WORKERS, get_worker_pool
+
+# Load model + warm-up ngay khi khởi động (SUMMARIZER_WARMUP=0 để tắt)
+WARMUP_ON_STARTUP = os.getenv("SUMMARIZER_WARMUP", "1") != "0"
+
+# Tạo bảng còn thiếu + nâng cấp schema của news.db đang có khi khởi động
+migrate(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load model và chạy warm-up ở thread nền khi app khởi động:
+    /health trả lời ngay (liveness), còn /ready chỉ báo sẵn sàng khi model đã nóng.
+    Ở pool mode mỗi worker tự load + warm-up, process API không giữ model.
+    Known-URL index của crawler và index tin gần trùng cũng được nạp từ DB lúc này.
+    """
+    get_url_index()
+    get_near_dup_index()
+    if POOL_WORKERS > 0:
+        get_worker_pool()
+    elif WARMUP_ON_STARTUP:
+        threading.Thread(target=warm_up, name="summarizer-warmup", daemon=True).start()
+    yield
 
-# Tạo các bảng database khi khởi động
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="VN News Summarizer & Classifier",
     version="1.0.0",
-    debug=True
+    debug=True,
+    lifespan=lifespan,
 )
 
 # Include routers
@@ -35,6 +65,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # cursor phân trang của /by_date
 )
 
 
@@ -57,4 +88,22 @@ def health_check():
         "version": "1.0.0"
     }
 
+
+@app.get("/ready")
+def ready_check():
+    """
+    Readiness probe cho load balancer: 200 khi model đã load và warm-up xong,
+    503 khi chưa. Kèm thời gian load model và độ trễ warm-up.
+    SUMMARIZER_WARMUP=0 (không pool): model chỉ load ở request đầu tiên → luôn 200,
+    nếu chờ model thì probe không bao giờ qua và không có request nào tới.
+    """
+    if POOL_WORKERS > 0:
+        state = get_worker_pool().readiness()
+    else:
+        state = readiness()
+        if not WARMUP_ON_STARTUP:
+            state["ready"] = True
+            state["warmup_disabled"] = True
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
 # uvicorn app.main:app --reload --port 8000
\ No newline at end of file
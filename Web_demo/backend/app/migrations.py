@@ -0,0 +1,121 @@
+#\app\migrations.py
+"""
+Migration schema cho news.db (nâng cấp DB đang có tại chỗ, không mất dữ liệu).
+
+create_all chỉ tạo bảng còn thiếu, không ALTER bảng cũ → mọi thay đổi trên bảng
+đã tồn tại đi qua danh sách MIGRATIONS, mỗi bước chạy đúng 1 lần và được ghi vào
+bảng schema_migrations. Mỗi bước viết idempotent (DB mới tạo bằng create_all đã
+có sẵn cột / index → bước đó chỉ được đánh dấu).
+
+Thêm migration: viết hàm nhận connection rồi nối (version, tên, hàm) vào cuối MIGRATIONS.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import Base
+from app.models import news as _models  # noqa: F401  (đăng ký bảng vào Base.metadata)
+from app.services import daily_stats
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, name: str, ddl: str) -> None:
+    if name not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+def _create_index(conn: Connection, table: str, name: str) -> None:
+    """Tạo index khai báo trong model (theo tên) nếu bảng chưa có."""
+    for index in Base.metadata.tables[table].indexes:
+        if index.name == name:
+            index.create(bind=conn, checkfirst=True)
+            return
+    raise KeyError(f"Model {table} không khai báo index {name}")
+
+
+# ---------- Các bước ----------
+def _nlp_quality(conn: Connection) -> None:
+    _add_column(conn, "news_nlp", "quality", "VARCHAR(20)")
+
+
+def _nlp_article_index(conn: Connection) -> None:
+    _create_index(conn, "news_nlp", "idx_nlp_article_created")
+
+
+def _nlp_unique_version(conn: Connection) -> None:
+    """
+    Mỗi (article_id, model_version) chỉ 1 bản NLP. Dữ liệu cũ có thể trùng
+    (insert không kiểm tra) → giữ bản mới nhất (id lớn nhất), xoá phần còn lại.
+    NULL không bị unique chặn → đưa về "v1" (default của cột) trước.
+    """
+    conn.execute(text("UPDATE news_nlp SET model_version = 'v1' WHERE model_version IS NULL"))
+    conn.execute(text(
+        "DELETE FROM news_nlp WHERE id NOT IN ("
+        " SELECT MAX(id) FROM news_nlp GROUP BY article_id, model_version)"
+    ))
+    _create_index(conn, "news_nlp", "uq_nlp_article_version")
+
+
+def _article_created_date(conn: Connection) -> None:
+    """Cột ngày (UTC) của created_at, đánh index → query theo ngày không phải tính date() từng dòng."""
+    _add_column(conn, "news_article", "created_date", "DATE")
+    if conn.dialect.name == "sqlite":
+        expr = "date(created_at)"  # 'YYYY-MM-DD', đúng định dạng cột Date của SQLAlchemy trên SQLite
+    else:
+        expr = "CAST(created_at AS DATE)"
+    conn.execute(text(f"UPDATE news_article SET created_date = {expr} WHERE created_date IS NULL"))
+    _create_index(conn, "news_article", "idx_article_created_date")
+
+
+def _daily_stats(conn: Connection) -> None:
+    """daily_stats (bảng mới, create_all đã tạo) đếm từ dữ liệu đang có."""
+    daily_stats.refill(conn)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "news_nlp.quality", _nlp_quality),
+    (2, "news_nlp (article_id, created_at) index", _nlp_article_index),
+    (3, "news_nlp unique (article_id, model_version)", _nlp_unique_version),
+    (4, "news_article.created_date + index", _article_created_date),
+    (5, "daily_stats", _daily_stats),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine: Engine) -> int:
+    with engine.connect() as conn:
+        if "schema_migrations" not in inspect(conn).get_table_names():
+            return 0
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def migrate(engine: Engine) -> List[int]:
+    """
+    Tạo bảng còn thiếu rồi chạy các migration chưa áp dụng, mỗi bước 1 transaction.
+    Trả danh sách version vừa chạy.
+    """
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            " version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version <= current_version(engine):
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.utcnow()},
+            )
+        applied.append(version)
+    return applied
@@ -1,5 +1,5 @@
 # app/models/news.py
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text, Index
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, LargeBinary, String, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -18,6 +18,8 @@ class NewsArticle(Base):
 
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Ngày (UTC) của created_at, lưu sẵn để lọc / gom theo ngày bằng index
+    created_date = Column(Date, default=lambda: datetime.utcnow().date(), nullable=True)
 
     nlp = relationship("NewsNLP", back_populates="article", uselist=False)
 
@@ -26,6 +28,8 @@ class NewsArticle(Base):
         # Composite index cho query tin mới theo nguồn
         # Ví dụ: SELECT * FROM news_article WHERE source='vnexpress' ORDER BY created_at DESC
         Index('idx_source_created', 'source', 'created_at'),
+        # Tin trong 1 ngày, mới nhất trước: WHERE created_date=? ORDER BY created_at DESC, id DESC
+        Index('idx_article_created_date', 'created_date', 'created_at'),
     )
 
 
@@ -39,7 +43,52 @@ class NewsNLP(Base):
     category = Column(String(100), index=True, nullable=True)  # Category từ URL
 
     model_version = Column(String(50), default="v1")  
+    # Mức chất lượng đã sinh summary (fast/balanced/best); NULL = bản cũ, coi như best
+    quality = Column(String(20), default="best", nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
     article = relationship("NewsArticle", back_populates="nlp")
+
+    __table_args__ = (
+        # Bản NLP mới nhất của 1 bài: WHERE article_id=? ORDER BY created_at DESC LIMIT 1
+        Index('idx_nlp_article_created', 'article_id', 'created_at'),
+        # Mỗi bài 1 bản NLP / model_version (đích ON CONFLICT khi lưu theo lô)
+        Index('uq_nlp_article_version', 'article_id', 'model_version', unique=True),
+    )
+
+
+class CrawlWatermark(Base):
+    """Link mới nhất đã thấy trên mỗi trang danh mục (theo lần crawl gần nhất)."""
+    __tablename__ = "crawl_watermark"
+
+    listing_url = Column(String(500), primary_key=True)
+    newest_url = Column(String(500), nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class NewsMinHash(Base):
+    """Chữ ký MinHash của body bài viết + cụm tin gần trùng mà bài thuộc về."""
+    __tablename__ = "news_minhash"
+
+    article_id = Column(Integer, ForeignKey("news_article.id"), primary_key=True)
+    # id cụm = article_id của bài đầu tiên trong cụm
+    cluster_id = Column(Integer, index=True, nullable=False)
+    signature = Column(LargeBinary, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DailyStat(Base):
+    """
+    Số bài theo (ngày, nguồn, category) — cập nhật dần khi lưu bài (persist_batch).
+    Mỗi bài đếm 1 lần theo created_date và category của bản NLP mới nhất
+    ('' = chưa có category).
+    """
+    __tablename__ = "daily_stats"
+
+    date = Column(Date, primary_key=True)
+    source = Column(String(50), primary_key=True)
+    category = Column(String(100), primary_key=True, default="")
+    count = Column(Integer, nullable=False, default=0)
@@ -1,25 +1,39 @@
 # app/routers/news.py
 from __future__ import annotations
 
+import base64
 import json
+import queue
+import threading
+import time
 from typing import Iterable
 from datetime import datetime, timedelta
 
 from dateutil import parser as dtparse
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, or_
 
 from app.database import get_db
-from app.models.news import NewsArticle, NewsNLP
+from app.models.news import DailyStat, NewsArticle, NewsNLP
 from app.schemas.news import (
     CrawlRequest,
     CrawledNews,
 )
 from app.services.classifier import classify
-from app.services.crawler import crawl_today_news
-from app.services.summarizer import summarize
+from app.services.crawler import crawl_today_news, refetch, stream_today_news
+from app.services.inference_queue import get_scheduler
+from app.services.worker_pool import POOL_WORKERS, get_worker_pool
+from app.services.summarizer import DEFAULT_QUALITY, MODEL_VERSION, QUALITY_TIERS, effective_quality
+from app.services import daily_stats, near_dup
+from app.services.discovery import get_discovery
+from app.services.host_control import host_stats
+from app.services.http_cache import get_http_cache
+from app.services.near_dup import get_near_dup_index
+from app.services.persistence import ProcessedArticle, persist_batch
+from app.services.summary_cache import get_cache
+from app.services.url_index import get_url_index
 
 router = APIRouter()
 
@@ -33,7 +47,11 @@ VI_WEEKDAYS = [
     "Chủ nhật",
 ]
 
-MODEL_VERSION = "v1"  # tuỳ bạn đặt theo version mô hình
+
+# Số bài tối đa đã crawl nhưng chưa stream ra (đang chờ/đang tóm tắt) trong endpoint stream
+STREAM_MAX_IN_FLIGHT = 8
+# Số bài tối đa chờ ghi DB trong endpoint stream (ghi theo lô, 1 transaction / lô)
+STREAM_PERSIST_BATCH = 8
 
 
 def _format_vietnamnet_published(published_at: str | None) -> str | None:
@@ -78,154 +96,217 @@ def _strip_vietnamnet_author(summary: str) -> str:
     return summary
 
 
-def _get_or_create_article(
-    db: Session,
-    *,
-    url: str,
-    source: str,
-    title: str,
-    body: str,
-    published_at: str | None,
-) -> NewsArticle:
-    """
-    Tìm article theo URL; nếu chưa có thì tạo mới.
-    """
-    article = db.query(NewsArticle).filter(NewsArticle.url == url).first()
-    if article:
-        # Cập nhật lại thông tin nếu cần
-        changed = False
-        if article.title != title:
-            article.title = title
-            changed = True
-        if article.body != body:
-            article.body = body
-            changed = True
-        if article.source != source:
-            article.source = source
-            changed = True
-        if article.published_at != published_at:
-            article.published_at = published_at
-            changed = True
-        if changed:
-            db.add(article)
-            db.commit()
-            db.refresh(article)
-        return article
-
-    article = NewsArticle(
-        url=url,
-        source=source,
-        title=title,
-        body=body,
-        published_at=published_at,
+def _to_crawled_news(article: NewsArticle, nlp: NewsNLP) -> CrawledNews:
+    return CrawledNews(
+        title=article.title,
+        body=article.body,
+        source=article.source,
+        url=article.url,
+        published_at=article.published_at,
+        summary=nlp.summary,
+        category=nlp.category,
+        quality=nlp.quality or "best",
+    )
+
+
+def _record_to_crawled_news(record: ProcessedArticle) -> CrawledNews:
+    return CrawledNews(
+        title=record.title,
+        body=record.body,
+        source=record.source,
+        url=record.url,
+        published_at=record.published_at,
+        summary=record.summary,
+        category=record.category,
+        quality=record.quality or "best",
     )
-    db.add(article)
-    db.commit()
-    db.refresh(article)
-    return article
 
 
-def _get_or_create_nlp(
+def _quality_satisfies(stored: str | None, requested: str) -> bool:
+    """Summary đã lưu dùng lại được nếu cùng mức hoặc tốt hơn mức được yêu cầu."""
+    stored = stored or "best"  # bản ghi cũ (trước khi có tier) sinh bằng beam đầy đủ
+    if stored not in QUALITY_TIERS:
+        return False
+    return QUALITY_TIERS.index(stored) >= QUALITY_TIERS.index(requested)
+
+
+def _resolve_known(db: Session, item) -> bool:
+    """
+    Item "known" từ crawler chỉ có URL (bài đã xử lý, không tải lại):
+    nạp title/body/published_at từ DB. Bài không còn trong DB (index cũ) → bỏ
+    URL khỏi known-URL index và tải lại như bài mới; False nếu tải lại lỗi.
+    """
+    if not getattr(item, "known", False):
+        return True
+    article = db.query(NewsArticle).filter(NewsArticle.url == item.url).first()
+    if article is None:
+        get_url_index().discard(item.url)
+        ok = refetch(item)
+        print(f"[known-url] {item.url} không còn trong DB → bỏ khỏi index, tải lại: {'OK' if ok else 'lỗi'}")
+        return ok
+    item.title = article.title
+    item.body = article.body
+    item.published_at = article.published_at
+    return True
+
+
+def _find_reusable(
     db: Session,
-    *,
-    article_id: int,
-    summary: str,
-    category: str | None,
-    model_version: str = MODEL_VERSION,
-) -> NewsNLP:
+    item,
+    force_refresh: bool = False,
+    quality: str = DEFAULT_QUALITY,
+) -> CrawledNews | None:
+    """
+    Nếu đã có NLP cho bài này (cùng model_version, body không đổi, mức quality
+    bằng hoặc cao hơn) và không force_refresh thì dùng lại, tránh phải chạy
+    summarize/classify lại. Body đổi dưới cùng URL → tóm tắt lại (cache nội
+    dung sẽ xử lý bài trùng body).
     """
-    Lưu/khởi tạo record NLP cho bài viết. Nếu đã có cùng model_version thì dùng lại.
+    if force_refresh:
+        return None
+    article = db.query(NewsArticle).filter(NewsArticle.url == item.url).first()
+    if (
+        article
+        and article.nlp
+        and article.nlp.model_version == MODEL_VERSION
+        and article.body == item.body
+        and _quality_satisfies(article.nlp.quality, quality)
+    ):
+        return _to_crawled_news(article, article.nlp)
+    return None
+
+
+def _find_near_duplicate(
+    db: Session,
+    item,
+    quality: str = DEFAULT_QUALITY,
+) -> ProcessedArticle | None:
     """
-    nlp = (
+    Bài gần trùng (MinHash/LSH) với 1 bài đã có summary hợp lệ → đưa vào cùng
+    cụm và dùng lại summary đó, không chạy model. Trả bản ghi chờ lưu (persist_batch).
+    """
+    index = get_near_dup_index()
+    if index is None:
+        return None
+    existing_id = db.query(NewsArticle.id).filter(NewsArticle.url == item.url).scalar()
+    match = index.query(near_dup.signature(item.body), exclude_id=existing_id)
+    if match is None:
+        return None
+
+    donor_id, cluster_id, sim = match
+    donor = (
         db.query(NewsNLP)
-        .filter(
-            NewsNLP.article_id == article_id,
-            NewsNLP.model_version == model_version,
-        )
+        .filter(NewsNLP.article_id == donor_id, NewsNLP.model_version == MODEL_VERSION)
         .first()
     )
-    if nlp:
-        return nlp
+    if donor is None or not _quality_satisfies(donor.quality, quality):
+        return None
 
-    nlp = NewsNLP(
-        article_id=article_id,
-        summary=summary,
-        category=category,
-        model_version=model_version,
+    record = _prepare_summary(
+        item, donor.summary, donor.quality or "best",
+        cluster_id=cluster_id, strip_author=False,
     )
-    db.add(nlp)
-    db.commit()
-    db.refresh(nlp)
-    return nlp
+    index.record_link()
+    print(f"[near-dup] {item.title[:60]} ~ bài #{donor_id} (sim {sim:.2f}, cụm #{cluster_id})")
+    return record
 
 
-def _process_crawled_item(
-    db: Session,
+def _prepare_summary(
     item,
-    force_refresh: bool = False,
-) -> CrawledNews:
+    summary: str,
+    quality: str = DEFAULT_QUALITY,
+    cluster_id: int | None = None,
+    strip_author: bool = True,
+) -> ProcessedArticle:
     """
-    Nhận 1 item từ crawler:
-      - Chuẩn hoá published_at, summary cho Vietnamnet
-      - Gọi summarize + classify (nếu chưa có trong DB hoặc force_refresh=True)
-      - Lưu vào SQLite
-      - Trả về CrawledNews cho response
+    Chuẩn hoá (Vietnamnet) 1 bài đã có summary thành bản ghi chờ lưu
+    (cluster_id: cụm tin gần trùng đã có). Ghi DB theo lô bằng persist_batch.
+    strip_author=False khi summary dùng lại từ bài khác (đã được làm sạch).
     """
-    # Chuẩn hoá thời gian
+    # Chuẩn hoá thời gian (item "known" lấy từ DB nên đã được chuẩn hoá)
     published_at = item.published_at
     if item.source == "vietnamnet":
-        published_at = _format_vietnamnet_published(published_at)
+        if not getattr(item, "known", False):
+            published_at = _format_vietnamnet_published(published_at)
+        if strip_author:
+            summary = _strip_vietnamnet_author(summary)
 
-    # Nếu đã có NLP cho bài này (cùng model_version) và không force_refresh thì dùng lại,
-    # tránh phải chạy summarize/classify lại.
-    article = db.query(NewsArticle).filter(NewsArticle.url == item.url).first()
-    if not force_refresh and article and article.nlp and article.nlp.model_version == MODEL_VERSION:
-        nlp = article.nlp
-        return CrawledNews(
-            title=article.title,
-            body=article.body,
-            source=article.source,
-            url=article.url,
-            published_at=article.published_at,
-            summary=nlp.summary,
-            category=nlp.category,
-        )
-
-    # Chưa có hoặc model_version khác → chạy model lại
-    summary = summarize(item.title, item.body)
-    if item.source == "vietnamnet":
-        summary = _strip_vietnamnet_author(summary)
-
-    # Category từ URL (không cần model phân loại)
-    category = item.category
-
-    # Ghi xuống DB
-    article = _get_or_create_article(
-        db,
+    return ProcessedArticle(
         url=item.url,
         source=item.source,
         title=item.title,
         body=item.body,
         published_at=published_at,
-    )
-
-    nlp = _get_or_create_nlp(
-        db,
-        article_id=article.id,
         summary=summary,
-        category=category,
+        category=item.category,  # Category từ URL (không cần model phân loại)
+        quality=quality,
         model_version=MODEL_VERSION,
+        cluster_id=cluster_id,
     )
 
-    return CrawledNews(
-        title=article.title,
-        body=article.body,
-        source=article.source,
-        url=article.url,
-        published_at=article.published_at,
-        summary=nlp.summary,
-        category=nlp.category,
-    )
+
+def _process_crawled_items(
+    db: Session,
+    items: list,
+    force_refresh: bool = False,
+    quality: str = DEFAULT_QUALITY,
+) -> list[CrawledNews]:
+    """
+    Xử lý 1 lô item từ crawler:
+      - Chuẩn hoá published_at, summary cho Vietnamnet
+      - Item "known" (crawler không tải lại) được nạp nội dung từ DB
+      - Bài đã có NLP (cùng model_version, mức quality bằng hoặc cao hơn)
+        và không force_refresh → dùng lại
+      - Bài gần trùng với bài đã có summary → dùng lại summary của cụm
+      - Các bài còn lại được tóm tắt chung 1 lần bằng summarize_many (batch)
+      - Lưu vào SQLite: cả lô trong 1 transaction (persist_batch)
+      - Trả về list CrawledNews đúng thứ tự input
+    """
+    items = [item for item in items if _resolve_known(db, item)]
+    results: list[CrawledNews | None] = [None] * len(items)
+    to_save: list[tuple[int, ProcessedArticle]] = []
+    pending: list[int] = []
+
+    for idx, item in enumerate(items):
+        results[idx] = _find_reusable(db, item, force_refresh, quality)
+        if results[idx] is not None:
+            continue
+        record = _find_near_duplicate(db, item, quality) if not force_refresh else None
+        if record is not None:
+            to_save.append((idx, record))
+        else:
+            pending.append(idx)
+
+    if pending:
+        # Chưa có hoặc model_version khác → chạy model lại: gửi cả lô vào hàng đợi
+        # suy luận dùng chung, được gom batch cùng các request đồng thời khác.
+        started = time.perf_counter()
+        summaries = get_scheduler().summarize_many(
+            [(items[i].title, items[i].body) for i in pending],
+            quality=quality,
+        )
+        index = get_near_dup_index()
+        if index is not None:
+            index.record_inference(time.perf_counter() - started, len(pending))
+        for idx, summary in zip(pending, summaries):
+            to_save.append((idx, _prepare_summary(items[idx], summary, effective_quality(quality))))
+
+    persist_batch(db, [record for _, record in to_save])
+    for idx, record in to_save:
+        results[idx] = _record_to_crawled_news(record)
+    return results
+
+
+def _process_crawled_item(
+    db: Session,
+    item,
+    force_refresh: bool = False,
+    quality: str = DEFAULT_QUALITY,
+) -> CrawledNews:
+    """
+    Nhận 1 item từ crawler, xử lý như _process_crawled_items với lô 1 bài.
+    """
+    return _process_crawled_items(db, [item], force_refresh=force_refresh, quality=quality)[0]
 
 
 @router.post("/crawl_today", response_model=list[CrawledNews])
@@ -242,14 +323,11 @@ def crawl_today(
     sources = payload.sources or ["vnexpress"]
     limit = payload.limit or 12
 
-    raw_items = crawl_today_news(sources, limit=limit)
+    raw_items = crawl_today_news(sources, limit=limit, use_index=not payload.force_refresh)
 
-    results: list[CrawledNews] = []
-    for item in raw_items:
-        crawled = _process_crawled_item(db, item)
-        results.append(crawled)
-
-    return results
+    return _process_crawled_items(
+        db, raw_items, force_refresh=payload.force_refresh, quality=payload.quality
+    )
 
 
 @router.post("/crawl_today_stream")
@@ -258,99 +336,275 @@ def crawl_today_stream(
     db: Session = Depends(get_db),
 ):
     """
-    Bản stream: model xử lý xong bài nào thì:
-      - Lưu vào SQLite
-      - Stream 1 dòng JSON (NDJSON) về frontend bài đó
+    Bản stream, crawl và tóm tắt chạy chồng lên nhau:
+      - Crawler (stream_today_news) trả từng bài ngay khi trích xong
+      - Bài nào trích xong được gửi ngay vào hàng đợi suy luận (tối đa
+        STREAM_MAX_IN_FLIGHT bài đang chờ; đầy thì crawler tạm dừng)
+      - Bài nào tóm tắt xong thì stream 1 dòng JSON (NDJSON) về frontend,
+        theo thứ tự hoàn thành; `seq` là thứ tự crawl của bài
+      - Ghi SQLite theo lô (persist_batch, 1 transaction): đủ STREAM_PERSIST_BATCH
+        bài, lúc không còn sự kiện chờ xử lý, hoặc khi kết thúc
     """
     sources = payload.sources or ["vnexpress"]
     limit = payload.limit or 12
     force_refresh = payload.force_refresh
-
-    raw_items = crawl_today_news(sources, limit=limit)
+    quality = payload.quality
 
     def iter_items() -> Iterable[str]:
-        count = 0
+        events: queue.Queue = queue.Queue()
+        slots = threading.Semaphore(STREAM_MAX_IN_FLIGHT)
+        stop = threading.Event()
+
+        def feed() -> None:
+            # Thread đọc crawler: mỗi bài chiếm 1 slot tới khi được stream ra
+            producer = stream_today_news(sources, limit=limit, use_index=not force_refresh)
+            try:
+                for item in producer:
+                    while not slots.acquire(timeout=0.2):
+                        if stop.is_set():
+                            return
+                    if stop.is_set():
+                        return
+                    events.put(("crawled", item, None))
+            except Exception as e:
+                print(f"[stream] crawl ERROR: {str(e)[:100]}")
+            finally:
+                producer.close()
+                events.put(("crawl_done", None, None))
+
+        threading.Thread(target=feed, name="crawl-stream-feed", daemon=True).start()
+
+        seq = 0
+        in_flight = 0
+        crawl_done = False
         seen_urls = set()
         skipped = 0
-        for item in raw_items:
+        started = time.perf_counter()
+        first_at = None
+
+        to_save: list[ProcessedArticle] = []
+
+        def flush() -> None:
+            if not to_save:
+                return
             try:
-                # Check duplicate trong raw_items từ crawler
-                if item.url in seen_urls:
-                    skipped += 1
-                    continue
-                seen_urls.add(item.url)
-                
-                count += 1
-                print(f"[{count}] {item.title[:80]}")
-                crawled = _process_crawled_item(db, item, force_refresh=force_refresh)
-                # Mỗi bài là 1 dòng JSON, kết thúc bằng \n
-                yield json.dumps(crawled.model_dump(), ensure_ascii=False) + "\n"
+                persist_batch(db, to_save)
             except Exception as e:
-                print(f"[{count}] ERROR: {str(e)[:100]}")
-                # Skip item này và tiếp tục với item tiếp theo
-                continue
-        print(f"\n=== Finished: {count} articles processed, {skipped} duplicates skipped ===")
+                print(f"[stream] lưu {len(to_save)} bài ERROR: {str(e)[:100]}")
+            to_save.clear()
+
+        def emit(crawled: CrawledNews, item_seq: int) -> str:
+            nonlocal first_at
+            if first_at is None:
+                first_at = time.perf_counter() - started
+                print(f"=== First article after {first_at:.2f}s ===")
+            crawled.seq = item_seq
+            # Mỗi bài là 1 dòng JSON, kết thúc bằng \n
+            return json.dumps(crawled.model_dump(), ensure_ascii=False) + "\n"
+
+        try:
+            while not (crawl_done and in_flight == 0):
+                if len(to_save) >= STREAM_PERSIST_BATCH or (to_save and events.empty()):
+                    flush()
+                kind, item, extra = events.get()
+
+                if kind == "crawl_done":
+                    crawl_done = True
+                    continue
+
+                if kind == "crawled":
+                    # Check duplicate trong các bài crawler trả về
+                    if item.url in seen_urls:
+                        skipped += 1
+                        slots.release()
+                        continue
+                    seen_urls.add(item.url)
+                    seq += 1
+                    print(f"[{seq}] {item.title[:80]}")
+
+                    try:
+                        if not _resolve_known(db, item):
+                            slots.release()
+                            continue
+                        reused = _find_reusable(db, item, force_refresh, quality)
+                        linked = None
+                        if reused is None and not force_refresh:
+                            linked = _find_near_duplicate(db, item, quality)
+                    except Exception as e:
+                        print(f"[{seq}] ERROR: {str(e)[:100]}")
+                        slots.release()
+                        continue
+                    if linked is not None:
+                        to_save.append(linked)
+                        reused = _record_to_crawled_news(linked)
+                    if reused is not None:
+                        slots.release()
+                        yield emit(reused, seq)
+                        continue
+
+                    in_flight += 1
+                    fut = get_scheduler().submit(item.title, item.body, quality)
+                    fut.add_done_callback(
+                        lambda f, item=item, s=seq, t=time.perf_counter():
+                            events.put(("summarized", item, (s, t, f)))
+                    )
+                    continue
+
+                # kind == "summarized": DB chỉ dùng ở thread của request (Session không thread-safe)
+                item_seq, submitted_at, fut = extra
+                in_flight -= 1
+                slots.release()
+                index = get_near_dup_index()
+                if index is not None and fut.exception() is None:
+                    index.record_inference(time.perf_counter() - submitted_at, 1)
+                try:
+                    record = _prepare_summary(item, fut.result(), effective_quality(quality))
+                except Exception as e:
+                    print(f"[{item_seq}] ERROR: {str(e)[:100]}")
+                    # Skip bài này và tiếp tục
+                    continue
+                to_save.append(record)
+                yield emit(_record_to_crawled_news(record), item_seq)
+        finally:
+            stop.set()
+            flush()
+
+        print(f"\n=== Finished: {seq} articles processed, {skipped} duplicates skipped ===")
 
     return StreamingResponse(iter_items(), media_type="application/json")
 
 
+# Các trường /by_date trả được (fields=...) → cột tương ứng
+BY_DATE_FIELDS = {
+    "title": NewsArticle.title,
+    "body": NewsArticle.body,
+    "source": NewsArticle.source,
+    "url": NewsArticle.url,
+    "published_at": NewsArticle.published_at,
+    "summary": NewsNLP.summary,
+    "category": NewsNLP.category,
+    "quality": NewsNLP.quality,
+}
+BY_DATE_PAGE_SIZE = 100
+
+
+def _encode_cursor(created_at: datetime, article_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{article_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, article_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(article_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="cursor không hợp lệ")
+
+
+def _by_date_row(row, fields: list[str]) -> dict:
+    out = {f: getattr(row, f) for f in fields}
+    if "quality" in out:
+        out["quality"] = out["quality"] or "best"
+    return out
+
+
+def _by_date_query(db: Session, target_date, selected, cursor=None):
+    """
+    Bài của 1 ngày (theo created_date, dùng idx_article_created_date) join bản NLP
+    mới nhất, mới nhất trước; cursor = (created_at, id) của dòng cuối trang trước.
+    """
+    # Bản NLP mới nhất của mỗi bài (dùng idx_nlp_article_created)
+    latest_nlp = (
+        db.query(NewsNLP.id)
+        .filter(NewsNLP.article_id == NewsArticle.id)
+        .order_by(NewsNLP.created_at.desc(), NewsNLP.id.desc())
+        .limit(1)
+        .correlate(NewsArticle)
+        .scalar_subquery()
+    )
+    q = (
+        db.query(
+            NewsArticle.id.label("id"),
+            NewsArticle.created_at.label("created_at"),
+            *(BY_DATE_FIELDS[f].label(f) for f in selected),
+        )
+        .select_from(NewsArticle)
+        .join(NewsNLP, NewsNLP.id == latest_nlp)
+        .filter(NewsArticle.created_date == target_date)
+    )
+    if cursor:
+        c_at, c_id = cursor
+        q = q.filter(or_(
+            NewsArticle.created_at < c_at,
+            and_(NewsArticle.created_at == c_at, NewsArticle.id < c_id),
+        ))
+    return q.order_by(NewsArticle.created_at.desc(), NewsArticle.id.desc())
+
+
+def _available_dates_query(db: Session, limit: int = 30):
+    """Các ngày có tin, mới nhất trước: đọc daily_stats (khoá chính bắt đầu bằng date), không đụng news_article."""
+    return (
+        db.query(DailyStat.date.label("date"))
+        .filter(DailyStat.count > 0)
+        .distinct()
+        .order_by(DailyStat.date.desc())
+        .limit(limit)
+    )
+
+
 @router.get("/by_date", response_model=list[CrawledNews])
 def get_news_by_date(
     date: str = Query(..., description="Ngày cần xem tin (YYYY-MM-DD)"),
+    cursor: str | None = Query(None, description="Giá trị header X-Next-Cursor của trang trước"),
+    limit: int | None = Query(None, ge=1, le=1000, description=f"Số bài / trang (mặc định {BY_DATE_PAGE_SIZE}; ndjson: cả ngày)"),
+    fields: str | None = Query(None, description="Các trường cần lấy, vd. title,summary,category (mặc định: tất cả)"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     db: Session = Depends(get_db),
 ):
     """
-    Lấy tất cả tin tức đã crawl trong 1 ngày cụ thể từ database.
-    Ví dụ: /api/v1/news/by_date?date=2025-11-28
+    Lấy tin tức đã crawl trong 1 ngày cụ thể từ database, mới nhất trước.
+    Ví dụ: /api/v1/news/by_date?date=2025-11-28&fields=title,summary,category
+
+    - 1 query duy nhất: join bài với bản NLP mới nhất của nó (không N+1)
+    - Phân trang keyset theo (created_at, id): còn trang sau thì header
+      X-Next-Cursor chứa cursor để gọi tiếp
+    - format=ndjson: stream từng bài 1 dòng JSON (không giới hạn limit nếu không truyền)
     """
     try:
         # Parse ngày
         target_date = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Định dạng ngày không hợp lệ. Dùng YYYY-MM-DD")
-    
-    # Tạo range từ 00:00:00 đến 23:59:59
-    start_dt = datetime.combine(target_date, datetime.min.time())
-    end_dt = datetime.combine(target_date, datetime.max.time())
-    
-    # Query theo created_at - không dùng join để tránh duplicate
-    articles = (
-        db.query(NewsArticle)
-        .filter(NewsArticle.created_at >= start_dt)
-        .filter(NewsArticle.created_at <= end_dt)
-        .order_by(NewsArticle.created_at.desc())
-        .all()
-    )
-    
-    if not articles:
-        return []
-    
-    results: list[CrawledNews] = []
-    for article in articles:
-        # Lấy NLP record với model_version hiện tại hoặc mới nhất
-        nlp = (
-            db.query(NewsNLP)
-            .filter(NewsNLP.article_id == article.id)
-            .order_by(NewsNLP.created_at.desc())
-            .first()
-        )
-        
-        if not nlp:
-            continue
-        
-        results.append(
-            CrawledNews(
-                title=article.title,
-                body=article.body,
-                source=article.source,
-                url=article.url,
-                published_at=article.published_at,
-                summary=nlp.summary,
-                category=nlp.category,
-            )
+
+    selected = list(BY_DATE_FIELDS) if not fields else [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in BY_DATE_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"fields không hợp lệ: {', '.join(unknown)}. Chọn trong: {', '.join(BY_DATE_FIELDS)}",
         )
-    
-    return results
+
+    q = _by_date_query(db, target_date, selected, _decode_cursor(cursor) if cursor else None)
+
+    if format == "ndjson":
+        if limit is not None:
+            q = q.limit(limit)
+
+        def iter_rows():
+            for row in q.yield_per(200):
+                yield json.dumps(_by_date_row(row, selected), ensure_ascii=False) + "\n"
+
+        return StreamingResponse(iter_rows(), media_type="application/x-ndjson")
+
+    page_size = limit or BY_DATE_PAGE_SIZE
+    rows = q.limit(page_size + 1).all()
+    headers = {}
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    # Trả JSONResponse trực tiếp: response_model chỉ để mô tả, không validate lại bản đã lược trường
+    return JSONResponse([_by_date_row(r, selected) for r in rows], headers=headers)
 
 
 @router.get("/available_dates")
@@ -358,13 +612,83 @@ def get_available_dates(db: Session = Depends(get_db)):
     """
     Lấy danh sách các ngày có tin tức trong database.
     """
-    # Lấy danh sách các ngày duy nhất từ created_at
-    dates = (
-        db.query(func.date(NewsArticle.created_at).label("date"))
-        .distinct()
-        .order_by(func.date(NewsArticle.created_at).desc())
-        .limit(30)  # Lấy 30 ngày gần nhất
-        .all()
-    )
+    # 30 ngày gần nhất, lấy từ bảng thống kê daily_stats
+    dates = _available_dates_query(db).all()
     
     return {"dates": [str(d[0]) for d in dates]}
+
+
+@router.get("/facets")
+def get_facets(
+    date_from: str | None = Query(None, description="Từ ngày (YYYY-MM-DD)"),
+    date_to: str | None = Query(None, description="Đến ngày (YYYY-MM-DD)"),
+    days: int = Query(30, ge=1, le=366, description="Số ngày gần nhất khi không truyền khoảng ngày"),
+    db: Session = Depends(get_db),
+):
+    """
+    Số bài mỗi ngày kèm phân bố theo nguồn và category (category "" = chưa phân loại).
+    Đọc từ daily_stats: chi phí theo số ngày, không theo số bài.
+    """
+    try:
+        start = datetime.strptime(date_from, "%Y-%m-%d").date() if date_from else None
+        end = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Định dạng ngày không hợp lệ. Dùng YYYY-MM-DD")
+
+    return {"days": daily_stats.facets(db, start, end, days)}
+
+
+@router.get("/inference_stats")
+def get_inference_stats():
+    """
+    Thông số hàng đợi suy luận: độ sâu queue, kích thước batch, thời gian chờ.
+    Dùng để chỉnh SUMMARIZER_BATCH_WINDOW_MS / SUMMARIZER_MAX_BATCH.
+    Ở pool mode kèm trạng thái worker (bận, job chờ, số lần restart).
+    """
+    stats = get_scheduler().stats()
+    if POOL_WORKERS > 0:
+        stats["pool"] = get_worker_pool().stats()
+    return stats
+
+
+@router.get("/crawl_stats")
+def get_crawl_stats():
+    """
+    Thống kê known-URL index: số URL đã biết, số watermark trang danh mục,
+    số lần tải bài đã được bỏ qua, số URL bị bỏ vì bài không còn trong DB;
+    kèm cache HTTP (request / byte tiết kiệm) và
+    trạng thái từng host (throughput, lỗi, retry, concurrency / nhịp hiện tại, circuit)
+    và nguồn link (số cặp lấy từ RSS / sitemap, số lần quay về trang danh mục).
+    """
+    http_cache = get_http_cache()
+    discovery = get_discovery()
+    return {
+        **get_url_index().stats(),
+        "http_cache": http_cache.stats() if http_cache else {"enabled": False},
+        "hosts": host_stats(),
+        "discovery": discovery.stats() if discovery else {"enabled": False},
+    }
+
+
+@router.get("/near_dup_stats")
+def get_near_dup_stats():
+    """
+    Thống kê phát hiện tin gần trùng: số cụm, số bài đã dùng lại summary của
+    cụm, thời gian model ước lượng đã tiết kiệm.
+    """
+    index = get_near_dup_index()
+    if index is None:
+        return {"enabled": False}
+    return index.stats()
+
+
+@router.get("/cache_stats")
+def get_cache_stats():
+    """
+    Thống kê cache summary theo nội dung: tỉ lệ hit từng tầng (RAM / SQLite)
+    và tổng thời gian model đã tiết kiệm.
+    """
+    cache = get_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
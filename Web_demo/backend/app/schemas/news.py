@@ -1,6 +1,9 @@
 #app\schemas\news.py
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List
+
+# Mức chất lượng tóm tắt: fast (greedy) < balanced (beam nhỏ) < best (beam đầy đủ)
+Quality = Literal["fast", "balanced", "best"]
 
 
 class CrawlRequest(BaseModel):
@@ -9,6 +12,7 @@ class CrawlRequest(BaseModel):
     limit: int = 20
     force_new: bool = False
     force_refresh: bool = False  # Bắt buộc chạy model lại, không dùng cache
+    quality: Quality = "best"  # fast cho người dùng tương tác, best cho backfill
 
 
 class CrawledNews(BaseModel):
@@ -20,3 +24,5 @@ class CrawledNews(BaseModel):
 
     summary: str
     category: str  # Category từ URL, không còn dùng model phân loại
+    quality: Optional[str] = None  # Mức chất lượng đã dùng để sinh summary
+    seq: Optional[int] = None  # Thứ tự crawl (chỉ có ở endpoint stream, emit theo thứ tự hoàn thành)
@@ -0,0 +1,619 @@
+#\app\services\async_crawler.py
+"""
+Engine crawl bất đồng bộ (asyncio + aiohttp) thay cho vòng lặp requests tuần tự.
+
+- 1 ClientSession dùng chung: connection pool + HTTP keep-alive.
+- Giới hạn theo host do host_control điều chỉnh (AIMD theo latency và 429/5xx),
+  kèm retry có backoff và circuit breaker (thay cho time.sleep(SLEEP) giữa các lần tải).
+- Các cặp (site, subject) chạy song song; trong 1 cặp, trang danh mục vẫn đi
+  lần lượt, còn bài viết được tải song song theo "cửa sổ" rồi xử lý đúng thứ tự
+  link trên trang → giữ nguyên max_items, luật dừng và dedup (title / hash body)
+  như crawl_news.crawl_subject.
+- Extractor bài viết truyền vào theo site, nên CLI dataset dùng được extractor riêng.
+- Đi qua cache HTTP trên đĩa (http_cache) như crawl_news.fetch.
+- Tuỳ chọn `discovery` (discovery.Discovery): trang 1 lấy link từ RSS / sitemap
+  (nhỏ hơn, có thời điểm đăng → lọc bài cũ trước khi tải), lỗi thì quay về
+  trang danh mục HTML.
+- Tuỳ chọn `known` (KnownUrlIndex): link đã xử lý không bị tải lại mà trả về
+  row "known" (chỉ có url, nội dung lấy từ DB); gặp watermark của trang danh
+  mục thì không tải các trang sau.
+
+Code đồng bộ gọi qua crawl_pairs(...) (chờ xong hết) hoặc stream_pairs(...)
+(generator: nhận từng bài ngay khi trích xong, qua queue có giới hạn).
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import aiohttp
+
+from app.services import crawl_news, fast_extract
+from app.services.discovery import Discovery, parse_feed
+from app.services.host_control import (
+    HOST_MAX_CONCURRENCY,
+    HOST_MAX_RPS,
+    RETRIES,
+    AsyncHostGate,
+    host_state,
+    is_transient,
+    parse_retry_after,
+)
+from app.services.http_cache import HttpCache, get_http_cache
+
+TOTAL_CONNECTIONS = int(os.getenv("CRAWL_TOTAL_CONNECTIONS", "32"))
+# Số bài đã trích xong tối đa chờ consumer lấy (stream_pairs); đầy → crawler dừng tải
+STREAM_QUEUE_SIZE = int(os.getenv("CRAWL_STREAM_QUEUE_SIZE", "8"))
+
+# Extractor: html -> (title, lead, body, published_at)
+Extractor = Callable[[str], Tuple[str, str, str, str]]
+# Callback khi 1 bài được nhận: (vị trí job, row)
+RowCallback = Callable[[int, dict], Awaitable[None]]
+# Callback sau mỗi trang danh mục: (vị trí job, trang, rows của trang, cặp dừng tại đây?)
+PageCallback = Callable[[int, int, List[dict], bool], Awaitable[None]]
+# Callback khi tải trang danh mục lỗi: (vị trí job, trang)
+PageFailedCallback = Callable[[int, int], Awaitable[None]]
+
+# Mặc định dùng extractor BeautifulSoup, CRAWL_FAST_EXTRACT=1 → backend lxml (fast_extract)
+_extract = fast_extract if fast_extract.FAST_EXTRACT_ENABLED else crawl_news
+
+DEFAULT_EXTRACTORS: Dict[str, Extractor] = {
+    "vnexpress": _extract.extract_article_vne,
+    "vietnamnet": _extract.extract_article_vnn,
+}
+
+
+# _fetch_article trả giá trị này khi URL đã có trong known-URL index
+_KNOWN = object()
+
+
+@dataclass
+class CrawlJob:
+    """1 cặp (site, subject) cần crawl."""
+    site: str
+    subject_slug: str
+    pattern: str
+    list_selectors: list
+
+
+class AsyncCrawler:
+    def __init__(
+        self,
+        extractors: Optional[Dict[str, Extractor]] = None,
+        host_concurrency: int = HOST_MAX_CONCURRENCY,
+        host_rps: float = HOST_MAX_RPS,
+        timeout: float = crawl_news.TIMEOUT,
+        known=None,
+        discovery: Optional[Discovery] = None,
+    ):
+        """host_concurrency / host_rps: trần cứng; trong trần, host_control tự điều chỉnh."""
+        self.extractors = extractors or DEFAULT_EXTRACTORS
+        self.known = known
+        self.discovery = discovery
+        self.http_cache = get_http_cache()
+        self.host_concurrency = host_concurrency
+        self.host_rps = host_rps
+        self.timeout = timeout
+        self._gates: Dict[str, AsyncHostGate] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=TOTAL_CONNECTIONS,
+            limit_per_host=self.host_concurrency,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=crawl_news.HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    def _gate(self, url: str) -> AsyncHostGate:
+        host = urlsplit(url).netloc
+        gate = self._gates.get(host)
+        if gate is None:
+            gate = self._gates[host] = AsyncHostGate(host_state(url), self.host_concurrency, self.host_rps)
+        return gate
+
+    # ---------- HTTP ----------
+    async def fetch(self, url: str) -> Optional[str]:
+        """Giống crawl_news.fetch: trả HTML khi 200 và có nội dung, lỗi → None."""
+        cache = self.http_cache
+        entry = await asyncio.to_thread(cache.lookup, url) if cache else None
+        if entry is not None and cache.is_fresh(entry):
+            return await asyncio.to_thread(cache.serve_fresh, entry)
+
+        state = host_state(url)
+        headers = HttpCache.conditional_headers(entry)
+        for attempt in range(RETRIES + 1):
+            status, retry_after = None, None
+            async with self._gate(url):
+                if not state.allow():
+                    break  # circuit đang mở: fail ngay
+                probe = state.probing  # request thử duy nhất của circuit half-open
+                self.requests += 1
+                t0 = time.monotonic()
+                try:
+                    async with self._session.get(
+                        url, headers=headers, timeout=aiohttp.ClientTimeout(total=state.timeout())
+                    ) as r:
+                        status = r.status
+                        if status == 304 and entry is not None:
+                            state.record_success(time.monotonic() - t0, status)
+                            return await asyncio.to_thread(
+                                cache.serve_not_modified, entry, r.content_length or 0
+                            )
+                        if status == 200:
+                            text = await r.text(errors="replace")
+                            wire = r.content_length or len(text.encode("utf-8"))
+                            state.record_success(time.monotonic() - t0, status, wire)
+                            if not text:
+                                break
+                            if cache:
+                                await asyncio.to_thread(
+                                    cache.store, url, text, r.headers.get("ETag"),
+                                    r.headers.get("Last-Modified"), wire,
+                                )
+                            return text
+                        retry_after = parse_retry_after(r.headers.get("Retry-After"))
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    status = None
+                except BaseException:
+                    # Bị huỷ (CancelledError) trước khi có kết quả → không để probing kẹt True
+                    if probe:
+                        state.abort_probe()
+                    raise
+                state.record_failure(status, time.monotonic() - t0)
+            if not is_transient(status) or attempt == RETRIES:
+                break
+            self.retries += 1
+            state.record_retry()
+            await asyncio.sleep(state.backoff(attempt, retry_after))
+        self.failures += 1
+        return None
+
+    async def _fetch_article(self, site: str, url: str):
+        if self.known is not None and self.known.contains(url):
+            return _KNOWN
+        html = await self.fetch(url)
+        if not html:
+            return None
+        # Parse HTML ở thread riêng để không chặn event loop
+        return await asyncio.to_thread(self.extractors[site], html)
+
+    @staticmethod
+    def _accept(
+        job: CrawlJob,
+        art: str,
+        extracted,
+        seen_title: Set[str],
+        seen_bhash: Set[str],
+    ) -> Optional[dict]:
+        """
+        Lọc 1 bài đã trích (body >= 200 ký tự, chưa trùng title / hash body) và
+        tạo row. Kiểm tra + đánh dấu không có await ở giữa → không race giữa các cặp.
+        """
+        if not extracted:
+            return None
+        subject_display = crawl_news.CANON[job.subject_slug]
+        if extracted is _KNOWN:
+            # Bài đã xử lý: không tải, nội dung/summary lấy từ DB
+            if "url:" + art in seen_title:
+                return None
+            seen_title.add("url:" + art)
+            return {
+                "title": "",
+                "lead": "",
+                "body": "",
+                "url": art,
+                "subject": subject_display,
+                "published_at": "",
+                "source": job.site,
+                "original_subject": subject_display,
+                "known": True,
+            }
+
+        t, l, b, pub = extracted
+        if not t or not b or len(b) < 200:
+            return None
+
+        tkey = crawl_news.norm(t).lower()
+        bkey = crawl_news.sha1(crawl_news.norm(b))
+        if tkey in seen_title or bkey in seen_bhash:
+            return None
+
+        seen_title.add(tkey); seen_bhash.add(bkey)
+        return {
+            "title": t,
+            "lead": l or "",
+            "body": b,
+            "url": art,
+            "subject": subject_display,
+            "published_at": pub or "",
+            "source": job.site,
+            "original_subject": subject_display,
+        }
+
+    async def _discover(self, job: CrawlJob) -> Optional[List[str]]:
+        """Link bài mới từ nguồn RSS / sitemap đầu tiên dùng được; None → quay về HTML."""
+        for _, url in self.discovery.sources(job.site, job.subject_slug, job.pattern):
+            text = await self.fetch(url)
+            entries = await asyncio.to_thread(parse_feed, text) if text else []
+            if not entries:
+                self.discovery.mark_dead(url)
+                continue
+            return self.discovery.select(entries)
+        self.discovery.record_fallback()
+        return None
+
+    async def _listing_links(self, job: CrawlJob, page: int) -> Optional[List[str]]:
+        """Link bài trên 1 trang danh mục (URL tuyệt đối); None nếu lỗi tải."""
+        if page == 1 and self.discovery is not None:
+            links = await self._discover(job)
+            if links is not None:
+                return links
+        url = crawl_news.build_list_url(job.pattern, page)
+        html = await self.fetch(url)
+        if not html:
+            return None
+        pairs = await asyncio.to_thread(_extract.extract_pairs, html, job.list_selectors)
+        base = crawl_news.base_from(url)
+        return [href if href.startswith("http") else urljoin(base, href) for _, href in pairs]
+
+    # ---------- Crawl 1 subject x 1 site ----------
+    async def crawl_subject(
+        self,
+        job: CrawlJob,
+        pages: int,
+        seen_title: Set[str],
+        seen_bhash: Set[str],
+        max_items: Optional[int] = None,
+        on_row: Optional[RowCallback] = None,
+        job_index: int = 0,
+        start_page: int = 1,
+        on_page: Optional[PageCallback] = None,
+        collect: bool = True,
+        on_page_failed: Optional[PageFailedCallback] = None,
+    ) -> List[dict]:
+        """
+        start_page / on_page cho crawl có checkpoint: on_page(vị trí job, trang,
+        rows của trang, dừng?) được gọi sau mỗi trang danh mục đã xử lý xong,
+        on_page_failed(vị trí job, trang) khi tải trang lỗi (bỏ qua, crawl tiếp).
+        collect=False: không giữ rows trong RAM (chỉ nhận qua on_row / on_page).
+        """
+        site, subject_slug = job.site, job.subject_slug
+        results: List[dict] = []
+        n_results = 0
+
+        # Watermark của lần crawl trước (đọc 1 lần, trước khi trang 1 ghi đè)
+        listing_key = crawl_news.build_list_url(job.pattern, 1)
+        mark = self.known.watermark(listing_key) if self.known is not None else None
+
+        for page in range(start_page, pages + 1):
+            if max_items is not None and n_results >= max_items:
+                break
+
+            links = await self._listing_links(job, page)
+            if links is None:
+                print(f"[{site}:{subject_slug}] page {page}: lỗi tải")
+                if on_page_failed is not None:
+                    await on_page_failed(job_index, page)
+                continue
+            if not links:
+                print(f"[{site}:{subject_slug}] page {page}: 0 link → dừng")
+                if on_page is not None:
+                    await on_page(job_index, page, [], True)
+                break
+
+            reached_watermark = mark is not None and mark in links
+            if self.known is not None and page == 1:
+                await asyncio.to_thread(self.known.set_watermark, listing_key, links[0])
+
+            added, pos = 0, 0
+            page_rows: List[dict] = []
+            while pos < len(links):
+                if max_items is not None and n_results >= max_items:
+                    break
+                # Chỉ tải đúng số bài còn thiếu (hoặc cả trang nếu không giới hạn)
+                size = len(links) - pos if max_items is None else max_items - n_results
+                window = links[pos: pos + size]
+                pos += len(window)
+
+                extracted = await asyncio.gather(*(self._fetch_article(site, a) for a in window))
+                for art, extracted_row in zip(window, extracted):
+                    if max_items is not None and n_results >= max_items:
+                        break
+                    row = self._accept(job, art, extracted_row, seen_title, seen_bhash)
+                    if row is None:
+                        continue
+                    if collect:
+                        results.append(row)
+                    n_results += 1
+                    page_rows.append(row)
+                    added += 1
+                    if on_row is not None:
+                        await on_row(job_index, row)
+
+            print(f"[{site}:{subject_slug}] page {page}: +{added} (subj total {n_results})")
+            if on_page is not None:
+                await on_page(job_index, page, page_rows, added == 0 or reached_watermark)
+
+            if added == 0:
+                print(f"[{site}:{subject_slug}] page {page}: không thêm mới → dừng")
+                break
+            if reached_watermark:
+                print(f"[{site}:{subject_slug}] page {page}: gặp watermark → dừng")
+                break
+
+        return results
+
+    async def crawl_many(
+        self,
+        jobs: Sequence[CrawlJob],
+        pages: int,
+        seen_title: Set[str],
+        seen_bhash: Set[str],
+        max_items: Optional[int] = None,
+        on_row: Optional[RowCallback] = None,
+    ) -> List[List[dict]]:
+        """Crawl song song nhiều cặp, kết quả trả theo đúng thứ tự jobs."""
+        return list(await asyncio.gather(*(
+            self.crawl_subject(job, pages, seen_title, seen_bhash, max_items, on_row, i)
+            for i, job in enumerate(jobs)
+        )))
+
+    # ---------- Crawl theo hạn mức tổng ----------
+    async def crawl_quota(
+        self,
+        jobs: Sequence[CrawlJob],
+        limit: int,
+        on_row: Optional[RowCallback] = None,
+    ) -> List[Tuple[int, int, dict]]:
+        """
+        Crawl tối đa `limit` bài cho cả lượt:
+          1) Tải song song trang 1 danh mục của mọi cặp (chưa tải bài nào)
+          2) Xếp link theo vòng công bằng giữa các subject (fair_order)
+          3) Tải bài theo thứ tự đó, luôn giữ số bài đang tải + đã nhận <= limit;
+             bài hỏng / trùng thì lấy link kế tiếp; đủ limit thì huỷ các fetch còn dở
+        Trả list (thứ hạng, vị trí job, row), sắp theo thứ hạng.
+        """
+        links_per_job = await asyncio.gather(*(self._listing_links(job, 1) for job in jobs))
+        if self.known is not None:
+            for job, links in zip(jobs, links_per_job):
+                if links:
+                    await asyncio.to_thread(
+                        self.known.set_watermark, crawl_news.build_list_url(job.pattern, 1), links[0]
+                    )
+
+        candidates = iter(enumerate(fair_order(jobs, [links or [] for links in links_per_job])))
+        seen_title: Set[str] = set()
+        seen_bhash: Set[str] = set()
+        accepted: List[Tuple[int, int, dict]] = []
+        in_flight: Set[asyncio.Task] = set()
+
+        async def _fetch(rank: int, job_index: int, url: str):
+            job = jobs[job_index]
+            return rank, job_index, url, await self._fetch_article(job.site, url)
+
+        def _top_up() -> None:
+            while len(accepted) + len(in_flight) < limit:
+                nxt = next(candidates, None)
+                if nxt is None:
+                    return
+                rank, (job_index, url) = nxt
+                in_flight.add(asyncio.create_task(_fetch(rank, job_index, url)))
+
+        try:
+            _top_up()
+            while in_flight and len(accepted) < limit:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    in_flight.discard(task)
+                    rank, job_index, url, extracted = task.result()
+                    if len(accepted) >= limit:
+                        continue
+                    row = self._accept(jobs[job_index], url, extracted, seen_title, seen_bhash)
+                    if row is None:
+                        continue
+                    accepted.append((rank, job_index, row))
+                    if on_row is not None:
+                        await on_row(job_index, row)
+                _top_up()
+        finally:
+            # Đủ hạn mức (hoặc bị huỷ) → dừng các fetch còn đang chạy
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+        print(f"[async_crawler] hạn mức {limit}: nhận {len(accepted)} bài từ {len(jobs)} cặp")
+        return sorted(accepted, key=lambda x: x[0])
+
+
+def fair_order(jobs: Sequence[CrawlJob], links_per_job: Sequence[List[str]]) -> List[Tuple[int, str]]:
+    """
+    Thứ tự chọn link công bằng giữa các subject: mỗi vòng, mỗi subject được 1 bài
+    (site luân phiên giữa các vòng và lệch nhau giữa các subject), nên với hạn mức
+    nhỏ mọi subject đều có bài trước khi subject nào có bài thứ hai.
+    Trả list (vị trí job, url).
+    """
+    by_subject: Dict[str, List[int]] = {}
+    for i, job in enumerate(jobs):
+        by_subject.setdefault(job.subject_slug, []).append(i)
+
+    cursors = [0] * len(jobs)
+    order: List[Tuple[int, str]] = []
+    rnd = 0
+    while True:
+        progressed = False
+        for s_idx, job_ids in enumerate(by_subject.values()):
+            # Thử các site của subject bắt đầu từ site "đến lượt" ở vòng này
+            for k in range(len(job_ids)):
+                ji = job_ids[(s_idx + rnd + k) % len(job_ids)]
+                if cursors[ji] < len(links_per_job[ji]):
+                    order.append((ji, links_per_job[ji][cursors[ji]]))
+                    cursors[ji] += 1
+                    progressed = True
+                    break
+        if not progressed:
+            return order
+        rnd += 1
+
+
+def _run_sync(coro):
+    """asyncio.run, kể cả khi thread hiện tại đã có event loop đang chạy."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
+def crawl_pairs(
+    jobs: Sequence[CrawlJob],
+    pages: int,
+    seen_title: Optional[Set[str]] = None,
+    seen_bhash: Optional[Set[str]] = None,
+    max_items: Optional[int] = None,
+    extractors: Optional[Dict[str, Extractor]] = None,
+    known=None,
+    discovery: Optional[Discovery] = None,
+) -> List[List[dict]]:
+    """Wrapper đồng bộ: crawl các cặp (site, subject), trả list rows theo thứ tự jobs."""
+    seen_title = set() if seen_title is None else seen_title
+    seen_bhash = set() if seen_bhash is None else seen_bhash
+
+    async def _main():
+        async with AsyncCrawler(extractors=extractors, known=known, discovery=discovery) as crawler:
+            t0 = time.perf_counter()
+            out = await crawler.crawl_many(jobs, pages, seen_title, seen_bhash, max_items)
+            print(
+                f"[async_crawler] {len(jobs)} cặp, {crawler.requests} request "
+                f"({crawler.failures} lỗi) trong {time.perf_counter() - t0:.1f}s"
+            )
+            if crawler.http_cache:
+                print(f"[async_crawler] {crawler.http_cache.summary_line()}")
+            return out
+
+    return _run_sync(_main())
+
+
+def crawl_quota(
+    jobs: Sequence[CrawlJob],
+    limit: int,
+    extractors: Optional[Dict[str, Extractor]] = None,
+    known=None,
+    discovery: Optional[Discovery] = None,
+) -> List[Tuple[int, dict]]:
+    """Wrapper đồng bộ của AsyncCrawler.crawl_quota: list (vị trí job, row) theo thứ hạng."""
+
+    async def _main():
+        async with AsyncCrawler(extractors=extractors, known=known, discovery=discovery) as crawler:
+            t0 = time.perf_counter()
+            out = await crawler.crawl_quota(jobs, limit)
+            print(
+                f"[async_crawler] {crawler.requests} request "
+                f"({crawler.failures} lỗi) trong {time.perf_counter() - t0:.1f}s"
+            )
+            if crawler.http_cache:
+                print(f"[async_crawler] {crawler.http_cache.summary_line()}")
+            return [(job_index, row) for _, job_index, row in out]
+
+    return _run_sync(_main())
+
+
+class _Stopped(Exception):
+    """Consumer của stream_pairs đã dừng (vd. client ngắt kết nối)."""
+
+
+_DONE = object()
+
+
+def stream_pairs(
+    jobs: Sequence[CrawlJob],
+    pages: int,
+    max_items: Optional[int] = None,
+    extractors: Optional[Dict[str, Extractor]] = None,
+    maxsize: int = STREAM_QUEUE_SIZE,
+    known=None,
+    limit: Optional[int] = None,
+    discovery: Optional[Discovery] = None,
+) -> Iterator[Tuple[int, dict]]:
+    """
+    Generator: crawl ở thread nền, trả (vị trí job, row) theo thứ tự hoàn thành.
+    Queue có giới hạn → consumer chậm thì crawler chờ (backpressure);
+    đóng generator giữa chừng sẽ dừng crawler.
+    Có `limit` → crawl theo hạn mức tổng (crawl_quota) thay cho từng cặp.
+    """
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def _put(item) -> None:
+        while True:
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    raise _Stopped()
+
+    async def _main():
+        async def on_row(job_index: int, row: dict) -> None:
+            await asyncio.to_thread(_put, (job_index, row))
+
+        async with AsyncCrawler(extractors=extractors, known=known, discovery=discovery) as crawler:
+            if limit is not None:
+                await crawler.crawl_quota(jobs, limit, on_row)
+            else:
+                await crawler.crawl_many(jobs, pages, set(), set(), max_items, on_row)
+
+    def _produce():
+        try:
+            asyncio.run(_main())
+        except _Stopped:
+            return
+        except Exception as e:
+            print(f"[async_crawler] lỗi: {str(e)[:200]}")
+        try:
+            _put(_DONE)
+        except _Stopped:
+            pass
+
+    threading.Thread(target=_produce, name="crawl-producer", daemon=True).start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def build_jobs(subjects: Sequence[str], sites: Sequence[str]) -> List[CrawlJob]:
+    """Các cặp (site, subject) có cấu hình pattern + selector, theo thứ tự subject → site."""
+    jobs = []
+    for subject_slug in subjects:
+        for site in sites:
+            list_sels = crawl_news.LIST_SELECTORS.get(site)
+            pattern = crawl_news.PATTERNS.get(subject_slug, {}).get(site)
+            if list_sels and pattern:
+                jobs.append(CrawlJob(site, subject_slug, pattern, list_sels))
+    return jobs
@@ -5,6 +5,9 @@ import requests
 from bs4 import BeautifulSoup
 from dateutil import parser as dtparse
 
+from app.services.host_control import RETRIES, host_state, is_transient, parse_retry_after
+from app.services.http_cache import HttpCache, get_http_cache
+
 # --------- HTTP ----------
 HEADERS = {
     "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -12,18 +15,56 @@ HEADERS = {
                    "Chrome/120.0.0.0 Safari/537.36"),
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "vi,vi-VN;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Accept-Encoding": "gzip, deflate",
     "Connection": "keep-alive",
 }
-TIMEOUT, SLEEP = 15, 0.7
+TIMEOUT = 15  # trần timeout mặc định; giãn cách giữa các request do host_control điều chỉnh
 SESSION = requests.Session()
 
-def fetch(url):
+def _wire_bytes(r):
+    # Content-Length là kích thước đã nén (gzip) nếu server nén
     try:
-        r = SESSION.get(url, headers=HEADERS, timeout=TIMEOUT)
-        if r.status_code == 200 and r.text:
-            return r.text
-    except requests.RequestException:
-        pass
+        return int(r.headers.get("Content-Length") or len(r.content))
+    except ValueError:
+        return len(r.content)
+
+def fetch(url):
+    # Cache HTTP trên đĩa: còn TTL → trả luôn; hết TTL → GET có điều kiện
+    cache = get_http_cache()
+    entry = cache.lookup(url) if cache else None
+    if entry is not None and cache.is_fresh(entry):
+        return cache.serve_fresh(entry)
+    # Nhịp / timeout / retry / circuit breaker theo host (host_control)
+    state = host_state(url)
+    headers = {**HEADERS, **HttpCache.conditional_headers(entry)}
+    for attempt in range(RETRIES + 1):
+        time.sleep(state.reserve())
+        if not state.allow():
+            return None  # circuit đang mở: fail ngay
+        status, retry_after = None, None
+        t0 = time.monotonic()
+        try:
+            r = SESSION.get(url, headers=headers, timeout=state.timeout())
+            status = r.status_code
+            if status == 304 and entry is not None:
+                state.record_success(time.monotonic() - t0, status)
+                return cache.serve_not_modified(entry, _wire_bytes(r))
+            if status == 200:
+                state.record_success(time.monotonic() - t0, status, _wire_bytes(r))
+                if not r.text:
+                    return None
+                if cache:
+                    cache.store(url, r.text, r.headers.get("ETag"),
+                                r.headers.get("Last-Modified"), _wire_bytes(r))
+                return r.text
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+        except requests.RequestException:
+            status = None
+        state.record_failure(status, time.monotonic() - t0)
+        if not is_transient(status) or attempt == RETRIES:
+            return None
+        state.record_retry()
+        time.sleep(state.backoff(attempt, retry_after))
     return None
 
 # --------- Nhãn chuẩn ----------
@@ -318,7 +359,7 @@ def crawl_subject(site, subject_slug, pattern, list_selectors, pages,
         url = build_list_url(pattern, page)
         html = fetch(url)
         if not html:
-            print(f"[{site}:{subject_slug}] page {page}: lỗi tải"); time.sleep(SLEEP); continue
+            print(f"[{site}:{subject_slug}] page {page}: lỗi tải"); continue
 
         pairs = extract_pairs(html, list_selectors)
         if not pairs:
@@ -361,10 +402,8 @@ def crawl_subject(site, subject_slug, pattern, list_selectors, pages,
                 "original_subject": subject_display,
             })
             added += 1
-            time.sleep(SLEEP/2)
 
         print(f"[{site}:{subject_slug}] page {page}: +{added} (subj total {len(results)})")
-        time.sleep(SLEEP)
 
         if added == 0:
             print(f"[{site}:{subject_slug}] page {page}: không thêm mới → dừng")
@@ -399,6 +438,8 @@ def main():
     write_jsonl(args.out_jsonl, all_rows)
     write_csv(args.out_csv, all_rows)
     print(f"- JSONL: {args.out_jsonl}\n- CSV  : {args.out_csv}")
+    if get_http_cache():
+        print(get_http_cache().summary_line())
 
 if __name__ == "__main__":
     main()
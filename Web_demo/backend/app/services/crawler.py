@@ -2,11 +2,19 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 
 from dateutil import parser as dtparse
 
 from app.services import crawl_news
+from app.services.async_crawler import DEFAULT_EXTRACTORS, build_jobs, crawl_pairs, crawl_quota, stream_pairs
+from app.services.discovery import get_discovery
+from app.services.url_index import get_url_index
+
+SITES = ["vnexpress", "vietnamnet"]
+
+# Không truyền limit: lấy tối đa 3 bài / (site, subject)
+PER_PAIR_MAX = 3
 
 
 @dataclass
@@ -17,60 +25,87 @@ class RawNews:
     category: str  # Category từ URL (ví dụ: "Kinh doanh", "Thể thao")
     url: Optional[str] = None
     published_at: Optional[str] = None
+    known: bool = False  # URL đã xử lý → không tải lại, title/body lấy từ DB
+
+
+def _today_jobs(sources: Optional[List[str]] = None):
+    # Danh sách chủ đề cố định, site theo yêu cầu (bỏ qua site chưa hỗ trợ)
+    subjects = list(crawl_news.CANON.keys())  # 11 slug: chinh-tri, the-gioi, ...
+    sites = [s for s in SITES if sources is None or s in sources]
+    return build_jobs(subjects, sites)
+
+
+def _to_raw_news(job, r: dict) -> RawNews:
+    return RawNews(
+        title=r["title"],
+        body=r["body"],
+        source=r["source"],
+        category=crawl_news.CANON.get(job.subject_slug, "Khác"),  # Category từ URL
+        url=r.get("url"),
+        published_at=r.get("published_at") or None,
+        known=r.get("known", False),
+    )
+
+
+def refetch(item: RawNews) -> bool:
+    """
+    Tải + trích lại 1 item "known" (URL có trong index nhưng bài không còn trong
+    DB), cùng extractor và lọc body >= 200 như crawl thường. False nếu lỗi.
+    """
+    extractor = DEFAULT_EXTRACTORS.get(item.source)
+    html = crawl_news.fetch(item.url) if extractor and item.url else None
+    if not html:
+        return False
+    title, _, body, published_at = extractor(html)
+    if not title or not body or len(body) < 200:
+        return False
+    item.title, item.body, item.published_at = title, body, published_at or None
+    item.known = False
+    return True
+
+
+def stream_today_news(
+    sources: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    use_index: bool = True,
+) -> Iterator[RawNews]:
+    """
+    Producer dạng stream: trả từng bài ngay khi vừa trích xong (thứ tự hoàn thành).
+    Chỉ crawl các site trong `sources`; có `limit` thì dừng (huỷ cả fetch đang dở)
+    khi đủ `limit` bài, chia đều giữa các subject; không có thì tối đa
+    PER_PAIR_MAX bài / cặp (site, subject) ở trang 1.
+    Consumer chậm → queue đầy → crawler tạm dừng (backpressure).
+    use_index=False (force_refresh) → tải lại cả bài đã có trong known-URL index.
+    Link lấy từ RSS / sitemap khi có (bỏ bài đăng quá CRAWL_MAX_AGE_HOURS), không
+    thì từ trang danh mục.
+    """
+    jobs = _today_jobs(sources)
+    if not jobs:
+        return
+    known = get_url_index() if use_index else None
+    for job_index, row in stream_pairs(
+        jobs, pages=1, max_items=PER_PAIR_MAX, known=known, limit=limit, discovery=get_discovery()
+    ):
+        yield _to_raw_news(jobs[job_index], row)
 
 
 def crawl_today_news(
     sources: Optional[List[str]] = None, 
     limit: Optional[int] = None,
+    use_index: bool = True,
 ) -> List[RawNews]:
-    
-    # 1) Danh sách chủ đề & site cố định
-    subjects = list(crawl_news.CANON.keys())  # 11 slug: chinh-tri, the-gioi, ...
-    sites = ["vnexpress", "vietnamnet"]
-
-    # Lấy tối đa 3 bài / (site, subject)
-    per_pair_max = 3
-
-    # 2) Biến theo dõi để tránh trùng
-    seen_title = set()
-    seen_bhash = set()
-    items: List[RawNews] = []
-
-    # 3) Vòng lặp qua từng chủ đề rồi từng site
-    for subject_slug in subjects:
-        # Lấy category name chuẩn từ CANON
-        category_name = crawl_news.CANON.get(subject_slug, "Khác")
-        
-        for site in sites:
-
-            list_sels = crawl_news.LIST_SELECTORS.get(site)
-            pattern = crawl_news.PATTERNS.get(subject_slug, {}).get(site)
-            if not list_sels or not pattern:
-                # Nếu chưa cấu hình selector/pattern cho site này thì bỏ qua
-                continue
-
-            # Crawl tối đa 3 bài cho (site, subject) này
-            rows = crawl_news.crawl_subject(
-                site=site,
-                subject_slug=subject_slug,
-                pattern=pattern,
-                list_selectors=list_sels,
-                pages=1,
-                seen_title=seen_title,
-                seen_bhash=seen_bhash,
-                max_items=per_pair_max,
-            )
-
-            for r in rows:
-                items.append(
-                    RawNews(
-                        title=r["title"],
-                        body=r["body"],
-                        source=r["source"],
-                        category=category_name,  # Category từ URL
-                        url=r.get("url"),
-                        published_at=r.get("published_at") or None,
-                    )
-                )
-
-    return items
+    """
+    Crawl xong hết rồi trả list. Có `limit`: theo thứ tự chọn công bằng giữa
+    các subject; không có: theo thứ tự chủ đề → site như trước.
+    """
+    jobs = _today_jobs(sources)
+    if not jobs:
+        return []
+    known = get_url_index() if use_index else None
+    if limit is not None:
+        return [
+            _to_raw_news(jobs[ji], r)
+            for ji, r in crawl_quota(jobs, limit, known=known, discovery=get_discovery())
+        ]
+    rows_per_job = crawl_pairs(jobs, pages=1, max_items=PER_PAIR_MAX, known=known, discovery=get_discovery())
+    return [_to_raw_news(job, r) for job, rows in zip(jobs, rows_per_job) for r in rows]
@@ -0,0 +1,165 @@
+#\app\services\daily_stats.py
+"""
+Bảng daily_stats: số bài theo (ngày, nguồn, category), dựng sẵn để /available_dates
+và /facets đọc O(số ngày) thay vì quét news_article.
+
+- Định nghĩa (dùng chung cho cập nhật dần, rebuild và check): mỗi bài đếm 1 lần
+  theo created_date, source và category của bản NLP mới nhất ('' nếu không có).
+- persist_batch: đọc khoá thống kê của các bài trong lô trước và sau khi ghi
+  (cùng transaction), cộng / trừ phần chênh lệch → không quét lại bảng.
+- rebuild(): dựng lại toàn bộ từ bảng gốc (khôi phục / sau migration).
+- check(): so bảng với số đếm lại từ bảng gốc, trả các khoá lệch.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database import db_writer
+from app.models.news import DailyStat, NewsArticle, NewsNLP
+
+# (ngày, nguồn, category)
+StatKey = Tuple[date, str, str]
+
+CHUNK_ROWS = 100
+
+
+def _latest_category():
+    """Category của bản NLP mới nhất của bài (cùng thứ tự với /by_date)."""
+    return (
+        select(NewsNLP.category)
+        .where(NewsNLP.article_id == NewsArticle.id)
+        .order_by(NewsNLP.created_at.desc(), NewsNLP.id.desc())
+        .limit(1)
+        .correlate(NewsArticle)
+        .scalar_subquery()
+    )
+
+
+def _category_expr():
+    return func.coalesce(_latest_category(), "")
+
+
+def stat_keys(db: Session, urls: Iterable[str]) -> Dict[str, StatKey]:
+    """url → khoá thống kê hiện tại, cho các bài đã có trong DB."""
+    urls = list(urls)
+    keys: Dict[str, StatKey] = {}
+    for i in range(0, len(urls), CHUNK_ROWS):
+        rows = db.execute(
+            select(NewsArticle.url, NewsArticle.created_date, NewsArticle.source, _category_expr())
+            .where(NewsArticle.url.in_(urls[i: i + CHUNK_ROWS]))
+        )
+        for url, day, source, category in rows:
+            if day is not None:
+                keys[url] = (day, source, category)
+    return keys
+
+
+def apply_changes(db: Session, before: Dict[str, StatKey], after: Dict[str, StatKey]) -> None:
+    """Cộng / trừ chênh lệch giữa 2 lần stat_keys (chạy trong transaction ghi của caller)."""
+    delta: Counter = Counter()
+    for url, key in after.items():
+        old = before.get(url)
+        if old == key:
+            continue
+        if old is not None:
+            delta[old] -= 1
+        delta[key] += 1
+    rows = [
+        {"date": day, "source": source, "category": category, "count": n}
+        for (day, source, category), n in delta.items()
+        if n
+    ]
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    mod = postgresql if dialect == "postgresql" else sqlite
+    for i in range(0, len(rows), CHUNK_ROWS):
+        stmt = mod.insert(DailyStat).values(rows[i: i + CHUNK_ROWS])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyStat.date, DailyStat.source, DailyStat.category],
+            set_={"count": DailyStat.count + stmt.excluded.count},
+        )
+        db.execute(stmt)
+    # Bài đổi nguồn / category để lại khoá cũ = 0
+    if any(r["count"] < 0 for r in rows):
+        db.query(DailyStat).filter(DailyStat.count <= 0).delete(synchronize_session=False)
+
+
+def _recount():
+    """SELECT (ngày, nguồn, category, số bài) đếm lại từ bảng gốc."""
+    category = _category_expr().label("category")
+    inner = (
+        select(NewsArticle.created_date.label("date"), NewsArticle.source.label("source"), category)
+        .where(NewsArticle.created_date.isnot(None))
+        .subquery()
+    )
+    return (
+        select(inner.c.date, inner.c.source, inner.c.category, func.count().label("count"))
+        .group_by(inner.c.date, inner.c.source, inner.c.category)
+    )
+
+
+def refill(conn) -> None:
+    """Xoá và đếm lại daily_stats trong transaction đang mở (Session hoặc Connection)."""
+    conn.execute(delete(DailyStat))
+    conn.execute(insert(DailyStat).from_select(["date", "source", "category", "count"], _recount()))
+
+
+def rebuild(db: Session) -> int:
+    """Dựng lại daily_stats từ news_article + news_nlp (1 transaction), trả số dòng."""
+    with db_writer():
+        db.commit()  # kết thúc snapshot đọc trước khi ghi (xem persist_batch)
+        try:
+            refill(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return db.query(DailyStat).count()
+
+
+def check(db: Session) -> List[dict]:
+    """Các khoá mà daily_stats lệch với số đếm lại ([] = khớp)."""
+    expected = {(d, s, c): n for d, s, c, n in db.execute(_recount())}
+    actual = {(r.date, r.source, r.category): r.count for r in db.query(DailyStat)}
+    return [
+        {"date": str(key[0]), "source": key[1], "category": key[2],
+         "expected": expected.get(key, 0), "actual": actual.get(key, 0)}
+        for key in sorted(set(expected) | set(actual), key=lambda k: (str(k[0]), k[1], k[2]))
+        if expected.get(key, 0) != actual.get(key, 0)
+    ]
+
+
+def facets(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None, days: int = 30) -> List[dict]:
+    """
+    Số bài mỗi ngày (mới nhất trước) kèm phân bố theo nguồn và category.
+    Không truyền khoảng ngày → `days` ngày gần nhất có dữ liệu. Category '' = chưa phân loại.
+    """
+    q = db.query(DailyStat).filter(DailyStat.count > 0)
+    if date_from is not None:
+        q = q.filter(DailyStat.date >= date_from)
+    if date_to is not None:
+        q = q.filter(DailyStat.date <= date_to)
+    if date_from is None and date_to is None:
+        recent = (
+            db.query(DailyStat.date).filter(DailyStat.count > 0)
+            .distinct().order_by(DailyStat.date.desc()).limit(days).all()
+        )
+        if not recent:
+            return []
+        q = q.filter(DailyStat.date >= recent[-1][0])
+
+    out: Dict[date, dict] = {}
+    for row in q.order_by(DailyStat.date.desc()):
+        day = out.setdefault(row.date, {"date": str(row.date), "total": 0, "sources": {}, "categories": {}})
+        day["total"] += row.count
+        day["sources"][row.source] = day["sources"].get(row.source, 0) + row.count
+        day["categories"][row.category] = day["categories"].get(row.category, 0) + row.count
+    return list(out.values())
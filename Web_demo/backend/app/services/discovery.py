@@ -0,0 +1,202 @@
+#\app\services\discovery.py
+"""
+Tìm link bài mới qua RSS / sitemap thay cho tải + parse HTML trang danh mục.
+
+- Nguồn theo (site, subject): mặc định suy ra RSS từ PATTERNS
+  (https://vnexpress.net/the-gioi-p{page} → https://vnexpress.net/rss/the-gioi.rss);
+  thêm / thay bằng file JSON CRAWL_DISCOVERY_SOURCES:
+      {"chinh-tri": {"vnexpress": [["sitemap", "https://.../sitemap.xml"]]}}
+- Feed / sitemap nhỏ hơn nhiều so với trang danh mục và có sẵn thời điểm đăng
+  → bỏ link cũ hơn CRAWL_MAX_AGE_HOURS trước khi tải bất kỳ bài nào.
+- Nguồn lỗi (404, không parse được, rỗng) bị bỏ qua CRAWL_DISCOVERY_RETRY giây;
+  không còn nguồn nào dùng được → async_crawler quay về trang danh mục HTML.
+Parse RSS 2.0, Atom và sitemap (kể cả Google News sitemap).
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from dateutil import parser as dtparse
+from lxml import etree
+
+DISCOVERY_ENABLED = os.getenv("CRAWL_DISCOVERY", "1") != "0"
+DISCOVERY_SOURCES_FILE = os.getenv("CRAWL_DISCOVERY_SOURCES", "")
+MAX_AGE_HOURS = float(os.getenv("CRAWL_MAX_AGE_HOURS", "24"))
+RETRY_DEAD_SECONDS = float(os.getenv("CRAWL_DISCOVERY_RETRY", "21600"))
+
+VN_TZ = timezone(timedelta(hours=7))  # giờ không kèm múi → giờ Việt Nam
+
+# (loại nguồn, url); loại ∈ {"rss", "sitemap"} (parse chung, chỉ để thống kê)
+Source = Tuple[str, str]
+# (url bài, thời điểm đăng hoặc None)
+Entry = Tuple[str, Optional[datetime]]
+
+_PARSER = etree.XMLParser(recover=True, resolve_entities=False, no_network=True, huge_tree=True)
+_DATE_TAGS = ("pubDate", "published", "updated", "publication_date", "lastmod", "date")
+
+
+def derive_feed(pattern: str) -> Optional[str]:
+    """RSS của 1 trang danh mục: đoạn path cuối bỏ hậu tố phân trang."""
+    sp = urlsplit(pattern)
+    section = sp.path.rstrip("/").rsplit("/", 1)[-1]
+    for suffix in ("-p{page}", "-page{page}"):
+        if section.endswith(suffix):
+            section = section[: -len(suffix)]
+            break
+    else:
+        return None
+    return f"{sp.scheme}://{sp.netloc}/rss/{section}.rss" if section else None
+
+
+def _load_overrides(path: str) -> Dict[Tuple[str, str], List[Source]]:
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        (site, subject): [(kind, url) for kind, url in sources]
+        for subject, by_site in data.items()
+        for site, sources in by_site.items()
+    }
+
+
+def _parse_date(raw: Optional[str]) -> Optional[datetime]:
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        dt = parsedate_to_datetime(raw)  # RFC 822 của RSS
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = dtparse.parse(raw)
+        except (ValueError, OverflowError):
+            return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=VN_TZ)
+
+
+def parse_feed(text: str) -> List[Entry]:
+    """Link + thời điểm đăng từ RSS / Atom / sitemap, mới nhất trước (link không có giờ để cuối)."""
+    data = text.encode("utf-8") if isinstance(text, str) else text
+    try:
+        root = etree.fromstring(data, parser=_PARSER)
+    except etree.XMLSyntaxError:
+        return []
+    if root is None:
+        return []
+
+    entries: List[Entry] = []
+    for item in root.iter("{*}item", "{*}entry", "{*}url"):
+        url, dates = None, {}
+        for el in item.iter():
+            if not isinstance(el.tag, str):
+                continue
+            name = etree.QName(el).localname
+            if name == "link" and url is None:
+                url = (el.get("href") or el.text or "").strip() or None  # Atom dùng href
+            elif name == "loc" and url is None:
+                url = (el.text or "").strip() or None
+            elif name in _DATE_TAGS and name not in dates:
+                dates[name] = el.text
+        if not url or not url.startswith("http"):
+            continue
+        published = next((d for d in (_parse_date(dates.get(t)) for t in _DATE_TAGS) if d), None)
+        entries.append((url, published))
+
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    entries.sort(key=lambda e: e[1] or oldest, reverse=True)  # sort ổn định: giữ thứ tự gốc khi trùng
+    return entries
+
+
+class Discovery:
+    def __init__(
+        self,
+        sources: Optional[Dict[Tuple[str, str], List[Source]]] = None,
+        derive: bool = True,
+        max_age_hours: float = MAX_AGE_HOURS,
+    ):
+        """sources: {(site, subject): [(loại, url)]}; derive=True → thêm RSS suy ra từ PATTERNS."""
+        self.sources_map = dict(sources) if sources is not None else _load_overrides(DISCOVERY_SOURCES_FILE)
+        self.derive = derive
+        self.max_age = timedelta(hours=max_age_hours) if max_age_hours > 0 else None
+        self._lock = threading.Lock()
+        self._dead: Dict[str, float] = {}  # url nguồn lỗi → bỏ qua tới thời điểm này
+
+        self.feed_hits = 0        # cặp lấy link từ feed / sitemap
+        self.fallbacks = 0        # cặp phải quay về trang danh mục HTML
+        self.source_errors = 0
+        self.links_seen = 0
+        self.links_too_old = 0    # bị lọc theo thời điểm đăng, không tải bài
+
+    def sources(self, site: str, subject_slug: str, pattern: str) -> List[Source]:
+        out = list(self.sources_map.get((site, subject_slug), []))
+        if self.derive:
+            feed = derive_feed(pattern)
+            if feed and all(url != feed for _, url in out):
+                out.append(("rss", feed))
+        now = time.monotonic()
+        with self._lock:
+            return [s for s in out if self._dead.get(s[1], 0.0) <= now]
+
+    def mark_dead(self, url: str) -> None:
+        with self._lock:
+            self.source_errors += 1
+            self._dead[url] = time.monotonic() + RETRY_DEAD_SECONDS
+
+    def record_fallback(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+
+    def select(self, entries: List[Entry]) -> List[str]:
+        """URL cần xét (mới nhất trước): bỏ trùng và bài đăng cũ hơn max_age."""
+        cutoff = datetime.now(timezone.utc) - self.max_age if self.max_age else None
+        seen, urls, old = set(), [], 0
+        for url, published in entries:
+            if url in seen:
+                continue
+            seen.add(url)
+            if cutoff is not None and published is not None and published < cutoff:
+                old += 1
+                continue
+            urls.append(url)
+        with self._lock:
+            self.feed_hits += 1
+            self.links_seen += len(seen)
+            self.links_too_old += old
+        return urls
+
+    def stats(self) -> dict:
+        with self._lock:
+            pairs = self.feed_hits + self.fallbacks
+            return {
+                "enabled": True,
+                "max_age_hours": self.max_age.total_seconds() / 3600 if self.max_age else None,
+                "feed_pairs": self.feed_hits,
+                "fallback_pairs": self.fallbacks,
+                "feed_ratio": round(self.feed_hits / pairs, 4) if pairs else 0.0,
+                "source_errors": self.source_errors,
+                "dead_sources": sum(1 for t in self._dead.values() if t > time.monotonic()),
+                "links_seen": self.links_seen,
+                "links_too_old": self.links_too_old,
+            }
+
+
+_discovery: Optional[Discovery] = None
+_discovery_lock = threading.Lock()
+
+
+def get_discovery() -> Optional[Discovery]:
+    """Discovery dùng chung cho crawl hôm nay; None nếu CRAWL_DISCOVERY=0."""
+    global _discovery
+    if not DISCOVERY_ENABLED:
+        return None
+    with _discovery_lock:
+        if _discovery is None:
+            _discovery = Discovery()
+        return _discovery
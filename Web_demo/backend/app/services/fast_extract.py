@@ -0,0 +1,279 @@
+#\app\services\fast_extract.py
+"""
+Backend trích xuất nhanh cho vnexpress / vietnamnet: cây lxml trực tiếp thay cho
+BeautifulSoup, selector CSS được compile sang XPath 1 lần khi import module.
+
+Output phải giống hệt extractor BeautifulSoup trong crawl_news (cùng thứ tự
+selector dự phòng, cùng cách ghép text như get_text(" ", strip=True)).
+Kiểm tra bằng scripts/check_fast_extract.py trên bộ HTML mẫu fixtures/html
+(thoát mã 1 nếu có trang khác output). Nếu lxml không
+parse được trang (vd. chuỗi có khai báo encoding), tự quay về bản BeautifulSoup.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import Iterable, List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+from app.services import crawl_news
+from app.services.crawl_news import norm
+
+# Tắt mặc định: bộ mẫu fixtures/html mới là trang dựng tay theo cấu trúc 2 site,
+# bật (CRAWL_FAST_EXTRACT=1) sau khi check_fast_extract khớp trên trang thật
+FAST_EXTRACT_ENABLED = os.getenv("CRAWL_FAST_EXTRACT", "0") == "1"
+
+# Chuỗi trong các thẻ này không được get_text() của BeautifulSoup tính vào
+_SKIP_TEXT_TAGS = {"script", "style", "template"}
+
+_VNE = {
+    "title": ["h1.title-detail", "h1", "h2.title-detail"],
+    "lead": ["p.description", "p.lead", ".sapo", ".short_intro"],
+    "body": ["article.fck_detail p", "div.fck_detail p", "article p"],
+    "pub_text": [".date-time", ".date", ".time"],
+    "pub_meta": ["time[datetime]", "meta[property='article:published_time']", "time"],
+}
+
+_VNN = {
+    "title": ["h1.content-detail-title", "h1.title", "h1"],
+    "body": ["article p", ".ArticleContent p", ".content-detail p", ".maincontent p", ".article__body p"],
+    "lead": [
+        ".content-detail-sapo",
+        "h2.content-detail-sapo",
+        ".sapo", "h2.sapo", "p.sapo",
+        ".article__sapo", ".content-detail .lead", ".maincontent .lead",
+        ".bold-text", ".summary", ".post-sapo",
+    ],
+    "lead_meta": [
+        'meta[property="og:description"]',
+        'meta[name="description"]',
+        'meta[name="twitter:description"]',
+    ],
+    "json_ld": ['script[type="application/ld+json"]'],
+    "pub": [
+        ".bread-crumb-detail__time",
+        ".bread-crumbs__time",
+        ".time-share",
+        "time[datetime]",
+        "meta[property='article:published_time']",
+        "time", ".date",
+    ],
+}
+
+
+def _compile(groups: dict) -> dict:
+    return {k: [CSSSelector(sel) for sel in sels] for k, sels in groups.items()}
+
+
+_VNE_SEL = _compile(_VNE)
+_VNN_SEL = _compile(_VNN)
+_LIST_SEL: dict = {}  # selector trang danh mục, compile lần đầu gặp
+
+
+# ---------- Text giống BeautifulSoup ----------
+def _strings(el) -> Iterable[str]:
+    """Các đoạn text con theo thứ tự tài liệu (bỏ comment / script / style)."""
+    tag = el.tag
+    if not isinstance(tag, str):  # comment, processing instruction
+        return
+    if tag not in _SKIP_TEXT_TAGS and el.text:
+        yield el.text
+    for child in el:
+        yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(el, strip: bool = True) -> str:
+    """Tương đương el.get_text(" ", strip=strip) của BeautifulSoup."""
+    if strip:
+        return " ".join(s for s in (x.strip() for x in _strings(el)) if s)
+    return " ".join(_strings(el))
+
+
+def _has_text(el) -> bool:
+    """Tương đương bool(el.get_text(strip=True))."""
+    return any(s.strip() for s in _strings(el))
+
+
+def _first(root, selector) -> Optional[etree._Element]:
+    found = selector(root)
+    return found[0] if found else None
+
+
+def _parse(html: str):
+    return lxml.html.document_fromstring(html)
+
+
+# ---------- Trang danh mục ----------
+def _extract_pairs(html: str, selectors) -> List[Tuple[str, str]]:
+    root = _parse(html)
+    seen, out = set(), []
+    for sel, mode in selectors:
+        compiled = _LIST_SEL.get(sel)
+        if compiled is None:
+            compiled = _LIST_SEL[sel] = CSSSelector(sel)
+        for a in compiled(root):
+            href = a.get("href")
+            if not href:
+                continue
+            t = a.get(mode) if mode in ("title", "aria-label") else _text(a, strip=False)
+            t = norm(t)
+            if not t:
+                continue
+            key = (t, href)
+            if key in seen:
+                continue
+            seen.add(key); out.append((t, href))
+    return out
+
+
+# ---------- Bài viết ----------
+def _extract_vne(html: str):
+    s = _parse(html)
+    sel = _VNE_SEL
+
+    title = None
+    for q in sel["title"]:
+        el = _first(s, q)
+        if el is not None and _has_text(el):
+            title = norm(_text(el)); break
+
+    lead = None
+    for q in sel["lead"]:
+        el = _first(s, q)
+        if el is not None and _has_text(el):
+            lead = norm(_text(el)); break
+
+    body_parts = []
+    for q in sel["body"]:
+        for p in q(s):
+            t = norm(_text(p))
+            if len(t) >= 5 and not t.lower().startswith(("xem thêm:", "video:", "ảnh:")):
+                body_parts.append(t)
+        if body_parts: break
+    body = " ".join(body_parts)
+
+    pub = ""
+    for q in sel["pub_text"]:
+        el = _first(s, q)
+        if el is not None and _has_text(el):
+            pub = norm(_text(el))
+            break
+    if not pub:
+        for q in sel["pub_meta"]:
+            el = _first(s, q)
+            if el is not None:
+                raw = el.get("datetime") or el.get("content") or _text(el)
+                pub = crawl_news.parse_dt_vi(raw)
+                if pub:
+                    break
+
+    return title or "", lead or "", body or "", pub or ""
+
+
+def _clean(x):
+    x = (x or "").strip()
+    return re.sub(r"\s+", " ", x)
+
+
+def _lead_ok(x, lo=20, hi=300):
+    if not x: return False
+    n = len(x); return lo <= n <= hi
+
+
+def _extract_vnn(html: str):
+    s = _parse(html)
+    sel = _VNN_SEL
+
+    title = None
+    for q in sel["title"]:
+        el = _first(s, q)
+        if el is not None and _has_text(el):
+            title = _clean(_text(el)); break
+
+    body_parts = []
+    for q in sel["body"]:
+        for p in q(s):
+            t = _clean(_text(p))
+            if len(t) >= 5 and not t.lower().startswith(("ảnh:", "video:", "xem thêm:")):
+                body_parts.append(t)
+        if body_parts: break
+    body = " ".join(body_parts)
+
+    lead = None
+    for q in sel["lead"]:
+        el = _first(s, q)
+        if el is not None and _has_text(el):
+            cand = _clean(_text(el))
+            if _lead_ok(cand):
+                lead = cand; break
+
+    if not lead:
+        for q in sel["lead_meta"]:
+            el = _first(s, q)
+            if el is not None and el.get("content"):
+                cand = _clean(el.get("content"))
+                if _lead_ok(cand):
+                    lead = cand; break
+
+    if not lead:
+        for js in sel["json_ld"][0](s):
+            try:
+                # .string của BeautifulSoup: chỉ có khi thẻ chứa đúng 1 chuỗi
+                data = json.loads(js.text)
+                if isinstance(data, dict) and data.get("description"):
+                    cand = _clean(data["description"])
+                    if _lead_ok(cand):
+                        lead = cand; break
+            except Exception:
+                pass
+
+    if not lead and body:
+        sents = re.split(r'(?<=[.!?…])\s+|\n+', body)
+        cand = " ".join(sents[:2]).strip()
+        if not _lead_ok(cand):
+            cand = sents[0].strip() if sents else ""
+        lead = cand
+
+    pub = ""
+    for q in sel["pub"]:
+        el = _first(s, q)
+        if el is not None:
+            raw = el.get("datetime") or el.get("content") or _text(el)
+            x = (raw or "").strip()
+            x = re.sub(r"^(Thứ\s+\w+|Chủ\s*nhật)\s*,\s*", "", x, flags=re.I)
+            x = x.replace(" - ", " ")
+            try:
+                pub = crawl_news.dtparse.parse(x, dayfirst=True, fuzzy=True).isoformat()
+            except Exception:
+                pub = ""
+            if pub: break
+
+    return title or "", lead or "", body or "", pub or ""
+
+
+# ---------- API: cùng chữ ký với crawl_news, tự fallback về BeautifulSoup ----------
+def extract_pairs(html, selectors):
+    try:
+        return _extract_pairs(html, selectors)
+    except (etree.ParserError, ValueError):
+        return crawl_news.extract_pairs(html, selectors)
+
+
+def extract_article_vne(html):
+    try:
+        return _extract_vne(html)
+    except (etree.ParserError, ValueError):
+        return crawl_news.extract_article_vne(html)
+
+
+def extract_article_vnn(html):
+    try:
+        return _extract_vnn(html)
+    except (etree.ParserError, ValueError):
+        return crawl_news.extract_article_vnn(html)
@@ -0,0 +1,289 @@
+#\app\services\host_control.py
+"""
+Điều khiển tốc độ theo từng host cho crawler (AIMD), retry và circuit breaker.
+
+Mỗi host có 1 HostState dùng chung cho cả process (sync fetch và async crawler):
+  - concurrency `limit` và khoảng cách tối thiểu giữa 2 request `interval`,
+    bắt đầu từ CRAWL_HOST_CONCURRENCY / CRAWL_HOST_RPS:
+      thành công, latency thấp → tăng cộng (limit += 1/limit, rate += CRAWL_HOST_RPS_STEP),
+        tối đa CRAWL_HOST_MAX_CONCURRENCY / CRAWL_HOST_MAX_RPS
+      429 / 5xx / timeout → giảm nhân (limit /2, rate /2; tối đa 1 lần / khoảng latency)
+      latency > CRAWL_LATENCY_TARGET → limit x0.8
+  - timeout theo latency quan sát được (không chờ cố định 15s với host đang chậm)
+  - retry lỗi tạm thời (timeout, lỗi kết nối, 429, 5xx) với backoff có jitter,
+    tôn trọng Retry-After
+  - circuit breaker: CRAWL_CB_THRESHOLD lỗi liên tiếp → ngắt host trong
+    CRAWL_CB_COOLDOWN giây (fail ngay, không gửi request), sau đó cho 1 request thử
+Thống kê theo host (throughput, lỗi, latency, trạng thái) qua host_stats().
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+HOST_CONCURRENCY = int(os.getenv("CRAWL_HOST_CONCURRENCY", "4"))
+HOST_MAX_CONCURRENCY = int(os.getenv("CRAWL_HOST_MAX_CONCURRENCY", "8"))
+HOST_RPS = float(os.getenv("CRAWL_HOST_RPS", "5"))
+HOST_MAX_RPS = float(os.getenv("CRAWL_HOST_MAX_RPS", "10"))
+MIN_INTERVAL = 1.0 / HOST_MAX_RPS if HOST_MAX_RPS > 0 else 0.0
+RPS_STEP = float(os.getenv("CRAWL_HOST_RPS_STEP", "0.5"))  # tăng cộng (request/giây) mỗi lần thành công
+MAX_INTERVAL = float(os.getenv("CRAWL_HOST_MAX_INTERVAL", "10"))
+LATENCY_TARGET = float(os.getenv("CRAWL_LATENCY_TARGET", "2.0"))
+MIN_TIMEOUT = float(os.getenv("CRAWL_MIN_TIMEOUT", "3"))
+MAX_TIMEOUT = float(os.getenv("CRAWL_MAX_TIMEOUT", "15"))
+RETRIES = int(os.getenv("CRAWL_RETRIES", "2"))
+BACKOFF_BASE = float(os.getenv("CRAWL_BACKOFF_BASE", "0.5"))
+BACKOFF_CAP = float(os.getenv("CRAWL_BACKOFF_CAP", "8"))
+CB_THRESHOLD = int(os.getenv("CRAWL_CB_THRESHOLD", "5"))
+CB_COOLDOWN = float(os.getenv("CRAWL_CB_COOLDOWN", "30"))
+
+# Lỗi tạm thời đáng retry; None = timeout / lỗi kết nối
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+# Tín hiệu host quá tải → giảm mạnh
+CONGESTION_STATUS = {429, 503}
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def is_transient(status: Optional[int]) -> bool:
+    return status is None or status in TRANSIENT_STATUS
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class HostState:
+    def __init__(self, host: str):
+        self.host = host
+        self._lock = threading.Lock()
+        self.limit = float(max(1, HOST_CONCURRENCY))
+        self.interval = 1.0 / HOST_RPS if HOST_RPS > 0 else 0.0
+        self.latency_ewma: Optional[float] = None
+        self._next_at = 0.0  # lượt kế tiếp cho caller đồng bộ (reserve)
+        self._last_decrease = 0.0
+
+        # Circuit breaker
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        self.trips = 0
+
+        # Thống kê
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0  # bị circuit breaker chặn
+        self.status_counts: Dict[str, int] = {}
+        self.bytes = 0
+
+    # ---------- Quyết định trước request ----------
+    def allow(self) -> bool:
+        """False khi circuit đang mở; hết cooldown thì cho đúng 1 request thử."""
+        with self._lock:
+            if self.open_until == 0.0:
+                return True
+            if time.monotonic() < self.open_until or self.probing:
+                self.rejected += 1
+                return False
+            self.probing = True  # half-open
+            return True
+
+    def _timeout_locked(self) -> float:
+        if self.latency_ewma is None:
+            return MAX_TIMEOUT
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, self.latency_ewma * 4))
+
+    def timeout(self) -> float:
+        """Timeout ~4x latency trung bình, trong [CRAWL_MIN_TIMEOUT, CRAWL_MAX_TIMEOUT]."""
+        with self._lock:
+            return self._timeout_locked()
+
+    def reserve(self) -> float:
+        """Giữ lượt request kế tiếp cho code đồng bộ; trả số giây cần chờ trước khi gửi."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+            return max(0.0, wait)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full jitter: uniform(0, min(cap, base * 2^attempt)), không ngắn hơn Retry-After."""
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, BACKOFF_CAP * 4))
+        return delay
+
+    # ---------- Ghi nhận kết quả ----------
+    def _count(self, status: Optional[int]) -> None:
+        if status is None:
+            key = "error"
+        elif status in CONGESTION_STATUS:
+            key = str(status)
+        else:
+            key = f"{status // 100}xx"
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def record_success(self, latency: float, status: int = 200, nbytes: int = 0) -> None:
+        with self._lock:
+            self.requests += 1
+            self.successes += 1
+            self.bytes += nbytes
+            self._count(status)
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            self.probing = False
+            if latency > LATENCY_TARGET:
+                # Host chậm dần → bớt request đồng thời trước khi nó bắt đầu lỗi
+                self.limit = max(1.0, self.limit * 0.8)
+            else:
+                self.limit = min(float(HOST_MAX_CONCURRENCY), self.limit + 1.0 / self.limit)
+                if self.interval > 0:
+                    self.interval = max(MIN_INTERVAL, 1.0 / (1.0 / self.interval + RPS_STEP))
+
+    def record_failure(self, status: Optional[int], latency: float) -> None:
+        """status None = timeout / lỗi kết nối."""
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self._count(status)
+            if not is_transient(status):
+                # Host vẫn trả lời bình thường (vd. 404) → không tính vào breaker
+                self.consecutive_failures = 0
+                self.open_until = 0.0
+                self.probing = False
+                return
+            if status is None:
+                self.latency_ewma = latency if self.latency_ewma is None else max(self.latency_ewma, latency)
+            # Như TCP: giảm nhân tối đa 1 lần / khoảng latency, các lỗi cùng đợt không giảm chồng
+            now = time.monotonic()
+            if now - self._last_decrease >= max(self.latency_ewma or 0.0, 0.5):
+                self._last_decrease = now
+                self.limit = max(1.0, self.limit / 2)
+                self.interval = min(MAX_INTERVAL, max(self.interval * 2, MIN_INTERVAL))
+
+            self.consecutive_failures += 1
+            if self.probing or self.consecutive_failures >= CB_THRESHOLD:
+                if self.open_until == 0.0 or self.probing:
+                    self.trips += 1
+                self.open_until = time.monotonic() + CB_COOLDOWN
+                self.probing = False
+
+    def abort_probe(self) -> None:
+        """
+        Request thử (half-open) bị huỷ giữa chừng (CancelledError khi crawl_quota
+        đủ bài / đóng stream) → không có kết quả: mở lại circuit, hết cooldown thử lại.
+        """
+        with self._lock:
+            if self.probing:
+                self.probing = False
+                self.open_until = time.monotonic() + CB_COOLDOWN
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    # ---------- Thống kê ----------
+    def circuit(self) -> str:
+        if self.open_until == 0.0:
+            return "closed"
+        if self.probing or time.monotonic() >= self.open_until:
+            return "half_open"
+        return "open"
+
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            return {
+                "requests": self.requests,
+                "successes": self.successes,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected_by_breaker": self.rejected,
+                "status": dict(self.status_counts),
+                "throughput_rps": round(self.successes / elapsed, 3),
+                "bytes": self.bytes,
+                "latency_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+                "concurrency_limit": round(self.limit, 2),
+                "interval_s": round(self.interval, 3),
+                "timeout_s": round(self._timeout_locked(), 2),
+                "circuit": self.circuit(),
+                "circuit_trips": self.trips,
+            }
+
+
+_states: Dict[str, HostState] = {}
+_states_lock = threading.Lock()
+
+
+def host_state(url: str) -> HostState:
+    host = host_of(url)
+    with _states_lock:
+        st = _states.get(host)
+        if st is None:
+            st = _states[host] = HostState(host)
+        return st
+
+
+def host_stats() -> dict:
+    with _states_lock:
+        states = list(_states.values())
+    return {st.host: st.stats() for st in states}
+
+
+class AsyncHostGate:
+    """
+    Cổng asyncio cho 1 host trong 1 event loop: giới hạn số request đồng thời
+    theo HostState.limit (thay đổi liên tục) và giãn cách theo HostState.interval.
+    `max_concurrency` / `max_rps` là trần cứng của người gọi (vd. CLI dataset).
+    """
+
+    def __init__(self, state: HostState, max_concurrency: int = HOST_MAX_CONCURRENCY, max_rps: float = HOST_MAX_RPS):
+        self.state = state
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval = 1.0 / max_rps if max_rps > 0 else 0.0
+        self._cond = asyncio.Condition()
+        self._active = 0
+        self._next_at = 0.0
+
+    def _limit(self) -> int:
+        return max(1, min(self.max_concurrency, int(self.state.limit)))
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._limit())
+            self._active += 1
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + max(self.state.interval, self.min_interval)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Bị huỷ khi đang chờ nhịp: __aexit__ không chạy → trả slot tại đây
+                await self._release()
+                raise
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._release()
+
+    async def _release(self) -> None:
+        async with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
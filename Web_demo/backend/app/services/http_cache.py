@@ -0,0 +1,227 @@
+#\app\services\http_cache.py
+"""
+Cache HTTP trên đĩa cho crawler (dùng chung cho crawl_news.fetch và async_crawler).
+
+- Lưu body đã nén (zlib) kèm validator ETag / Last-Modified trong SQLite.
+- Entry còn trong HTTP_CACHE_TTL giây → trả luôn, không gửi request.
+- Quá TTL → GET có điều kiện (If-None-Match / If-Modified-Since);
+  304 → dùng lại body trong cache.
+- Tổng dung lượng vượt HTTP_CACHE_MAX_MB → xoá entry ít dùng nhất.
+Thống kê số request và số byte tiết kiệm được để theo dõi băng thông.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") != "0"
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", "./http_cache.db")
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", "120"))
+HTTP_CACHE_MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: bytes  # đã nén
+    raw_size: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def text(self) -> str:
+        return zlib.decompress(self.body).decode("utf-8")
+
+
+class HttpCache:
+    def __init__(
+        self,
+        path: str = HTTP_CACHE_PATH,
+        ttl: float = HTTP_CACHE_TTL,
+        max_bytes: int = HTTP_CACHE_MAX_BYTES,
+    ):
+        self.ttl = max(0.0, ttl)
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache(last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM http_cache"
+        ).fetchone()[0]
+
+        self.requests = 0          # tổng số lần fetch đi qua cache
+        self.fresh_hits = 0        # trả từ cache, không gửi request
+        self.not_modified = 0      # GET có điều kiện → 304
+        self.downloads = 0         # tải đầy đủ (200)
+        self.bytes_downloaded = 0  # byte thực nhận qua mạng (sau nén gzip)
+        self.bytes_saved = 0       # byte body không phải tải lại (fresh + 304)
+        self.evictions = 0
+
+    # ---------- Tra cứu ----------
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            self.requests += 1
+            row = self._conn.execute(
+                "SELECT body, raw_size, etag, last_modified, fetched_at FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(url, row[0], row[1], row[2], row[3], row[4])
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> dict:
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    # ---------- Kết quả ----------
+    def serve_fresh(self, entry: CacheEntry) -> str:
+        with self._lock:
+            self.fresh_hits += 1
+            self.bytes_saved += entry.raw_size
+            self._touch(entry.url, refreshed=False)
+        return entry.text()
+
+    def serve_not_modified(self, entry: CacheEntry, wire_bytes: int = 0) -> str:
+        with self._lock:
+            self.not_modified += 1
+            self.bytes_downloaded += wire_bytes
+            self.bytes_saved += entry.raw_size
+            self._touch(entry.url, refreshed=True)
+        return entry.text()
+
+    def store(
+        self,
+        url: str,
+        text: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        wire_bytes: int,
+    ) -> None:
+        raw = text.encode("utf-8")
+        body = zlib.compress(raw, 6)
+        now = time.time()
+        with self._lock:
+            self.downloads += 1
+            self.bytes_downloaded += wire_bytes
+            if self.max_bytes == 0 or len(body) > self.max_bytes:
+                return
+            old = self._conn.execute("SELECT size FROM http_cache WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                """
+                INSERT INTO http_cache (url, body, size, raw_size, etag, last_modified, fetched_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    body = excluded.body,
+                    size = excluded.size,
+                    raw_size = excluded.raw_size,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    fetched_at = excluded.fetched_at,
+                    last_access = excluded.last_access
+                """,
+                (url, body, len(body), len(raw), etag, last_modified, now, now),
+            )
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    # ---------- Nội bộ (gọi khi đang giữ lock) ----------
+    def _touch(self, url: str, refreshed: bool) -> None:
+        now = time.time()
+        if refreshed:
+            self._conn.execute(
+                "UPDATE http_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url)
+            )
+        else:
+            self._conn.execute("UPDATE http_cache SET last_access = ? WHERE url = ?", (now, url))
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM http_cache ORDER BY last_access ASC LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for url, size in rows:
+                self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+                self._total_bytes -= size
+                self.evictions += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self) -> dict:
+        with self._lock:
+            network = self.not_modified + self.downloads
+            return {
+                "requests": self.requests,
+                "fresh_hits": self.fresh_hits,
+                "not_modified": self.not_modified,
+                "downloads": self.downloads,
+                "requests_saved": self.fresh_hits,
+                "request_saved_ratio": round(self.fresh_hits / self.requests, 4) if self.requests else 0.0,
+                "network_requests": network,
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_saved": self.bytes_saved,
+                "cache_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "evictions": self.evictions,
+            }
+
+    def summary_line(self) -> str:
+        s = self.stats()
+        return (
+            f"HTTP cache: {s['fresh_hits']}/{s['requests']} request khỏi gửi, "
+            f"{s['not_modified']} lần 304, tải {s['bytes_downloaded'] / 1024:.0f} KB, "
+            f"tiết kiệm {s['bytes_saved'] / 1024:.0f} KB"
+        )
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Cache dùng chung cho cả process; None nếu HTTP_CACHE_ENABLED=0."""
+    global _cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
@@ -0,0 +1,186 @@
+#\app\services\inference_queue.py
+"""
+Hàng đợi suy luận dùng chung cho mọi request.
+
+Một thread nền duy nhất sở hữu model: gom các job tóm tắt đang chờ trong
+một cửa sổ ngắn (SUMMARIZER_BATCH_WINDOW_MS) hoặc tới khi đủ
+SUMMARIZER_MAX_BATCH job, chạy chung summarize_many (1 lần cho mỗi mức
+quality có trong batch) rồi trả kết quả qua Future của từng job.
+
+Ở pool mode (SUMMARIZER_WORKERS > 0) batch được giao cho WorkerPool; tối đa
+`concurrency` batch chạy song song (= số worker) để mọi worker đều có việc.
+Batch lỗi (vd. pool không có worker nào load được model) → mỗi bài nhận summary
+dự phòng như khi model lỗi ở process API, request không bị lỗi 500.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from app.services.summarizer import DEFAULT_QUALITY, _fallback_summary, summarize_many
+from app.services.worker_pool import POOL_WORKERS, get_worker_pool
+
+BATCH_WINDOW_MS = float(os.getenv("SUMMARIZER_BATCH_WINDOW_MS", "20"))
+MAX_BATCH = int(os.getenv("SUMMARIZER_MAX_BATCH", "16"))
+
+
+@dataclass
+class _Job:
+    title: Optional[str]
+    body: str
+    quality: str
+    future: Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class InferenceScheduler:
+    """Micro-batching scheduler: 1 thread nền, nhiều request gửi job vào."""
+
+    def __init__(
+        self,
+        run_batch: Callable[..., List[str]] = summarize_many,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch: int = MAX_BATCH,
+        concurrency: int = 1,
+    ):
+        self.run_batch = run_batch
+        self.window_s = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.concurrency = max(1, concurrency)
+        self._slots = threading.Semaphore(self.concurrency)
+
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._jobs = 0
+        self._last_batch_size = 0
+        self._max_batch_seen = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._busy_total = 0.0
+
+        self._thread = threading.Thread(
+            target=self._loop, name="inference-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    # ---------- API cho router ----------
+    def submit(self, title: Optional[str], body: str, quality: str = DEFAULT_QUALITY) -> Future:
+        fut: Future = Future()
+        self._queue.put(_Job(title=title, body=body, quality=quality, future=fut))
+        return fut
+
+    def summarize_many(
+        self,
+        articles: List[Tuple[Optional[str], str]],
+        quality: str = DEFAULT_QUALITY,
+    ) -> List[str]:
+        """Gửi nhiều bài vào hàng đợi và chờ kết quả (đúng thứ tự input)."""
+        futures = [self.submit(title, body, quality) for title, body in articles]
+        return [f.result() for f in futures]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                "queue_depth": self._queue.qsize(),
+                "window_ms": self.window_s * 1000.0,
+                "max_batch": self.max_batch,
+                "concurrency": self.concurrency,
+                "batches": batches,
+                "jobs": self._jobs,
+                "last_batch_size": self._last_batch_size,
+                "max_batch_size_seen": self._max_batch_seen,
+                "avg_batch_size": round(self._jobs / batches, 2) if batches else 0.0,
+                "avg_wait_ms": round(self._wait_total / self._jobs * 1000.0, 1) if self._jobs else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000.0, 1),
+                "avg_batch_ms": round(self._busy_total / batches * 1000.0, 1) if batches else 0.0,
+            }
+
+    # ---------- Thread nền ----------
+    def _collect(self) -> List[_Job]:
+        jobs = [self._queue.get()]
+        deadline = time.monotonic() + self.window_s
+        while len(jobs) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    jobs.append(self._queue.get_nowait())
+                else:
+                    jobs.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return jobs
+
+    def _loop(self) -> None:
+        while True:
+            jobs = self._collect()
+            if self.concurrency == 1:
+                self._run_jobs(jobs)
+                continue
+            # Pool mode: chờ tới khi có worker rảnh rồi chạy batch ở thread riêng,
+            # trong lúc đó tiếp tục gom batch kế tiếp
+            self._slots.acquire()
+            threading.Thread(
+                target=self._run_jobs_released, args=(jobs,), name="inference-batch", daemon=True
+            ).start()
+
+    def _run_jobs_released(self, jobs: List[_Job]) -> None:
+        try:
+            self._run_jobs(jobs)
+        finally:
+            self._slots.release()
+
+    def _run_jobs(self, jobs: List[_Job]) -> None:
+        started = time.monotonic()
+        waits = [started - j.enqueued_at for j in jobs]
+
+        # Mỗi mức quality dùng profile giải mã riêng → chạy theo nhóm
+        by_quality: dict = {}
+        for job in jobs:
+            by_quality.setdefault(job.quality, []).append(job)
+
+        for quality, group in by_quality.items():
+            try:
+                summaries = self.run_batch(
+                    [(j.title, j.body) for j in group], quality=quality
+                )
+                for job, summary in zip(group, summaries):
+                    job.future.set_result(summary)
+            except Exception as e:
+                print(f"[inference] batch {len(group)} bài lỗi ({str(e)[:200]}) → summary dự phòng")
+                for job in group:
+                    if not job.future.done():
+                        job.future.set_result(_fallback_summary(job.body))
+
+        busy = time.monotonic() - started
+        with self._stats_lock:
+            self._batches += 1
+            self._jobs += len(jobs)
+            self._last_batch_size = len(jobs)
+            self._max_batch_seen = max(self._max_batch_seen, len(jobs))
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+            self._busy_total += busy
+
+
+_scheduler: Optional[InferenceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> InferenceScheduler:
+    """Khởi tạo scheduler dùng chung (lazy, 1 lần cho cả process)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            if POOL_WORKERS > 0:
+                pool = get_worker_pool()
+                _scheduler = InferenceScheduler(run_batch=pool.summarize_many, concurrency=pool.size)
+            else:
+                _scheduler = InferenceScheduler()
+        return _scheduler
@@ -0,0 +1,184 @@
+#\app\services\near_dup.py
+"""
+Phát hiện tin gần trùng giữa các nguồn (MinHash + LSH) trước khi tóm tắt.
+
+- Shingle = 5 từ liên tiếp của body (đã chuẩn hoá, chữ thường).
+- Chữ ký MinHash NEAR_DUP_NUM_PERM giá trị, chia NEAR_DUP_BANDS band để tra
+  ứng viên qua LSH; ứng viên được xác nhận bằng Jaccard ước lượng
+  >= NEAR_DUP_THRESHOLD.
+- Chữ ký + cụm lưu trong bảng news_minhash (cạnh news_article), index LSH
+  trong RAM được dựng lại từ bảng này khi khởi động.
+Bài mới trùng gần với 1 bài đã có summary → vào cùng cụm và dùng lại summary,
+không chạy model.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.database import SessionLocal
+from app.models.news import NewsMinHash
+
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "1") != "0"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", "128"))
+BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))  # 16 band x 8 dòng → ngưỡng LSH ~0.7
+SHINGLE_WORDS = 5
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Hệ số hoán vị cố định (seed cố định) → chữ ký đã lưu dùng lại được sau khi restart
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def _shingles(text: str) -> Iterable[str]:
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < SHINGLE_WORDS:
+        return [" ".join(words)] if words else []
+    return {" ".join(words[i: i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """Chữ ký MinHash (uint32[NUM_PERM]); None nếu text rỗng."""
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    hv = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+         for s in shingles),
+        dtype=np.uint64,
+    )
+    phv = ((np.outer(hv, _PERM_A) + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return phv.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard ước lượng từ 2 chữ ký."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class NearDupIndex:
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, bands: int = BANDS):
+        self.threshold = threshold
+        self.bands = max(1, bands)
+        self.rows = NUM_PERM // self.bands
+        self._lock = threading.Lock()
+        self._sigs: dict[int, np.ndarray] = {}
+        self._cluster: dict[int, int] = {}
+        self._buckets: dict[Tuple[int, bytes], set[int]] = {}
+
+        self.linked = 0             # số bài dùng lại summary của cụm
+        self.saved_seconds = 0.0    # thời gian model ước lượng đã tiết kiệm
+        self._infer_seconds = 0.0   # để ước lượng thời gian tóm tắt trung bình / bài
+        self._infer_articles = 0
+
+    def _band_keys(self, sig: np.ndarray):
+        for b in range(self.bands):
+            yield b, sig[b * self.rows: (b + 1) * self.rows].tobytes()
+
+    def _insert_locked(self, article_id: int, sig: np.ndarray, cluster_id: int) -> None:
+        old = self._sigs.get(article_id)
+        if old is not None:
+            for key in self._band_keys(old):
+                self._buckets.get(key, set()).discard(article_id)
+        self._sigs[article_id] = sig
+        self._cluster[article_id] = cluster_id
+        for key in self._band_keys(sig):
+            self._buckets.setdefault(key, set()).add(article_id)
+
+    def load(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.query(NewsMinHash.article_id, NewsMinHash.cluster_id, NewsMinHash.signature).all()
+        finally:
+            db.close()
+        with self._lock:
+            for article_id, cluster_id, blob in rows:
+                sig = np.frombuffer(blob, dtype=np.uint32)
+                if len(sig) == NUM_PERM:
+                    self._insert_locked(article_id, sig, cluster_id)
+        print(f"=== Near-dup index: {len(self._sigs)} bài, {len(set(self._cluster.values()))} cụm ===")
+
+    # ---------- Tra cứu ----------
+    def query(
+        self, sig: Optional[np.ndarray], exclude_id: Optional[int] = None
+    ) -> Optional[Tuple[int, int, float]]:
+        """Bài gần trùng nhất vượt ngưỡng: (article_id, cluster_id, similarity) hoặc None."""
+        if sig is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(sig):
+                candidates |= self._buckets.get(key, set())
+            candidates.discard(exclude_id)
+            best = None
+            for cand in candidates:
+                sim = similarity(sig, self._sigs[cand])
+                if sim >= self.threshold and (best is None or sim > best[2]):
+                    best = (cand, self._cluster[cand], sim)
+            return best
+
+    # ---------- Ghi ----------
+    def cluster_for(self, article_id: int, cluster_id: Optional[int] = None) -> int:
+        """Cụm của bài: cụm truyền vào, cụm đã có (vd. tóm tắt lại) hoặc cụm mới = chính nó."""
+        with self._lock:
+            return cluster_id or self._cluster.get(article_id) or article_id
+
+    def remember(self, entries: Iterable[Tuple[int, np.ndarray, int]]) -> None:
+        """Đưa (article_id, chữ ký, cụm) vào index trong RAM (sau khi đã commit xuống DB)."""
+        with self._lock:
+            for article_id, sig, cluster_id in entries:
+                self._insert_locked(article_id, sig, cluster_id)
+
+    def record_link(self) -> None:
+        with self._lock:
+            self.linked += 1
+            if self._infer_articles:
+                self.saved_seconds += self._infer_seconds / self._infer_articles
+
+    def record_inference(self, seconds: float, articles: int) -> None:
+        with self._lock:
+            self._infer_seconds += seconds
+            self._infer_articles += articles
+
+    def stats(self) -> dict:
+        with self._lock:
+            clusters: dict[int, int] = {}
+            for c in self._cluster.values():
+                clusters[c] = clusters.get(c, 0) + 1
+            return {
+                "enabled": True,
+                "threshold": self.threshold,
+                "indexed_articles": len(self._sigs),
+                "clusters": len(clusters),
+                "multi_article_clusters": sum(1 for n in clusters.values() if n > 1),
+                "linked_items": self.linked,
+                "avg_inference_seconds": round(self._infer_seconds / self._infer_articles, 3)
+                if self._infer_articles else 0.0,
+                "saved_model_seconds_est": round(self.saved_seconds, 2),
+            }
+
+
+_index: Optional[NearDupIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_dup_index() -> Optional[NearDupIndex]:
+    """Index dùng chung, dựng lại từ news_minhash lần gọi đầu; None nếu NEAR_DUP_ENABLED=0."""
+    global _index
+    if not NEAR_DUP_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = NearDupIndex()
+            _index.load()
+        return _index
@@ -0,0 +1,192 @@
+#\app\services\persistence.py
+"""
+Lưu bài đã xử lý (article + NLP + chữ ký MinHash) theo lô, 1 transaction / lô.
+
+- news_article: INSERT ... ON CONFLICT(url) DO UPDATE (chỉ khi có trường đổi)
+  ... RETURNING id → không cần SELECT / refresh từng bài.
+- news_nlp: INSERT ... ON CONFLICT(article_id, model_version) DO UPDATE (chỉ khi
+  summary / category / quality đổi).
+- daily_stats: cộng / trừ số bài theo (ngày, nguồn, category) cùng transaction.
+- news_minhash: upsert cùng transaction; index RAM (near-dup, known-URL) chỉ
+  cập nhật sau khi commit thành công.
+Hỗ trợ SQLite và PostgreSQL (insert theo dialect của session); cả lô ghi
+trong db_writer() (SQLite: 1 người ghi / process).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database import db_writer
+from app.models.news import NewsArticle, NewsMinHash, NewsNLP
+from app.services import daily_stats, near_dup
+from app.services.near_dup import get_near_dup_index
+from app.services.url_index import get_url_index
+
+# Số dòng / câu INSERT (giữ dưới giới hạn biến bind của SQLite)
+CHUNK_ROWS = 100
+
+
+@dataclass
+class ProcessedArticle:
+    """1 bài đã có summary, chờ ghi xuống DB."""
+    url: str
+    source: str
+    title: str
+    body: str
+    published_at: Optional[str]
+    summary: str
+    category: Optional[str]
+    quality: str
+    model_version: str
+    cluster_id: Optional[int] = None  # cụm tin gần trùng đã có (dùng lại summary)
+
+
+def _insert(db: Session, model):
+    dialect = db.get_bind().dialect.name
+    return (postgresql if dialect == "postgresql" else sqlite).insert(model)
+
+
+def _chunks(rows: Sequence, size: int = CHUNK_ROWS):
+    for i in range(0, len(rows), size):
+        yield rows[i: i + size]
+
+
+def _upsert_articles(db: Session, records: Sequence[ProcessedArticle], now: datetime) -> Dict[str, int]:
+    """url → article_id cho cả lô."""
+    ids: Dict[str, int] = {}
+    for chunk in _chunks(records):
+        stmt = _insert(db, NewsArticle).values([
+            {
+                "url": r.url,
+                "source": r.source,
+                "title": r.title,
+                "body": r.body,
+                "published_at": r.published_at,
+                "created_at": now,
+                "created_date": now.date(),
+                "updated_at": now,
+            }
+            for r in chunk
+        ])
+        ex = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NewsArticle.url],
+            set_={
+                "source": ex.source,
+                "title": ex.title,
+                "body": ex.body,
+                "published_at": ex.published_at,
+                "updated_at": ex.updated_at,
+            },
+            # Không đổi gì → không ghi lại dòng (như bản cũ chỉ commit khi changed)
+            where=or_(
+                NewsArticle.source != ex.source,
+                NewsArticle.title != ex.title,
+                NewsArticle.body != ex.body,
+                NewsArticle.published_at.is_distinct_from(ex.published_at),
+            ),
+        ).returning(NewsArticle.id, NewsArticle.url)
+        ids.update({url: article_id for article_id, url in db.execute(stmt)})
+
+    # Dòng đã có và không đổi không nằm trong RETURNING
+    missing = [r.url for r in records if r.url not in ids]
+    for chunk in _chunks(missing):
+        ids.update({
+            url: article_id
+            for article_id, url in db.query(NewsArticle.id, NewsArticle.url).filter(NewsArticle.url.in_(chunk))
+        })
+    return ids
+
+
+def _upsert_nlp(db: Session, records: Sequence[ProcessedArticle], ids: Dict[str, int], now: datetime) -> None:
+    """1 bản NLP / (article_id, model_version): ON CONFLICT trên uq_nlp_article_version."""
+    for chunk in _chunks(records):
+        stmt = _insert(db, NewsNLP).values([
+            {
+                "article_id": ids[r.url],
+                "summary": r.summary,
+                "category": r.category,
+                "model_version": r.model_version,
+                "quality": r.quality,
+                "created_at": now,
+            }
+            for r in chunk
+        ])
+        ex = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[NewsNLP.article_id, NewsNLP.model_version],
+            set_={"summary": ex.summary, "category": ex.category, "quality": ex.quality},
+            where=or_(
+                NewsNLP.summary != ex.summary,
+                NewsNLP.category.is_distinct_from(ex.category),
+                NewsNLP.quality.is_distinct_from(ex.quality),
+            ),
+        )
+        db.execute(stmt)
+
+
+def persist_batch(db: Session, records: Sequence[ProcessedArticle]) -> List[int]:
+    """
+    Ghi cả lô trong 1 transaction, trả article_id theo đúng thứ tự records.
+    Lỗi → rollback cả lô và ném lại exception.
+    """
+    if not records:
+        return []
+    # Cùng URL xuất hiện 2 lần trong lô: bản sau thắng (ON CONFLICT không sửa 1 dòng 2 lần)
+    latest = list({r.url: r for r in records}.values())
+    now = datetime.utcnow()
+    index = get_near_dup_index()
+    staged = []
+
+    with db_writer():
+        # Kết thúc snapshot đọc đang mở (nếu có): transaction đọc của WAL không
+        # nâng lên ghi được khi đã có người ghi khác commit sau nó
+        db.commit()
+        try:
+            urls = [r.url for r in latest]
+            before = daily_stats.stat_keys(db, urls)
+            ids = _upsert_articles(db, latest, now)
+            _upsert_nlp(db, latest, ids, now)
+            daily_stats.apply_changes(db, before, daily_stats.stat_keys(db, urls))
+
+            if index is not None:
+                sig_rows = []
+                for r in latest:
+                    sig = near_dup.signature(r.body)
+                    if sig is None:
+                        continue
+                    article_id = ids[r.url]
+                    cluster_id = index.cluster_for(article_id, r.cluster_id)
+                    staged.append((article_id, sig, cluster_id))
+                    sig_rows.append({
+                        "article_id": article_id,
+                        "cluster_id": cluster_id,
+                        "signature": sig.tobytes(),
+                        "created_at": now,
+                    })
+                for chunk in _chunks(sig_rows):
+                    stmt = _insert(db, NewsMinHash).values(chunk)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[NewsMinHash.article_id],
+                        set_={"cluster_id": stmt.excluded.cluster_id, "signature": stmt.excluded.signature},
+                    )
+                    db.execute(stmt)
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    # Lần crawl sau bỏ qua các URL này (trừ khi force_refresh)
+    url_index = get_url_index()
+    for r in latest:
+        url_index.add(r.url)
+    if index is not None:
+        index.remember(staged)
+    return [ids[r.url] for r in records]
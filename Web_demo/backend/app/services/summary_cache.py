@@ -0,0 +1,177 @@
+#\app\services\summary_cache.py
+"""
+Cache summary theo nội dung (content-addressed), không phụ thuộc URL.
+
+Key = sha256(body đã làm sạch + model version + tham số sinh). Hai tầng:
+  - LRU trong process (OrderedDict), giới hạn số entry
+  - SQLite bền vững (file riêng), giới hạn số entry, xoá entry ít dùng nhất
+Mỗi entry lưu thời gian model đã tốn để sinh ra nó, nhờ đó thống kê được
+thời gian model tiết kiệm khi cache hit.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "1") != "0"
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "./summary_cache.db")
+MEMORY_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MEMORY_MAX", "2048"))
+DISK_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_DISK_MAX", "100000"))
+
+
+def make_key(cleaned_body: str, model_version: str, params: dict) -> str:
+    h = hashlib.sha256()
+    h.update(model_version.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    h.update(b"\0")
+    h.update(cleaned_body.encode("utf-8", "ignore"))
+    return h.hexdigest()
+
+
+class SummaryCache:
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        memory_max: int = MEMORY_MAX_ENTRIES,
+        disk_max: int = DISK_MAX_ENTRIES,
+    ):
+        self.memory_max = max(0, memory_max)
+        self.disk_max = max(0, disk_max)
+        self._mem: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                gen_seconds REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_summary_cache_access ON summary_cache(last_access)"
+        )
+        self._conn.commit()
+        self._disk_count = self._conn.execute("SELECT COUNT(*) FROM summary_cache").fetchone()[0]
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.evictions = 0
+
+    # ---------- tầng RAM ----------
+    def _mem_put(self, key: str, value: Tuple[str, float]) -> None:
+        if self.memory_max == 0:
+            return
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_max:
+            self._mem.popitem(last=False)
+
+    # ---------- API ----------
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                self._mem.move_to_end(key)
+                self.memory_hits += 1
+                self.saved_seconds += hit[1]
+                return hit[0]
+
+            row = self._conn.execute(
+                "SELECT summary, gen_seconds FROM summary_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE summary_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self._mem_put(key, (row[0], row[1]))
+            self.disk_hits += 1
+            self.saved_seconds += row[1]
+            return row[0]
+
+    def put(self, key: str, summary: str, gen_seconds: float = 0.0) -> None:
+        now = time.time()
+        with self._lock:
+            self._mem_put(key, (summary, gen_seconds))
+            if self.disk_max == 0:
+                return
+            existed = self._conn.execute(
+                "SELECT 1 FROM summary_cache WHERE key = ?", (key,)
+            ).fetchone() is not None
+            self._conn.execute(
+                """
+                INSERT INTO summary_cache (key, summary, gen_seconds, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    summary = excluded.summary,
+                    gen_seconds = excluded.gen_seconds,
+                    last_access = excluded.last_access
+                """,
+                (key, summary, float(gen_seconds), now, now),
+            )
+            if not existed:
+                self._disk_count += 1
+            if self._disk_count > self.disk_max:
+                overflow = self._disk_count - self.disk_max
+                self._conn.execute(
+                    """
+                    DELETE FROM summary_cache WHERE key IN (
+                        SELECT key FROM summary_cache ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                )
+                self._disk_count -= overflow
+                self.evictions += overflow
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "lookups": lookups,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_hit_ratio": round(self.memory_hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._mem),
+                "disk_entries": self._disk_count,
+                "memory_max": self.memory_max,
+                "disk_max": self.disk_max,
+                "evictions": self.evictions,
+                "saved_model_seconds": round(self.saved_seconds, 2),
+            }
+
+
+_cache: Optional[SummaryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[SummaryCache]:
+    """Cache dùng chung cho cả process; None nếu SUMMARY_CACHE_ENABLED=0."""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache()
+        return _cache
@@ -0,0 +1,93 @@
+#\app\services\tokenization.py
+"""
+Lớp tokenize cho summarizer, không dùng lock toàn cục.
+
+- Ưu tiên tokenizer fast (Rust) nếu cho kết quả encode/decode giống hệt
+  SentencePiece tokenizer gốc trên tập câu kiểm tra; nếu không thì dùng bản
+  slow như trước.
+- Mỗi thread có instance riêng (threading.local), nên encode/decode song song
+  không cần khoá.
+- Encode theo batch, trả list id (không special token) để pipeline giữ lại
+  và dùng tiếp, không phải tokenize lại cùng 1 đoạn văn bản.
+"""
+from __future__ import annotations
+
+import copy
+import os
+import threading
+from typing import List, Sequence
+
+from transformers import AutoTokenizer
+
+USE_FAST_TOKENIZER = os.getenv("SUMMARIZER_FAST_TOKENIZER", "1") != "0"
+
+# Câu kiểm tra: dấu tiếng Việt, số thập phân / hàng nghìn, ngoặc, xuống dòng...
+_VERIFY_TEXTS = [
+    "Thủ tướng Chính phủ yêu cầu các bộ, ngành khẩn trương hoàn thiện hồ sơ.",
+    "Giá vàng SJC tăng 1.500.000 đồng/lượng, lên 85,5 triệu đồng (theo VnExpress).",
+    "Đội tuyển Việt Nam thắng 2-0; HLV Kim Sang-sik nói: \"Chúng tôi đã sẵn sàng!\"",
+    "Ngày 28/11/2025, nhiệt độ ở Hà Nội xuống 12°C…\n\nNgười dân được khuyến cáo giữ ấm.",
+    "  Khoảng trắng   thừa  và tab\tở giữa câu, email bandosong@vietnamnet.vn  ",
+    "COVID-19, AI, 5G, iPhone 16 Pro Max – những từ khoá nổi bật năm nay.",
+]
+
+
+def _same_behaviour(fast, slow, texts: Sequence[str]) -> bool:
+    for text in texts:
+        ids_fast = fast(text, add_special_tokens=True)["input_ids"]
+        ids_slow = slow(text, add_special_tokens=True)["input_ids"]
+        if ids_fast != ids_slow:
+            return False
+        if fast.decode(ids_fast, skip_special_tokens=True) != slow.decode(ids_slow, skip_special_tokens=True):
+            return False
+    return True
+
+
+class TokenizerPool:
+    """Tokenizer dùng chung: instance riêng theo thread, encode/decode theo batch."""
+
+    def __init__(self, model_dir, use_fast: bool = USE_FAST_TOKENIZER):
+        slow = AutoTokenizer.from_pretrained(
+            model_dir,
+            local_files_only=True,
+            use_fast=False,  # SentencePiece tokenizer gốc, làm mốc đối chiếu
+        )
+        base = slow
+        self.is_fast = False
+
+        if use_fast:
+            try:
+                fast = AutoTokenizer.from_pretrained(
+                    model_dir,
+                    local_files_only=True,
+                    use_fast=True,
+                )
+                if fast.is_fast and _same_behaviour(fast, slow, _VERIFY_TEXTS):
+                    base = fast
+                    self.is_fast = True
+                else:
+                    print("=== Fast tokenizer lệch so với SentencePiece → dùng bản slow ===")
+            except Exception as e:
+                print(f"=== Không load được fast tokenizer ({str(e)[:100]}) → dùng bản slow ===")
+
+        self.base = base
+        self.eos_token_id = base.eos_token_id
+        self.pad_token_id = base.pad_token_id
+        self._local = threading.local()
+
+    def get(self):
+        """Tokenizer riêng của thread hiện tại."""
+        tok = getattr(self._local, "tokenizer", None)
+        if tok is None:
+            tok = copy.deepcopy(self.base)
+            self._local.tokenizer = tok
+        return tok
+
+    def encode_batch(self, texts: Sequence[str]) -> List[List[int]]:
+        """Encode nhiều đoạn trong 1 lần gọi, không thêm special token."""
+        if not texts:
+            return []
+        return self.get()(list(texts), add_special_tokens=False)["input_ids"]
+
+    def decode_batch(self, sequences) -> List[str]:
+        return self.get().batch_decode(sequences, skip_special_tokens=True)
@@ -0,0 +1,109 @@
+#\app\services\url_index.py
+"""
+Index các URL đã xử lý, để crawler bỏ qua bài đã có trước khi gửi HTTP request.
+
+- Tập URL nằm trong RAM, nạp 1 lần từ DB (bài đã có NLP với MODEL_VERSION hiện
+  tại) lúc khởi động; router thêm URL mỗi khi lưu xong 1 bài, bỏ URL khi bài
+  không còn trong DB (discard).
+- Watermark theo trang danh mục: link mới nhất thấy ở lần crawl trước. Gặp lại
+  watermark trên 1 trang → các trang sau chỉ toàn bài cũ, không cần tải tiếp.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Optional
+
+from app.database import SessionLocal, db_writer
+from app.models.news import CrawlWatermark, NewsArticle, NewsNLP
+from app.services.summarizer import MODEL_VERSION
+
+
+class KnownUrlIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._urls: set[str] = set()
+        self._watermarks: dict[str, str] = {}
+        self.skipped = 0  # số bài đã bỏ qua không tải
+        self.evicted = 0  # số URL bị bỏ vì bài không còn trong DB
+
+    def load(self) -> None:
+        db = SessionLocal()
+        try:
+            urls = {
+                u for (u,) in db.query(NewsArticle.url)
+                .join(NewsNLP, NewsNLP.article_id == NewsArticle.id)
+                .filter(NewsNLP.model_version == MODEL_VERSION)
+            }
+            marks = {w.listing_url: w.newest_url for w in db.query(CrawlWatermark)}
+        finally:
+            db.close()
+        with self._lock:
+            self._urls = urls
+            self._watermarks = marks
+        print(f"=== Known-URL index: {len(urls)} URL, {len(marks)} watermark ===")
+
+    # ---------- URL ----------
+    def contains(self, url: str) -> bool:
+        with self._lock:
+            hit = url in self._urls
+            if hit:
+                self.skipped += 1
+            return hit
+
+    def add(self, url: Optional[str]) -> None:
+        if url:
+            with self._lock:
+                self._urls.add(url)
+
+    def discard(self, url: Optional[str]) -> None:
+        """Bỏ URL (bài đã bị xoá khỏi DB) → lần crawl sau tải lại bình thường."""
+        if url:
+            with self._lock:
+                if url in self._urls:
+                    self._urls.discard(url)
+                    self.evicted += 1
+
+    # ---------- Watermark ----------
+    def watermark(self, listing_url: str) -> Optional[str]:
+        with self._lock:
+            return self._watermarks.get(listing_url)
+
+    def set_watermark(self, listing_url: str, newest_url: str) -> None:
+        with self._lock:
+            if self._watermarks.get(listing_url) == newest_url:
+                return
+            self._watermarks[listing_url] = newest_url
+        db = SessionLocal()
+        try:
+            with db_writer():
+                mark = db.get(CrawlWatermark, listing_url)
+                if mark is None:
+                    db.add(CrawlWatermark(listing_url=listing_url, newest_url=newest_url))
+                else:
+                    mark.newest_url = newest_url
+                db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "known_urls": len(self._urls),
+                "watermarks": len(self._watermarks),
+                "skipped_fetches": self.skipped,
+                "evicted_urls": self.evicted,
+            }
+
+
+_index: Optional[KnownUrlIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_url_index() -> KnownUrlIndex:
+    """Index dùng chung, nạp từ DB ở lần gọi đầu (lúc khởi động app)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = KnownUrlIndex()
+            _index.load()
+        return _index
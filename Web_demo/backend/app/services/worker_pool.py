@@ -0,0 +1,291 @@
+#\app\services\worker_pool.py
+"""
+Pool nhiều process tóm tắt (inference pool mode).
+
+Bật bằng SUMMARIZER_WORKERS=N (0 = tắt, model chạy trong process API như cũ).
+Mỗi worker là 1 process riêng giữ 1 bản model, với torch.set_num_threads
+= SUMMARIZER_THREADS_PER_WORKER (mặc định: số core / N). Job (1 lô bài) được
+giao cho worker đang rảnh; worker chết giữa chừng được khởi động lại và job
+đang chạy dở được giao lại, API không bị ảnh hưởng. Worker không load / warm-up
+được model tự thoát, không được giao job hay tính vào /ready, và được khởi động
+lại với backoff tăng dần. Khi mọi worker đều đang lỗi khởi động, job đang chờ và
+job mới bị trả lỗi ngay (scheduler dùng summary dự phòng) thay vì chờ vô hạn.
+"""
+from __future__ import annotations
+
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+POOL_WORKERS = int(os.getenv("SUMMARIZER_WORKERS", "0"))
+THREADS_PER_WORKER = int(os.getenv("SUMMARIZER_THREADS_PER_WORKER", "0"))
+
+# Số lần giao lại 1 job khi worker đang chạy nó bị chết
+MAX_JOB_ATTEMPTS = 2
+# Worker không load / warm-up được model: chờ 2, 4, 8... giây (tối đa) rồi mới khởi động lại
+RESTART_BACKOFF_CAP = 60.0
+
+
+def _worker_main(worker_id: int, task_q, result_q, num_threads: int) -> None:
+    """Vòng lặp trong process con: load model, warm-up rồi nhận job."""
+    import torch
+
+    torch.set_num_threads(max(1, num_threads))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    from app.services import summarizer
+
+    state = summarizer.warm_up()
+    result_q.put(("ready", worker_id, os.getpid(), state))
+    if not state.get("ready"):
+        # Model lỗi → thoát để process cha khởi động lại, không nhận job rồi trả fallback
+        return
+
+    while True:
+        msg = task_q.get()
+        if msg is None:
+            break
+        job_id, articles, quality = msg
+        try:
+            summaries = summarizer.summarize_many(articles, quality=quality)
+            result_q.put(("result", worker_id, job_id, True, summaries))
+        except Exception as e:
+            result_q.put(("result", worker_id, job_id, False, str(e)[:300]))
+
+
+class _Worker:
+    def __init__(self, worker_id: int, ctx, result_q, num_threads: int):
+        self.worker_id = worker_id
+        self.task_q = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.task_q, result_q, num_threads),
+            name=f"summarizer-worker-{worker_id}",
+            daemon=True,
+        )
+        self.process.start()
+        self.ready = False
+        self.error: Optional[str] = None  # lỗi load / warm-up model
+        self.readiness: dict = {}
+        self.job: Optional[int] = None  # job đang chạy
+        self.jobs_done = 0
+
+
+class WorkerPool:
+    def __init__(self, size: int = POOL_WORKERS, threads_per_worker: int = THREADS_PER_WORKER):
+        self.size = max(1, size)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.size)
+
+        self._ctx = mp.get_context("spawn")  # không fork model/thread pool của process cha
+        self._result_q = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._jobs: dict[int, Tuple[list, str, Future, int]] = {}
+        self._pending: deque[int] = deque()
+        self.restarts = 0
+        self.startup_failures = 0
+        # worker_id → (số lần khởi động lỗi liên tiếp, thời điểm được khởi động lại | None)
+        self._backoff: dict[int, Tuple[int, Optional[float]]] = {}
+        self.completed = 0
+        self.failed = 0
+        self._closed = False
+
+        self._workers = [self._spawn(i) for i in range(self.size)]
+
+        threading.Thread(target=self._result_loop, name="worker-pool-results", daemon=True).start()
+        threading.Thread(target=self._monitor_loop, name="worker-pool-monitor", daemon=True).start()
+
+    def _spawn(self, worker_id: int) -> _Worker:
+        return _Worker(worker_id, self._ctx, self._result_q, self.threads_per_worker)
+
+    # ---------- API ----------
+    def submit(self, articles: List[Tuple[Optional[str], str]], quality: str) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WorkerPool đã dừng")
+            if self._unavailable_locked():
+                fut.set_exception(RuntimeError(self._unavailable_message()))
+                return fut
+            job_id = next(self._job_ids)
+            self._jobs[job_id] = (list(articles), quality, fut, 0)
+            self._pending.append(job_id)
+            self._dispatch_locked()
+        return fut
+
+    def summarize_many(self, articles: List[Tuple[Optional[str], str]], quality: str) -> List[str]:
+        return self.submit(articles, quality).result()
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Dừng mọi worker (không khởi động lại), job còn chờ bị huỷ."""
+        with self._lock:
+            self._closed = True
+            for job_id in self._pending:
+                self._jobs.pop(job_id)[2].cancel()
+            self._pending.clear()
+            workers = list(self._workers)
+        for w in workers:
+            w.task_q.put(None)
+        for w in workers:
+            w.process.join(timeout=timeout)
+            if w.process.is_alive():
+                w.process.terminate()
+
+    def readiness(self) -> dict:
+        with self._lock:
+            workers = [
+                {
+                    "worker_id": w.worker_id,
+                    "pid": w.process.pid,
+                    "alive": w.process.is_alive(),
+                    "ready": w.ready,
+                    "busy": w.job is not None,
+                    "jobs_done": w.jobs_done,
+                    "load_seconds": w.readiness.get("load_seconds"),
+                    "warmup": w.readiness.get("warmup"),
+                    "error": w.error,
+                }
+                for w in self._workers
+            ]
+        return {
+            "ready": any(w["ready"] for w in workers),
+            "mode": "pool",
+            "workers": workers,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.size,
+                "threads_per_worker": self.threads_per_worker,
+                "busy": sum(1 for w in self._workers if w.job is not None),
+                "pending_jobs": len(self._pending),
+                "completed_jobs": self.completed,
+                "failed_jobs": self.failed,
+                "restarts": self.restarts,
+                "startup_failures": self.startup_failures,
+            }
+
+    # ---------- Điều phối ----------
+    def _dispatch_locked(self) -> None:
+        for w in self._workers:
+            if not self._pending:
+                return
+            if w.ready and w.job is None and w.process.is_alive():
+                job_id = self._pending.popleft()
+                articles, quality, _, _ = self._jobs[job_id]
+                w.job = job_id
+                w.task_q.put((job_id, articles, quality))
+
+    def _result_loop(self) -> None:
+        while True:
+            msg = self._result_q.get()
+            with self._lock:
+                if msg[0] == "ready":
+                    _, worker_id, pid, state = msg
+                    w = self._workers[worker_id]
+                    if w.process.pid != pid:
+                        continue  # thông báo của process cũ đã được thay
+                    w.readiness = state
+                    if state.get("ready"):
+                        w.ready = True
+                        w.error = None
+                        self._backoff.pop(worker_id, None)
+                    else:
+                        # Process con tự thoát; _monitor_loop khởi động lại có backoff
+                        w.ready = False
+                        w.error = state.get("error") or "warm-up không thành công"
+                        print(f"=== Worker {worker_id} không load được model: {w.error} ===")
+                elif msg[0] == "result":
+                    _, worker_id, job_id, ok, payload = msg
+                    w = self._workers[worker_id]
+                    if w.job == job_id:
+                        w.job = None
+                        w.jobs_done += 1
+                    job = self._jobs.pop(job_id, None)
+                    if job is not None:
+                        fut = job[2]
+                        if ok:
+                            self.completed += 1
+                            fut.set_result(payload)
+                        else:
+                            self.failed += 1
+                            fut.set_exception(RuntimeError(payload))
+                self._dispatch_locked()
+
+    def _monitor_loop(self) -> None:
+        while True:
+            time.sleep(1.0)
+            with self._lock:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                for i, w in enumerate(self._workers):
+                    if w.process.is_alive():
+                        continue
+                    if w.job is not None:
+                        self._retry_locked(w.job)
+                        w.job = None
+                    if not w.ready:
+                        # Chết trước khi sẵn sàng (model lỗi) → lùi thời điểm khởi động lại
+                        failures, restart_at = self._backoff.get(w.worker_id, (0, None))
+                        if restart_at is None:
+                            failures += 1
+                            self.startup_failures += 1
+                            restart_at = now + min(RESTART_BACKOFF_CAP, 2.0 ** failures)
+                            self._backoff[w.worker_id] = (failures, restart_at)
+                            print(f"=== Worker {w.worker_id} lỗi khi khởi động lần {failures} → thử lại sau {restart_at - now:.0f}s ===")
+                        if now < restart_at:
+                            continue
+                        self._backoff[w.worker_id] = (failures, None)
+                    print(f"=== Worker {w.worker_id} (pid {w.process.pid}) đã dừng → khởi động lại ===")
+                    self.restarts += 1
+                    self._workers[i] = self._spawn(w.worker_id)
+                self._dispatch_locked()
+                if self._pending and self._unavailable_locked():
+                    self._fail_pending_locked(self._unavailable_message())
+
+    def _unavailable_locked(self) -> bool:
+        """Chưa worker nào sẵn sàng và tất cả đều đã lỗi khi load / warm-up model."""
+        return all(not w.ready and w.worker_id in self._backoff for w in self._workers)
+
+    def _unavailable_message(self) -> str:
+        errors = sorted({w.error for w in self._workers if w.error})
+        return "Không có worker tóm tắt nào load được model" + (f": {'; '.join(errors)}" if errors else "")
+
+    def _fail_pending_locked(self, reason: str) -> None:
+        for job_id in self._pending:
+            self.failed += 1
+            self._jobs.pop(job_id)[2].set_exception(RuntimeError(reason))
+        self._pending.clear()
+
+    def _retry_locked(self, job_id: int) -> None:
+        articles, quality, fut, attempts = self._jobs[job_id]
+        if attempts + 1 < MAX_JOB_ATTEMPTS:
+            self._jobs[job_id] = (articles, quality, fut, attempts + 1)
+            self._pending.appendleft(job_id)
+        else:
+            self._jobs.pop(job_id, None)
+            self.failed += 1
+            fut.set_exception(RuntimeError("Worker tóm tắt bị dừng khi đang xử lý job"))
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """Khởi tạo pool dùng chung (lazy, chỉ khi SUMMARIZER_WORKERS > 0)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool
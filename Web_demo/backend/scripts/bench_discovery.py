@@ -0,0 +1,151 @@
+"""
+So sánh tìm link bài mới qua RSS / sitemap (discovery) với tải trang danh mục HTML:
+số byte tải về và thời gian tìm link cho mọi cặp (site, subject) có bộ mẫu.
+
+Bộ mẫu (cùng thư mục với scripts/check_fast_extract.py):
+    list-<site>_<subject>.html   trang danh mục 1
+    rss-<site>_<subject>.xml     RSS / sitemap tương ứng
+Tạo từ trang thật bằng --fetch, rồi chạy trên server cục bộ (--delay giả lập RTT):
+    python -m scripts.bench_discovery --fixtures fixtures/html --fetch 3
+    python -m scripts.bench_discovery --fixtures fixtures/html --delay 0.05 --repeat 3
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Đo băng thông thật → tắt cache HTTP; 1 host cục bộ → bỏ giới hạn nhịp
+os.environ.setdefault("HTTP_CACHE_ENABLED", "0")
+os.environ.setdefault("CRAWL_HOST_RPS", "1000")
+os.environ.setdefault("CRAWL_HOST_MAX_RPS", "1000")
+os.environ.setdefault("CRAWL_HOST_CONCURRENCY", "8")
+
+from app.services import crawl_news  # noqa: E402
+from app.services.async_crawler import AsyncCrawler, CrawlJob  # noqa: E402
+from app.services.discovery import Discovery, derive_feed  # noqa: E402
+
+
+def fetch_fixtures(out_dir: Path, subjects_per_site: int) -> None:
+    """Lưu trang danh mục 1 + RSS suy ra từ PATTERNS cho vài subject mỗi site."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for site in crawl_news.LIST_SELECTORS:
+        subjects = [s for s in crawl_news.CANON if site in crawl_news.PATTERNS.get(s, {})]
+        for subject in subjects[:subjects_per_site]:
+            pattern = crawl_news.PATTERNS[subject][site]
+            feed_url = derive_feed(pattern)
+            if not feed_url:
+                continue
+            html = crawl_news.fetch(crawl_news.build_list_url(pattern, 1))
+            feed = crawl_news.fetch(feed_url)
+            if html and feed:
+                (out_dir / f"list-{site}_{subject}.html").write_text(html, encoding="utf-8")
+                (out_dir / f"rss-{site}_{subject}.xml").write_text(feed, encoding="utf-8")
+    print(f"Đã lưu bộ mẫu vào {out_dir}")
+
+
+class _Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.requests = 0
+
+
+def start_server(fixture_dir: Path, delay: float, counter: _Counter) -> str:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = fixture_dir / self.path.split("?", 1)[0].lstrip("/")
+            if delay:
+                time.sleep(delay)
+            if not path.is_file():
+                self.send_error(404)
+                return
+            body = path.read_bytes()
+            self.send_response(200)
+            ctype = "application/xml" if path.suffix == ".xml" else "text/html"
+            self.send_header("Content-Type", f"{ctype}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with counter.lock:
+                counter.bytes += len(body)
+                counter.requests += 1
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{srv.server_address[1]}"
+
+
+def load_pairs(fixture_dir: Path):
+    pairs = []
+    for path in sorted(fixture_dir.glob("list-*.html")):
+        site, subject = path.stem[len("list-"):].split("_", 1)
+        if site in crawl_news.LIST_SELECTORS and (fixture_dir / f"rss-{site}_{subject}.xml").is_file():
+            pairs.append((site, subject))
+    return pairs
+
+
+async def discover_all(jobs, discovery):
+    async with AsyncCrawler(discovery=discovery) as crawler:
+        return await asyncio.gather(*(crawler._listing_links(job, 1) for job in jobs))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default="fixtures/html")
+    ap.add_argument("--fetch", type=int, default=0, help="Tải N subject/site làm bộ mẫu trước khi đo")
+    ap.add_argument("--delay", type=float, default=0.0, help="Độ trễ giả lập mỗi request (giây)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--max-age-hours", type=float, default=0,
+                    help="Lọc bài theo thời điểm đăng (0 = không lọc; bộ mẫu cũ sẽ bị lọc hết)")
+    args = ap.parse_args()
+
+    fixture_dir = Path(args.fixtures)
+    if args.fetch:
+        fetch_fixtures(fixture_dir, args.fetch)
+    pairs = load_pairs(fixture_dir)
+    if not pairs:
+        print(f"Không có cặp list-*.html + rss-*.xml trong {fixture_dir}")
+        return
+
+    counter = _Counter()
+    base = start_server(fixture_dir, args.delay, counter)
+    jobs = [
+        CrawlJob(site, subject, f"{base}/list-{site}_{subject}.html?page={{page}}", crawl_news.LIST_SELECTORS[site])
+        for site, subject in pairs
+    ]
+    feeds = {(site, subject): [("rss", f"{base}/rss-{site}_{subject}.xml")] for site, subject in pairs}
+
+    print(f"=== {len(jobs)} cặp (site, subject), delay {args.delay * 1000:.0f}ms, {args.repeat} vòng ===")
+    for label, make in (
+        ("trang danh mục", lambda: None),
+        ("RSS / sitemap ", lambda: Discovery(sources=feeds, derive=False, max_age_hours=args.max_age_hours)),
+    ):
+        counter.bytes = counter.requests = 0
+        secs, links = [], 0
+        for _ in range(args.repeat):
+            discovery = make()
+            t0 = time.perf_counter()
+            found = asyncio.run(discover_all(jobs, discovery))
+            secs.append(time.perf_counter() - t0)
+            links = sum(len(x or []) for x in found)
+            if discovery is not None and discovery.fallbacks:
+                print(f"  ({discovery.fallbacks} cặp phải quay về trang danh mục)")
+        n = args.repeat
+        print(
+            f"{label}: {counter.bytes / n / 1024:8.1f} KB/lượt, {counter.requests / n:.0f} request, "
+            f"{min(secs) * 1000:7.1f}ms (nhanh nhất), {sum(secs) / n * 1000:7.1f}ms (TB), {links} link"
+        )
+        if discovery is not None:
+            s = discovery.stats()
+            print(f"  bỏ {s['links_too_old']} link cũ trước khi tải bài (vòng cuối)")
+
+
+if __name__ == "__main__":
+    main()
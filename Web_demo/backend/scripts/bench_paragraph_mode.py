@@ -0,0 +1,105 @@
+"""
+So sánh độ trễ paragraph-mode: vòng lặp cũ (1 lần generate / đoạn)
+với batch 1 lần cho tất cả đoạn đã chọn.
+
+Chạy từ thư mục Web_demo/backend:
+    python -m scripts.bench_paragraph_mode --data data.jsonl --n 20
+"""
+import argparse
+import statistics
+import time
+
+import ujson
+
+from app.services import summarizer as S
+
+
+def _legacy_mini_summaries(paras):
+    """Vòng lặp cũ: mỗi đoạn 1 lần beam search."""
+    out = []
+    for para in paras:
+        if not para.strip():
+            continue
+        mini_min, mini_max = S._mini_token_range(para)
+        m = S._generate_summary_with_range(
+            para,
+            min_new_tokens=mini_min,
+            max_new_tokens=mini_max,
+            max_source_len=min(S.MAX_SOURCE_LEN, 900),
+        )
+        if m:
+            out.append(m)
+    return out
+
+
+def _batched_mini_summaries(paras):
+    paras = [p for p in paras if p.strip()]
+    if not paras:
+        return []
+    mins, maxs = zip(*(S._mini_token_range(p) for p in paras))
+    return [
+        m for m in S._generate_batch(
+            paras,
+            min_new_tokens=list(mins),
+            max_new_tokens=list(maxs),
+            max_source_len=min(S.MAX_SOURCE_LEN, 900),
+        ) if m
+    ]
+
+
+def _pct(values, q):
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(q * (len(values) - 1))))
+    return values[idx]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="data.jsonl", help="JSONL có trường title, body")
+    ap.add_argument("--n", type=int, default=20, help="Số bài dài dùng để đo")
+    args = ap.parse_args()
+
+    S._load_summarizer()
+
+    long_articles = []
+    with open(args.data, encoding="utf-8") as f:
+        for line in f:
+            row = ujson.loads(line)
+            art = S._prepare_article(row.get("title"), row.get("body") or "")
+            if art and S._need_paragraph_mode(art.total_tokens, art.num_paras):
+                long_articles.append(art)
+            if len(long_articles) >= args.n:
+                break
+
+    if not long_articles:
+        print("Không có bài nào cần paragraph-mode trong dữ liệu.")
+        return
+
+    # Warm-up 1 lần để không tính chi phí khởi tạo
+    _batched_mini_summaries(long_articles[0].cleaned_paras[:1])
+
+    t_loop, t_batch, same = [], [], 0
+    for art in long_articles:
+        paras = S._select_paragraphs(
+            art.cleaned_paras, min(art.num_paras, S.MAX_PARAS_SUMMARIZED)
+        )
+
+        t0 = time.perf_counter()
+        a = _legacy_mini_summaries(paras)
+        t_loop.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        b = _batched_mini_summaries(paras)
+        t_batch.append(time.perf_counter() - t0)
+
+        same += int(a == b)
+
+    print(f"=== Paragraph-mode: {len(long_articles)} bài dài ===")
+    for name, ts in (("loop ", t_loop), ("batch", t_batch)):
+        print(f"{name}: mean {statistics.mean(ts):.2f}s | p50 {_pct(ts, 0.5):.2f}s | p95 {_pct(ts, 0.95):.2f}s")
+    print(f"speedup (mean): x{statistics.mean(t_loop) / max(statistics.mean(t_batch), 1e-9):.2f}")
+    print(f"mini-summary giống hệt: {same}/{len(long_articles)}")
+
+
+if __name__ == "__main__":
+    main()
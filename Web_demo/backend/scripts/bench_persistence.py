@@ -0,0 +1,134 @@
+"""
+So sánh tốc độ ghi DB: đường cũ (mỗi bài SELECT + INSERT + commit + refresh cho
+article và NLP) với persist_batch (upsert theo lô, 1 transaction / lô).
+
+Chạy trong thư mục tạm (news.db riêng, không đụng DB thật), từ Web_demo/backend:
+    python -m scripts.bench_persistence --articles 500 --batch 50
+Mỗi đường chạy 2 vòng: ghi mới, rồi ghi lại cùng URL với summary đã đổi (update).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+# news.db tương đối theo thư mục hiện tại → chuyển sang thư mục tạm trước khi import app.*
+os.chdir(tempfile.mkdtemp(prefix="bench_persistence_"))
+
+from app.database import Base, SessionLocal, db_writer, engine  # noqa: E402
+from app.models.news import NewsArticle, NewsMinHash, NewsNLP  # noqa: E402
+from app.services import near_dup  # noqa: E402
+from app.services.near_dup import get_near_dup_index  # noqa: E402
+from app.services.persistence import ProcessedArticle, persist_batch  # noqa: E402
+from app.services.url_index import get_url_index  # noqa: E402
+
+WORDS = "chính phủ kinh tế thị trường bóng đá học sinh bệnh viện du lịch công nghệ thế giới".split()
+
+
+def make_records(n: int, body_chars: int, version: str, tag: str):
+    rnd = random.Random(n)
+    out = []
+    for i in range(n):
+        body = " ".join(rnd.choice(WORDS) for _ in range(body_chars // 6))
+        out.append(ProcessedArticle(
+            url=f"https://example.vn/bai-{i}.html",
+            source=rnd.choice(["vnexpress", "vietnamnet"]),
+            title=f"Bài số {i}",
+            body=body,
+            published_at=None,
+            summary=f"Tóm tắt {tag} của bài {i}",
+            category="Thế giới",
+            quality="best",
+            model_version=version,
+        ))
+    return out
+
+
+# ---------- Đường cũ (trước persist_batch), giữ nguyên để đối chiếu ----------
+def legacy_persist(db, r: ProcessedArticle) -> None:
+    article = db.query(NewsArticle).filter(NewsArticle.url == r.url).first()
+    if article:
+        changed = False
+        for field in ("title", "body", "source", "published_at"):
+            if getattr(article, field) != getattr(r, field):
+                setattr(article, field, getattr(r, field))
+                changed = True
+        if changed:
+            db.add(article); db.commit(); db.refresh(article)
+    else:
+        article = NewsArticle(url=r.url, source=r.source, title=r.title, body=r.body, published_at=r.published_at)
+        db.add(article); db.commit(); db.refresh(article)
+
+    nlp = (
+        db.query(NewsNLP)
+        .filter(NewsNLP.article_id == article.id, NewsNLP.model_version == r.model_version)
+        .first()
+    )
+    if nlp:
+        if nlp.summary != r.summary or nlp.category != r.category or nlp.quality != r.quality:
+            nlp.summary, nlp.category, nlp.quality = r.summary, r.category, r.quality
+            db.add(nlp); db.commit(); db.refresh(nlp)
+    else:
+        nlp = NewsNLP(article_id=article.id, summary=r.summary, category=r.category,
+                      model_version=r.model_version, quality=r.quality)
+        db.add(nlp); db.commit(); db.refresh(nlp)
+
+    get_url_index().add(article.url)
+    index = get_near_dup_index()
+    if index is not None:
+        sig = near_dup.signature(article.body)
+        if sig is not None:
+            cluster_id = index.cluster_for(article.id)
+            with db_writer():
+                db.merge(NewsMinHash(article_id=article.id, cluster_id=cluster_id, signature=sig.tobytes()))
+                db.commit()
+            index.remember([(article.id, sig, cluster_id)])
+
+
+def run(label, fn, records, batch):
+    db = SessionLocal()
+    try:
+        t0 = time.perf_counter()
+        if fn == "legacy":
+            for r in records:
+                legacy_persist(db, r)
+        else:
+            for i in range(0, len(records), batch):
+                persist_batch(db, records[i: i + batch])
+        secs = time.perf_counter() - t0
+    finally:
+        db.close()
+    print(f"{label:28s}: {len(records) / secs:8.0f} bài/s ({secs:.2f}s)")
+    return secs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles", type=int, default=500)
+    ap.add_argument("--batch", type=int, default=50)
+    ap.add_argument("--body-chars", type=int, default=3000)
+    args = ap.parse_args()
+
+    print(f"=== {args.articles} bài, lô {args.batch}, DB tạm {os.getcwd()}/news.db ===")
+    results = {}
+    for fn in ("legacy", "batch"):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        name = "từng bài (cũ)" if fn == "legacy" else f"persist_batch (lô {args.batch})"
+        insert = run(f"{name} - ghi mới", fn, make_records(args.articles, args.body_chars, "v1", "a"), args.batch)
+        update = run(f"{name} - cập nhật", fn, make_records(args.articles, args.body_chars, "v1", "b"), args.batch)
+        results[fn] = (insert, update)
+
+        db = SessionLocal()
+        try:
+            n_art, n_nlp = db.query(NewsArticle).count(), db.query(NewsNLP).count()
+        finally:
+            db.close()
+        print(f"  → {n_art} article, {n_nlp} NLP trong DB")
+
+    (li, lu), (bi, bu) = results["legacy"], results["batch"]
+    print(f"Tăng tốc: ghi mới x{li / bi:.1f}, cập nhật x{lu / bu:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark chế độ giải mã prompt-lookup (copy-assisted, không cần draft model)
+so với greedy và beam search hiện tại: tokens/giây và độ trùng output.
+
+Chạy từ thư mục Web_demo/backend:
+    python -m scripts.bench_prompt_lookup --data data.jsonl --n 30
+"""
+import argparse
+import time
+
+import torch
+import ujson
+
+from app.services import summarizer as S
+
+
+def generate_ids(model, tokenizer, ids, min_new, max_new, decoding):
+    inputs = S._pad_inputs([ids], S.MAX_SOURCE_LEN, tokenizer)
+    inputs = {k: v.to(model.device) for k, v in inputs.items()}
+    with torch.no_grad():
+        out = model.generate(
+            **inputs,
+            min_new_tokens=min_new,
+            max_new_tokens=max_new,
+            **S._decoding_params(decoding),
+        )
+    return out[0]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="data.jsonl", help="JSONL có trường title, body")
+    ap.add_argument("--n", type=int, default=30)
+    ap.add_argument("--modes", default="greedy,prompt_lookup,beam")
+    args = ap.parse_args()
+
+    tokenizer, model = S._load_summarizer()
+
+    articles = []
+    with open(args.data, encoding="utf-8") as f:
+        for line in f:
+            row = ujson.loads(line)
+            art = S._prepare_article(row.get("title"), row.get("body") or "")
+            if art:
+                articles.append(art)
+            if len(articles) >= args.n:
+                break
+    if not articles:
+        print("Không có bài nào để đo.")
+        return
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    outputs = {}
+    for mode in modes:
+        # warm-up
+        generate_ids(model, tokenizer, articles[0].body_ids, 10, 20, mode)
+
+        total_tokens, total_time, texts = 0, 0.0, []
+        for art in articles:
+            min_new, max_new = S._estimate_new_token_range(art.cleaned_body, num_paras=art.num_paras)
+            t0 = time.perf_counter()
+            ids = generate_ids(model, tokenizer, art.body_ids, min_new, max_new, mode)
+            total_time += time.perf_counter() - t0
+            total_tokens += int((ids != tokenizer.pad_token_id).sum())
+            texts.append(tokenizer.decode_batch([ids])[0].strip())
+        outputs[mode] = texts
+        print(
+            f"{mode:<14} {total_tokens / max(total_time, 1e-9):7.1f} tokens/s | "
+            f"{total_time / len(articles):.2f}s/bài"
+        )
+
+    base = "greedy" if "greedy" in outputs else modes[0]
+    print(f"\n=== Độ trùng output so với {base} ({len(articles)} bài) ===")
+    for mode, texts in outputs.items():
+        same = sum(int(a == b) for a, b in zip(texts, outputs[base]))
+        print(f"{mode:<14} giống hệt {same}/{len(articles)}")
+
+
+if __name__ == "__main__":
+    main()
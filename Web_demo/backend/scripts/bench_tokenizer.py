@@ -0,0 +1,74 @@
+"""
+Micro-benchmark tokenize (tokens/giây):
+  - cũ : SentencePiece slow, encode từng bài, bọc trong 1 threading.Lock
+  - mới: TokenizerPool (fast nếu khớp), encode theo batch, instance riêng mỗi thread
+
+Chạy từ thư mục Web_demo/backend:
+    python -m scripts.bench_tokenizer --data data.jsonl --n 500 --threads 4
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ujson
+from transformers import AutoTokenizer
+
+from app.services import summarizer as S
+from app.services.tokenization import TokenizerPool
+
+
+def run_threads(fn, chunks, threads):
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        total = sum(ex.map(fn, chunks))
+    return total, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="data.jsonl", help="JSONL có trường body")
+    ap.add_argument("--n", type=int, default=500)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--batch", type=int, default=16)
+    args = ap.parse_args()
+
+    texts = []
+    with open(args.data, encoding="utf-8") as f:
+        for line in f:
+            body = ujson.loads(line).get("body") or ""
+            if body.strip():
+                texts.append(body)
+            if len(texts) >= args.n:
+                break
+    if not texts:
+        print("Không có dữ liệu.")
+        return
+
+    chunks = [texts[i: i + args.batch] for i in range(0, len(texts), args.batch)]
+
+    slow = AutoTokenizer.from_pretrained(S.SUMMARIZER_DIR, local_files_only=True, use_fast=False)
+    lock = threading.Lock()
+
+    def old_path(chunk):
+        n = 0
+        for t in chunk:
+            with lock:
+                n += len(slow.encode(t, add_special_tokens=False))
+        return n
+
+    pool = TokenizerPool(S.SUMMARIZER_DIR)
+
+    def new_path(chunk):
+        return sum(len(ids) for ids in pool.encode_batch(chunk))
+
+    print(f"=== {len(texts)} bài, {args.threads} thread, batch {args.batch} ===")
+    print(f"TokenizerPool dùng fast tokenizer: {pool.is_fast}")
+    for name, fn in (("slow + lock", old_path), ("pool batch ", new_path)):
+        fn(chunks[0])  # warm-up
+        total, secs = run_threads(fn, chunks, args.threads)
+        print(f"{name}: {total / max(secs, 1e-9):10.0f} tokens/s ({secs:.2f}s, {total} tokens)")
+
+
+if __name__ == "__main__":
+    main()
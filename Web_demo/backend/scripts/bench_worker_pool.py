@@ -0,0 +1,80 @@
+"""
+Benchmark thông lượng (bài/giây) của pool mode theo số worker, với tổng số
+thread cố định: mỗi worker dùng threads // workers thread.
+
+Chạy từ thư mục Web_demo/backend:
+    python -m scripts.bench_worker_pool --data data.jsonl --n 64 --threads 32 --workers 1,2,4,8
+"""
+import argparse
+import os
+import time
+
+import ujson
+
+# Tắt cache summary để đo đúng thời gian model (process con thừa hưởng env)
+os.environ["SUMMARY_CACHE_ENABLED"] = "0"
+
+from app.services.worker_pool import WorkerPool  # noqa: E402
+
+
+def wait_ready(pool, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        workers = pool.readiness()["workers"]
+        if all(w["ready"] for w in workers):
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="data.jsonl", help="JSONL có trường title, body")
+    ap.add_argument("--n", type=int, default=64)
+    ap.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Tổng thread cho cả pool")
+    ap.add_argument("--workers", default="1,2,4,8")
+    ap.add_argument("--batch", type=int, default=4, help="Số bài mỗi job")
+    ap.add_argument("--quality", default="best")
+    ap.add_argument("--ready-timeout", type=float, default=600.0)
+    args = ap.parse_args()
+
+    articles = []
+    with open(args.data, encoding="utf-8") as f:
+        for line in f:
+            row = ujson.loads(line)
+            if (row.get("body") or "").strip():
+                articles.append((row.get("title"), row["body"]))
+            if len(articles) >= args.n:
+                break
+    if not articles:
+        print("Không có dữ liệu.")
+        return
+
+    chunks = [articles[i: i + args.batch] for i in range(0, len(articles), args.batch)]
+    print(f"=== {len(articles)} bài, tổng {args.threads} thread, job {args.batch} bài ===")
+
+    base = None
+    for n_workers in [int(x) for x in args.workers.split(",") if x.strip()]:
+        per_worker = max(1, args.threads // n_workers)
+        pool = WorkerPool(size=n_workers, threads_per_worker=per_worker)
+        if not wait_ready(pool, args.ready_timeout):
+            print(f"{n_workers} worker: quá thời gian chờ load model, bỏ qua")
+            continue
+
+        t0 = time.perf_counter()
+        futures = [pool.submit(chunk, args.quality) for chunk in chunks]
+        for fut in futures:
+            fut.result()
+        secs = time.perf_counter() - t0
+
+        rate = len(articles) / max(secs, 1e-9)
+        base = base or rate
+        print(
+            f"{n_workers:>2} worker x {per_worker:>2} thread: {rate:6.2f} bài/s "
+            f"({secs:.1f}s) | x{rate / base:.2f} | restart {pool.stats()['restarts']}"
+        )
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
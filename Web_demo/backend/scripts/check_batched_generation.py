@@ -0,0 +1,117 @@
+"""
+Kiểm tra giải mã theo batch cho ra cùng kết quả với giải mã từng input
+(cùng bài mẫu như scripts/bench_paragraph_mode.py, đo độ trễ ở script đó).
+
+- paragraphs: mini-summary các đoạn đã chọn của bài dài, 1 batch với ngân sách
+  min/max_new_tokens riêng từng hàng (_PerRowLengthLogitsProcessor) so với
+  _generate_summary_with_range từng đoạn.
+- articles: summarize_many() cả lô so với summarize() từng bài.
+
+Padding làm thay đổi số học dấu phẩy động của attention → beam search có thể
+rẽ nhánh khác ở vài hàng; script báo số cặp giống hệt và độ giống (difflib theo
+từ) thấp nhất, thoát mã 1 nếu có cặp dưới --min-similarity.
+
+Chạy từ thư mục Web_demo/backend:
+    python -m scripts.check_batched_generation --data data.jsonl --n 20
+    python -m scripts.check_batched_generation --data data.jsonl --n 32 --mode articles
+"""
+import argparse
+import difflib
+import os
+import sys
+
+# So sánh đường giải mã thật → không đọc từ cache summary
+os.environ.setdefault("SUMMARY_CACHE_ENABLED", "0")
+
+import ujson  # noqa: E402
+
+from app.services import summarizer as S  # noqa: E402
+
+
+def similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a.split(), b.split()).ratio()
+
+
+def _per_row_mini_summaries(paras):
+    """Từng đoạn 1 lần generate, giữ cả kết quả rỗng để so theo vị trí."""
+    paras = [p for p in paras if p.strip()]
+    out = []
+    for para in paras:
+        mini_min, mini_max = S._mini_token_range(para)
+        out.append(S._generate_summary_with_range(
+            para,
+            min_new_tokens=mini_min,
+            max_new_tokens=mini_max,
+            max_source_len=min(S.MAX_SOURCE_LEN, 900),
+        ))
+    return out
+
+
+def paragraph_pairs(rows, n):
+    """(nhãn, per-row, batch) cho mini-summary của n bài dài."""
+    pairs, used = [], 0
+    for i, row in enumerate(rows):
+        art = S._prepare_article(row.get("title"), row.get("body") or "")
+        if not art or not S._need_paragraph_mode(art.total_tokens, art.num_paras):
+            continue
+        paras = S._select_paragraphs(art.cleaned_paras, min(art.num_paras, S.MAX_PARAS_SUMMARIZED))
+        paras = [p for p in paras if p.strip()]
+        if not paras:
+            continue
+        mins, maxs = zip(*(S._mini_token_range(p) for p in paras))
+        batched = S._generate_batch(
+            paras,
+            min_new_tokens=list(mins),
+            max_new_tokens=list(maxs),
+            max_source_len=min(S.MAX_SOURCE_LEN, 900),
+        )
+        for j, (a, b) in enumerate(zip(_per_row_mini_summaries(paras), batched)):
+            pairs.append((f"bài {i} đoạn {j}", a, b))
+        used += 1
+        if used >= n:
+            break
+    return pairs
+
+
+def article_pairs(rows, n):
+    """(nhãn, summarize từng bài, summarize_many cả lô) cho n bài đầu có body."""
+    sample = [(row.get("title"), row.get("body") or "") for row in rows if (row.get("body") or "").strip()][:n]
+    batched = S.summarize_many(sample)
+    return [
+        (f"bài {i}", S.summarize(title, body), b)
+        for i, ((title, body), b) in enumerate(zip(sample, batched))
+    ]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="data.jsonl", help="JSONL có trường title, body")
+    ap.add_argument("--n", type=int, default=20, help="Số bài mẫu")
+    ap.add_argument("--mode", choices=["paragraphs", "articles"], default="paragraphs")
+    ap.add_argument("--min-similarity", type=float, default=0.9,
+                    help="Độ giống tối thiểu của mỗi cặp (1.0 = bắt buộc giống hệt)")
+    args = ap.parse_args()
+
+    S._load_summarizer()
+    with open(args.data, encoding="utf-8") as f:
+        rows = [ujson.loads(line) for line in f if line.strip()]
+
+    pairs = (paragraph_pairs if args.mode == "paragraphs" else article_pairs)(rows, args.n)
+    if not pairs:
+        print("Không có mẫu phù hợp trong dữ liệu.")
+        sys.exit(1)
+
+    scores = [(similarity(a, b), label, a, b) for label, a, b in pairs]
+    exact = sum(1 for _, _, a, b in scores if a == b)
+    bad = [x for x in scores if x[0] < args.min_similarity]
+    for score, label, a, b in sorted(bad)[:10]:
+        print(f"[KHÁC] {label} (giống {score:.2f}):\n  từng hàng: {a[:200]!r}\n  batch    : {b[:200]!r}")
+    print(
+        f"=== {args.mode}: {len(pairs)} cặp, giống hệt {exact}/{len(pairs)}, "
+        f"giống thấp nhất {min(s for s, *_ in scores):.2f}, {len(bad)} cặp dưới {args.min_similarity} ==="
+    )
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
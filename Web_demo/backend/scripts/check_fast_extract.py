@@ -0,0 +1,115 @@
+"""
+Kiểm tra backend lxml (fast_extract) so với extractor BeautifulSoup (crawl_news)
+trên bộ HTML mẫu: output phải giống hệt từng trường, kèm tốc độ parse (trang/giây).
+
+Bộ mẫu là thư mục các file <loại>_<tên>.html, loại ∈ {vne, vnn, list-vnexpress,
+list-vietnamnet}. fixtures/html (có trong repo) phủ các nhánh selector chính và
+dự phòng của từng extractor; thêm trang thật bằng --fetch:
+    python -m scripts.check_fast_extract --fixtures fixtures/html --fetch 2
+Chạy kiểm tra từ thư mục Web_demo/backend (thoát mã 1 nếu có trang khác output):
+    python -m scripts.check_fast_extract --repeat 5
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from app.services import crawl_news, fast_extract
+
+FIELDS = ("title", "lead", "body", "published_at")
+SITE_PREFIX = {"vnexpress": "vne", "vietnamnet": "vnn"}
+
+
+def fetch_fixtures(out_dir: Path, pages_per_site: int, per_page: int) -> None:
+    """Lưu trang danh mục + vài bài mỗi (site, subject) đầu tiên làm bộ mẫu."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for site, prefix in SITE_PREFIX.items():
+        subjects = [s for s in crawl_news.CANON if site in crawl_news.PATTERNS.get(s, {})]
+        for subject in subjects[:pages_per_site]:
+            url = crawl_news.build_list_url(crawl_news.PATTERNS[subject][site], 1)
+            html = crawl_news.fetch(url)
+            if not html:
+                continue
+            (out_dir / f"list-{site}_{subject}.html").write_text(html, encoding="utf-8")
+            pairs = crawl_news.extract_pairs(html, crawl_news.LIST_SELECTORS[site])
+            for i, (_, href) in enumerate(pairs[:per_page]):
+                art = href if href.startswith("http") else urljoin(crawl_news.base_from(url), href)
+                ahtml = crawl_news.fetch(art)
+                if ahtml:
+                    (out_dir / f"{prefix}_{subject}-{i}.html").write_text(ahtml, encoding="utf-8")
+    print(f"Đã lưu bộ mẫu vào {out_dir}")
+
+
+def load_fixtures(fixture_dir: Path):
+    out = []
+    for path in sorted(fixture_dir.glob("*.html")):
+        kind = path.stem.split("_", 1)[0]
+        out.append((kind, path.name, path.read_text(encoding="utf-8")))
+    return out
+
+
+def runners(kind):
+    """(hàm BeautifulSoup, hàm lxml) cho 1 loại trang."""
+    if kind == "vne":
+        return crawl_news.extract_article_vne, fast_extract.extract_article_vne
+    if kind == "vnn":
+        return crawl_news.extract_article_vnn, fast_extract.extract_article_vnn
+    if kind.startswith("list-"):
+        sels = crawl_news.LIST_SELECTORS[kind[len("list-"):]]
+        return (
+            lambda html: crawl_news.extract_pairs(html, sels),
+            lambda html: fast_extract.extract_pairs(html, sels),
+        )
+    return None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default="fixtures/html")
+    ap.add_argument("--fetch", type=int, default=0, help="Tải N subject/site làm bộ mẫu trước khi kiểm tra")
+    ap.add_argument("--per-page", type=int, default=3)
+    ap.add_argument("--repeat", type=int, default=3, help="Số vòng lặp khi đo tốc độ")
+    args = ap.parse_args()
+
+    fixture_dir = Path(args.fixtures)
+    if args.fetch:
+        fetch_fixtures(fixture_dir, args.fetch, args.per_page)
+
+    fixtures = [(k, n, h) for k, n, h in load_fixtures(fixture_dir) if runners(k)]
+    if not fixtures:
+        print(f"Không có file mẫu trong {fixture_dir}")
+        sys.exit(1)
+
+    # 1) Output giống hệt
+    mismatches = 0
+    for kind, name, html in fixtures:
+        slow, fast = runners(kind)
+        a, b = slow(html), fast(html)
+        if a == b:
+            continue
+        mismatches += 1
+        if kind.startswith("list-"):
+            print(f"[KHÁC] {name}: {len(a)} link (bs4) vs {len(b)} link (lxml)")
+            continue
+        for field, x, y in zip(FIELDS, a, b):
+            if x != y:
+                print(f"[KHÁC] {name}.{field}:\n  bs4 : {x[:160]!r}\n  lxml: {y[:160]!r}")
+    print(f"=== {len(fixtures)} trang mẫu, {mismatches} trang khác output ===")
+
+    # 2) Tốc độ parse
+    for label, pick in (("BeautifulSoup", 0), ("lxml        ", 1)):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for kind, _, html in fixtures:
+                runners(kind)[pick](html)
+        secs = time.perf_counter() - t0
+        n = len(fixtures) * args.repeat
+        print(f"{label}: {n / max(secs, 1e-9):8.1f} trang/s ({secs:.2f}s cho {n} lần parse)")
+
+    # Dùng làm cổng hồi quy: khác output → mã thoát 1
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Kiểm tra host_control (AIMD, retry, circuit breaker) với server HTTP giả lập
+chạy cục bộ, mỗi "host" là 1 cổng riêng:
+  - flaky : trả 503 / 429 (kèm Retry-After) ngẫu nhiên, còn lại 200
+  - slow  : luôn chậm --slow-delay giây → concurrency phải giảm
+  - dead  : luôn 500 → circuit breaker phải mở, phần lớn request bị chặn
+Chạy từ thư mục Web_demo/backend:
+    python -m scripts.check_host_control --requests 40
+    python -m scripts.check_host_control --engine sync --requests 20
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Hằng số của host_control đọc lúc import → đặt trước khi import app.*
+os.environ.setdefault("HTTP_CACHE_ENABLED", "0")
+os.environ.setdefault("CRAWL_BACKOFF_BASE", "0.05")
+os.environ.setdefault("CRAWL_BACKOFF_CAP", "0.5")
+os.environ.setdefault("CRAWL_LATENCY_TARGET", "0.3")
+os.environ.setdefault("CRAWL_CB_COOLDOWN", "2")
+os.environ.setdefault("CRAWL_HOST_MAX_RPS", "200")
+
+from app.services.host_control import HOST_CONCURRENCY, host_stats  # noqa: E402
+
+BODY = ("<html><body><h1>Tin</h1>" + "<p>Nội dung bài viết giả lập.</p>" * 50 + "</body></html>").encode("utf-8")
+
+
+def make_handler(mode: str, error_rate: float, slow_delay: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, headers = 200, {}
+            if mode == "dead":
+                status = 500
+            elif mode == "slow":
+                time.sleep(slow_delay)
+            elif mode == "flaky":
+                x = random.random()
+                if x < error_rate / 2:
+                    status = 503
+                elif x < error_rate:
+                    status, headers = 429, {"Retry-After": "0.2"}
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            body = BODY if status == 200 else b"error"
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_servers(error_rate: float, slow_delay: float) -> dict:
+    bases = {}
+    for mode in ("flaky", "slow", "dead"):
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(mode, error_rate, slow_delay))
+        srv.daemon_threads = True
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        bases[mode] = f"http://127.0.0.1:{srv.server_address[1]}"
+    return bases
+
+
+def run_async(urls):
+    import asyncio
+    from app.services.async_crawler import AsyncCrawler
+
+    async def go():
+        async with AsyncCrawler() as crawler:
+            return await asyncio.gather(*(crawler.fetch(u) for u in urls))
+
+    return asyncio.run(go())
+
+
+def run_sync(urls):
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services import crawl_news
+
+    with ThreadPoolExecutor(max_workers=3) as ex:  # 1 luồng / host, như crawl tuần tự
+        by_host = {}
+        for u in urls:
+            by_host.setdefault(u.split("/")[2], []).append(u)
+        futs = [ex.submit(lambda us: {u: crawl_news.fetch(u) for u in us}, us) for us in by_host.values()]
+        got = {u: r for f in futs for u, r in f.result().items()}
+    return [got[u] for u in urls]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--engine", choices=["async", "sync"], default="async")
+    ap.add_argument("--requests", type=int, default=40, help="Số URL mỗi host")
+    ap.add_argument("--error-rate", type=float, default=0.15, help="Tỉ lệ 503/429 của host flaky")
+    ap.add_argument("--slow-delay", type=float, default=0.6)
+    args = ap.parse_args()
+
+    bases = start_servers(args.error_rate, args.slow_delay)
+    urls = [f"{base}/bai-{i}.html" for i in range(args.requests) for base in bases.values()]
+
+    t0 = time.perf_counter()
+    results = run_async(urls) if args.engine == "async" else run_sync(urls)
+    secs = time.perf_counter() - t0
+
+    stats = host_stats()
+    ok_by_host = {}
+    for u, html in zip(urls, results):
+        host = u.split("/")[2]
+        ok_by_host[host] = ok_by_host.get(host, 0) + (1 if html else 0)
+
+    print(f"=== {len(urls)} URL, engine={args.engine}, {secs:.1f}s ===")
+    for mode, base in bases.items():
+        host = base.split("/")[2]
+        s = stats.get(host, {})
+        print(
+            f"{mode:6s} ok {ok_by_host.get(host, 0):3d}/{args.requests} | request {s.get('requests')} "
+            f"retry {s.get('retries')} chặn {s.get('rejected_by_breaker')} | status {s.get('status')} | "
+            f"latency {s.get('latency_ms')}ms limit {s.get('concurrency_limit')} "
+            f"interval {s.get('interval_s')}s | circuit {s.get('circuit')} (mở {s.get('circuit_trips')} lần)"
+        )
+
+    def host(mode):
+        return stats.get(bases[mode].split("/")[2], {})
+
+    checks = [
+        ("flaky: có retry", host("flaky").get("retries", 0) > 0),
+        ("flaky: >= 90% URL lấy được nhờ retry",
+         ok_by_host.get(bases["flaky"].split("/")[2], 0) >= 0.9 * args.requests),
+        ("slow: concurrency giảm dưới mức ban đầu",
+         args.engine == "sync" or host("slow").get("concurrency_limit", HOST_CONCURRENCY) < HOST_CONCURRENCY),
+        ("dead: circuit breaker đã mở", host("dead").get("circuit_trips", 0) > 0),
+        ("dead: phần lớn URL bị chặn, không gửi request",
+         host("dead").get("rejected_by_breaker", 0) > args.requests / 2),
+    ]
+    for name, passed in checks:
+        print(f"[{'OK' if passed else 'LỖI'}] {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Kiểm tra schema + kế hoạch truy vấn (chạy như test hồi quy, thoát mã 1 nếu có lỗi):
+
+1. Migration: dựng news.db kiểu cũ (chưa có created_date, chưa có index NLP,
+   NLP trùng (article_id, model_version)), chạy migrate() → kiểm tra dữ liệu
+   được giữ / dọn đúng, index có đủ, daily_stats khớp bảng gốc, chạy lại lần 2
+   không làm gì.
+2. EXPLAIN QUERY PLAN của các query nóng (/by_date, /available_dates, bản NLP
+   mới nhất): phải dùng đúng index, không quét cả bảng, không sort tạm.
+
+Chạy trong thư mục tạm (không đụng DB thật), từ Web_demo/backend:
+    python -m scripts.check_query_plans --rows 2000
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+# news.db tương đối theo thư mục hiện tại → chuyển sang thư mục tạm trước khi import app.*
+os.chdir(tempfile.mkdtemp(prefix="check_query_plans_"))
+os.environ["DATABASE_URL"] = "sqlite:///./news.db"
+
+from sqlalchemy import func, inspect, text  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.migrations import LATEST_VERSION, current_version, migrate  # noqa: E402
+from app.models.news import DailyStat, NewsNLP  # noqa: E402
+from app.routers.news import BY_DATE_FIELDS, _available_dates_query, _by_date_query  # noqa: E402
+from app.services import daily_stats  # noqa: E402
+
+# Schema news.db trước khi có migration (bảng đã tạo bởi create_all các bản cũ)
+LEGACY_SCHEMA = [
+    """CREATE TABLE news_article (
+        id INTEGER PRIMARY KEY, url VARCHAR(500) NOT NULL UNIQUE, source VARCHAR(50) NOT NULL,
+        title TEXT NOT NULL, body TEXT NOT NULL, published_at VARCHAR(100),
+        created_at DATETIME, updated_at DATETIME)""",
+    "CREATE INDEX ix_news_article_created_at ON news_article (created_at)",
+    "CREATE INDEX ix_news_article_source ON news_article (source)",
+    "CREATE INDEX idx_source_created ON news_article (source, created_at)",
+    """CREATE TABLE news_nlp (
+        id INTEGER PRIMARY KEY, article_id INTEGER NOT NULL REFERENCES news_article (id),
+        summary TEXT NOT NULL, category VARCHAR(100), model_version VARCHAR(50), created_at DATETIME)""",
+    "CREATE INDEX ix_news_nlp_category ON news_nlp (category)",
+]
+
+failures = []
+
+
+def check(ok: bool, label: str) -> None:
+    print(f"  [{'OK' if ok else 'LỖI'}] {label}")
+    if not ok:
+        failures.append(label)
+
+
+def seed_legacy(rows: int) -> datetime:
+    base = datetime(2025, 1, 1, 6, 0, 0)
+    with engine.begin() as conn:
+        for ddl in LEGACY_SCHEMA:
+            conn.execute(text(ddl))
+        articles, nlp = [], []
+        for i in range(1, rows + 1):
+            created = base + timedelta(minutes=17 * i)
+            articles.append({
+                "id": i, "url": f"https://example.vn/bai-{i}.html", "source": "vnexpress",
+                "title": f"Bài {i}", "body": "nội dung", "created_at": created, "updated_at": created,
+            })
+            nlp.append({"a": i, "s": f"tóm tắt {i}", "v": "v1", "t": created})
+            if i % 10 == 0:  # bản trùng cùng model_version (mới hơn)
+                nlp.append({"a": i, "s": f"tóm tắt mới {i}", "v": "v1", "t": created + timedelta(hours=1)})
+            if i % 25 == 0:  # model_version NULL (bản rất cũ)
+                nlp.append({"a": i, "s": f"tóm tắt null {i}", "v": None, "t": created})
+        conn.execute(
+            text("INSERT INTO news_article (id, url, source, title, body, created_at, updated_at) "
+                 "VALUES (:id, :url, :source, :title, :body, :created_at, :updated_at)"),
+            articles,
+        )
+        conn.execute(
+            text("INSERT INTO news_nlp (article_id, summary, model_version, created_at) VALUES (:a, :s, :v, :t)"),
+            nlp,
+        )
+    return base
+
+
+def check_migration(rows: int) -> date:
+    print("== Migration news.db kiểu cũ ==")
+    base = seed_legacy(rows)
+    applied = migrate(engine)
+    check(applied == list(range(1, LATEST_VERSION + 1)), f"chạy đủ migration 1..{LATEST_VERSION} (đã chạy {applied})")
+    check(current_version(engine) == LATEST_VERSION, "schema_migrations ghi version mới nhất")
+    check(migrate(engine) == [], "chạy lại lần 2 không làm gì")
+
+    insp = inspect(engine)
+    nlp_indexes = {ix["name"]: ix for ix in insp.get_indexes("news_nlp")}
+    art_indexes = {ix["name"] for ix in insp.get_indexes("news_article")}
+    check("quality" in {c["name"] for c in insp.get_columns("news_nlp")}, "news_nlp có cột quality")
+    check("idx_nlp_article_created" in nlp_indexes, "có idx_nlp_article_created")
+    check(bool(nlp_indexes.get("uq_nlp_article_version", {}).get("unique")), "có unique uq_nlp_article_version")
+    check("idx_article_created_date" in art_indexes, "có idx_article_created_date")
+
+    with engine.connect() as conn:
+        n_articles = conn.execute(text("SELECT COUNT(*) FROM news_article")).scalar()
+        dup = conn.execute(text(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM news_nlp GROUP BY article_id, model_version HAVING COUNT(*) > 1)"
+        )).scalar()
+        kept = conn.execute(text("SELECT summary FROM news_nlp WHERE article_id = 10")).scalars().all()
+        nulls = conn.execute(text("SELECT COUNT(*) FROM news_nlp WHERE model_version IS NULL")).scalar()
+        mismatched = conn.execute(text(
+            "SELECT COUNT(*) FROM news_article WHERE created_date IS NULL OR created_date != date(created_at)"
+        )).scalar()
+    check(n_articles == rows, f"giữ đủ {rows} bài")
+    check(dup == 0 and nulls == 0, "không còn NLP trùng / model_version NULL")
+    check(kept == ["tóm tắt mới 10"], f"giữ bản NLP mới nhất khi trùng (còn {kept})")
+    check(mismatched == 0, "created_date = date(created_at) cho mọi bài")
+
+    db = SessionLocal()
+    try:
+        total = db.query(func.sum(DailyStat.count)).scalar()
+        check(total == rows, f"daily_stats đếm đủ {rows} bài (đếm được {total})")
+        check(daily_stats.check(db) == [], "daily_stats khớp số đếm lại từ bảng gốc")
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return (base + timedelta(days=1)).date()
+
+
+def explain(query) -> list:
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+
+
+def check_plan(label: str, query, must_use: list) -> None:
+    plan = explain(query)
+    print(f"== {label} ==")
+    for line in plan:
+        print(f"     {line}")
+    for index in must_use:
+        check(any(index in line for line in plan), f"dùng {index}")
+    full_scans = [line for line in plan if re.match(r"SCAN \w+$", line)]
+    check(not full_scans, f"không quét cả bảng {full_scans or ''}")
+    temp_sorts = [line for line in plan if "TEMP B-TREE" in line]
+    check(not temp_sorts, f"không sort tạm {temp_sorts or ''}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2000, help="Số bài seed")
+    args = ap.parse_args()
+
+    day = check_migration(args.rows)
+
+    db = SessionLocal()
+    try:
+        fields = list(BY_DATE_FIELDS)
+        check_plan("/by_date trang đầu", _by_date_query(db, day, fields),
+                   ["idx_article_created_date", "idx_nlp_article_created"])
+        cursor = (datetime.combine(day, datetime.min.time()) + timedelta(hours=12), 10**9)
+        check_plan("/by_date trang sau (cursor)", _by_date_query(db, day, fields, cursor),
+                   ["idx_article_created_date", "idx_nlp_article_created"])
+        # Khoá chính (date, source, category) của daily_stats
+        check_plan("/available_dates", _available_dates_query(db), ["sqlite_autoindex_daily_stats_1"])
+        check_plan(
+            "Bản NLP theo (article_id, model_version)",
+            db.query(NewsNLP.id).filter(NewsNLP.article_id == 1, NewsNLP.model_version == "v1"),
+            ["uq_nlp_article_version"],
+        )
+    finally:
+        db.close()
+
+    print(f"\n{'Tất cả OK' if not failures else f'{len(failures)} kiểm tra LỖI'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
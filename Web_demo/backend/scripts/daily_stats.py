@@ -0,0 +1,48 @@
+"""
+Bảo trì bảng daily_stats (số bài theo ngày / nguồn / category) của news.db.
+
+Từ Web_demo/backend (dùng DATABASE_URL như app):
+    python -m scripts.daily_stats check            # so với số đếm lại từ bảng gốc
+    python -m scripts.daily_stats rebuild          # dựng lại toàn bộ (khôi phục)
+    python -m scripts.daily_stats check --repair   # lệch thì rebuild
+check thoát mã 1 khi có lệch (dùng được trong cron / CI).
+"""
+import argparse
+import sys
+
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.services import daily_stats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("command", choices=["check", "rebuild"])
+    ap.add_argument("--repair", action="store_true", help="check: lệch thì rebuild")
+    ap.add_argument("--show", type=int, default=20, help="check: số khoá lệch in ra")
+    args = ap.parse_args()
+
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"Đã dựng lại daily_stats: {daily_stats.rebuild(db)} dòng")
+            return
+
+        diffs = daily_stats.check(db)
+        if not diffs:
+            print("daily_stats khớp bảng gốc")
+            return
+        print(f"{len(diffs)} khoá lệch (date, source, category: expected / actual):")
+        for d in diffs[: args.show]:
+            print(f"  {d['date']} {d['source']} {d['category'] or '-'}: {d['expected']} / {d['actual']}")
+        if args.repair:
+            print(f"Đã dựng lại daily_stats: {daily_stats.rebuild(db)} dòng")
+            return
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Export ViT5 sang ONNX Runtime (encoder + decoder có KV-cache), rồi kiểm tra
+các engine CPU (torch fp32 / torch_int8 / onnx) trên cùng tập bài:
+thời gian mỗi bài, speedup và độ lệch ROUGE so với output fp32.
+
+Chạy từ thư mục Web_demo/backend:
+    python -m scripts.export_onnx --data data.jsonl --n 30
+    python -m scripts.export_onnx --skip-export --engines torch,torch_int8
+Sau khi kiểm tra, bật engine bằng biến môi trường SUMMARIZER_ENGINE=onnx.
+"""
+import argparse
+import statistics
+import time
+
+import ujson
+
+from app.services import summarizer as S
+
+
+def export(out_dir):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer
+
+    print(f"Export {S.SUMMARIZER_DIR} → {out_dir} ...")
+    t0 = time.perf_counter()
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        S.SUMMARIZER_DIR,
+        export=True,
+        use_cache=True,
+        local_files_only=True,
+    )
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(S.SUMMARIZER_DIR, local_files_only=True, use_fast=False).save_pretrained(out_dir)
+    print(f"Export xong sau {time.perf_counter() - t0:.1f}s")
+
+
+def load_articles(path, n):
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = ujson.loads(line)
+            art = S._prepare_article(row.get("title"), row.get("body") or "")
+            if art:
+                out.append(art)
+            if len(out) >= n:
+                break
+    return out
+
+
+def run_engine(engine, articles):
+    S._model = S._load_model(engine)
+    S._summarize_prepared(articles[0])  # warm-up
+
+    outputs, times = [], []
+    for art in articles:
+        t0 = time.perf_counter()
+        outputs.append(S._summarize_prepared(art))
+        times.append(time.perf_counter() - t0)
+    return outputs, times
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="data.jsonl", help="JSONL có trường title, body")
+    ap.add_argument("--n", type=int, default=30)
+    ap.add_argument("--out", default=str(S.SUMMARIZER_ONNX_DIR))
+    ap.add_argument("--skip-export", action="store_true")
+    ap.add_argument("--engines", default=",".join(S.ENGINES))
+    args = ap.parse_args()
+
+    if not args.skip_export:
+        export(args.out)
+    S.SUMMARIZER_ONNX_DIR = S.Path(args.out)
+
+    S._load_summarizer()
+    articles = load_articles(args.data, args.n)
+    if not articles:
+        print("Không có bài nào để kiểm tra.")
+        return
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    if "torch" not in engines:
+        engines.insert(0, "torch")  # fp32 là mốc so sánh
+
+    results = {}
+    for engine in engines:
+        print(f"--- {engine} ---")
+        results[engine] = run_engine(engine, articles)
+
+    import evaluate
+    rouge = evaluate.load("rouge")
+
+    ref_out, ref_times = results["torch"]
+    ref_mean = statistics.mean(ref_times)
+    print(f"\n=== {len(articles)} bài, mốc: torch fp32 ({ref_mean:.2f}s/bài) ===")
+    for engine, (out, times) in results.items():
+        mean_t = statistics.mean(times)
+        scores = rouge.compute(predictions=out, references=ref_out, use_stemmer=False)
+        same = sum(int(a == b) for a, b in zip(out, ref_out))
+        print(
+            f"{engine:<11} {mean_t:.2f}s/bài | speedup x{ref_mean / max(mean_t, 1e-9):.2f} | "
+            f"ROUGE-1 {scores['rouge1'] * 100:.2f} | ROUGE-L {scores['rougeL'] * 100:.2f} | "
+            f"giống hệt {same}/{len(out)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
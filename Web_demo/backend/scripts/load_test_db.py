@@ -0,0 +1,168 @@
+"""
+Tải thử DB với người đọc và người ghi chạy đồng thời: so sánh SQLite mặc định
+(SQLITE_TUNED=0) với WAL + pragma (SQLITE_TUNED=1).
+
+Mỗi cấu hình chạy trong 1 process con riêng (engine đọc biến môi trường lúc import),
+trên news.db tạm đã seed sẵn:
+  - --writers thread ghi lô mới bằng persist_batch
+  - --readers thread gọi /by_date (get_news_by_date) liên tục
+Báo p50/p95/p99 độ trễ đọc, số lỗi "database is locked" và thông lượng ghi.
+
+Từ Web_demo/backend:
+    python -m scripts.load_test_db --seed 5000 --readers 8 --writers 1 --seconds 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+PROFILES = {"mặc định": "0", "WAL + pragma": "1"}
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def child(args):
+    """Chạy trong process con: cwd là thư mục tạm, SQLITE_TUNED đã đặt."""
+    from app.database import SessionLocal, engine
+    from app.migrations import migrate
+    from app.routers import news
+    from app.services.persistence import ProcessedArticle, persist_batch
+
+    day = datetime.utcnow().date().isoformat()  # persist_batch ghi created_date = ngày hiện tại
+
+    def records(start, n):
+        return [
+            ProcessedArticle(
+                url=f"https://example.vn/bai-{i}.html",
+                source="vnexpress" if i % 2 else "vietnamnet",
+                title=f"Bài số {i}",
+                body=f"Nội dung bài {i} " * 200,
+                published_at=day,
+                summary=f"Tóm tắt bài {i}",
+                category="Thời sự",
+                quality="best",
+                model_version="v1",
+            )
+            for i in range(start, start + n)
+        ]
+
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        for start in range(0, args.seed, 200):
+            persist_batch(db, records(start, min(200, args.seed - start)))
+    finally:
+        db.close()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies, errors, written = [], [], [0]
+    next_id = [args.seed]
+
+    def reader():
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                t0 = time.perf_counter()
+                resp = news.get_news_by_date(
+                    date=day, cursor=None, limit=args.page, fields="title,summary,category", format="json", db=db
+                )
+                _ = resp.body
+                dt = time.perf_counter() - t0
+                with lock:
+                    latencies.append(dt)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+            finally:
+                db.close()
+
+    def writer():
+        while not stop.is_set():
+            with lock:
+                start = next_id[0]
+                next_id[0] += args.batch
+            db = SessionLocal()
+            try:
+                persist_batch(db, records(start, args.batch))
+                with lock:
+                    written[0] += args.batch
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(json.dumps({
+        "reads": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "writes_per_s": written[0] / args.seconds,
+        "errors": len(errors),
+        "error_types": sorted(set(errors)),
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed", type=int, default=5000, help="Số bài seed trước khi đo")
+    ap.add_argument("--readers", type=int, default=8)
+    ap.add_argument("--writers", type=int, default=1)
+    ap.add_argument("--batch", type=int, default=20, help="Số bài / lô ghi")
+    ap.add_argument("--page", type=int, default=100, help="limit của /by_date")
+    ap.add_argument("--seconds", type=float, default=20)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    print(f"=== {args.readers} đọc + {args.writers} ghi, {args.seconds:.0f}s, seed {args.seed} bài ===")
+    for label, tuned in PROFILES.items():
+        workdir = tempfile.mkdtemp(prefix="load_test_db_")
+        env = dict(
+            os.environ,
+            SQLITE_TUNED=tuned,
+            DATABASE_URL="sqlite:///./news.db",
+            NEAR_DUP_ENABLED="0",
+            PYTHONPATH=backend_dir + os.pathsep + os.environ.get("PYTHONPATH", ""),
+        )
+        cmd = [sys.executable, "-m", "scripts.load_test_db", "--child"] + [
+            f"--{k}={v}" for k, v in vars(args).items() if k != "child"
+        ]
+        out = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            print(f"{label}: lỗi\n{out.stderr[-2000:]}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{label:14s}: đọc p50 {r['p50'] * 1000:7.1f}ms  p95 {r['p95'] * 1000:7.1f}ms  "
+            f"p99 {r['p99'] * 1000:7.1f}ms  ({r['reads']} lượt)  ghi {r['writes_per_s']:7.1f} bài/s  "
+            f"lỗi {r['errors']} {' '.join(r['error_types'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ import { http } from "../api/http";
 import { Link } from "react-router-dom";
 import type { CrawledNews } from "../types/news";
 
+const HISTORY_FIELDS = "title,summary,category,source,url,published_at";
+
 interface HistoryViewProps {
   isDarkMode?: boolean;
   onToggleTheme?: () => void;
@@ -87,10 +89,21 @@ const HistoryView: React.FC<HistoryViewProps> = ({
     try {
       setIsLoading(true);
       setError(null);
-      const res = await http.get<CrawledNews[]>(
-        `/api/v1/news/by_date?date=${selectedDate}`
-      );
-      setNews(res.data);
+      // Chỉ lấy các trường feed hiển thị (không body), đi hết các trang theo X-Next-Cursor
+      const all: CrawledNews[] = [];
+      let cursor: string | null = null;
+      do {
+        const res = await http.get<CrawledNews[]>("/api/v1/news/by_date", {
+          params: {
+            date: selectedDate,
+            fields: HISTORY_FIELDS,
+            ...(cursor ? { cursor } : {}),
+          },
+        });
+        all.push(...res.data);
+        cursor = (res.headers["x-next-cursor"] as string | undefined) ?? null;
+      } while (cursor);
+      setNews(all);
     } catch (err: any) {
       console.error(err);
       setError("Không tải được tin tức.");
@@ -271,7 +284,7 @@ const HistoryView: React.FC<HistoryViewProps> = ({
                 lineHeight: 1.5,
               }}
             >
-              {item.summary || item.body.slice(0, 260).trim() + "..."}
+              {item.summary || (item.body ?? "").slice(0, 260).trim() + "..."}
             </p>
 
             <p
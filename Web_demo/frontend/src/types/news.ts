@@ -9,6 +9,8 @@ export interface CrawledNews {
 
   summary: string;
   category: string;  // Category từ URL
+  quality?: "fast" | "balanced" | "best" | null;  // Mức chất lượng tóm tắt
+  seq?: number | null;  // Thứ tự crawl (endpoint stream trả theo thứ tự hoàn thành)
 }
 
 export interface PreviewRequest {
@@ -1,29 +1,10 @@
-import re, csv, time, ujson, argparse, hashlib, json
-from urllib.parse import urljoin, urlsplit
-import requests
+import re, csv, ujson, argparse, hashlib, json, sys, os, sqlite3, asyncio
+from pathlib import Path
 from bs4 import BeautifulSoup
 from dateutil import parser as dtparse
 
-# --------- HTTP ----------
-HEADERS = {
-    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                   "AppleWebKit/537.36 (KHTML, like Gecko) "
-                   "Chrome/120.0.0.0 Safari/537.36"),
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "vi,vi-VN;q=0.9,en-US;q=0.8,en;q=0.7",
-    "Connection": "keep-alive",
-}
-TIMEOUT, SLEEP = 15, 0.7
-SESSION = requests.Session()
-
-def fetch(url):
-    try:
-        r = SESSION.get(url, headers=HEADERS, timeout=TIMEOUT)
-        if r.status_code == 200 and r.text:
-            return r.text
-    except requests.RequestException:
-        pass
-    return None
+# Cho phép import engine crawl async từ Web_demo/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "Web_demo" / "backend"))
 
 # --------- Nhãn chuẩn ----------
 CANON = {
@@ -104,13 +85,6 @@ LIST_SELECTORS = {
 }
 
 # --------- Utils ----------
-def base_from(any_url):
-    sp = urlsplit(any_url)
-    return f"{sp.scheme}://{sp.netloc}"
-
-def build_list_url(pattern, page: int) -> str:
-    return pattern.format(page=page)
-
 def norm(s: str) -> str:
     s = (s or "").strip()
     s = re.sub(r"\s+", " ", s)
@@ -141,22 +115,8 @@ def write_csv(path, rows):
         w.writeheader()
         for r in rows: w.writerow(r)
 
-def extract_pairs(html, selectors):
-    soup = BeautifulSoup(html, "lxml")
-    seen, out = set(), []
-    for sel, mode in selectors:
-        for a in soup.select(sel):
-            href = a.get("href")
-            if not href: continue
-            t = a.get(mode) if mode in ("title","aria-label") else a.get_text(" ")
-            t = norm(t)
-            if not t: continue
-            key = (t, href)
-            if key in seen: continue
-            seen.add(key); out.append((t, href))
-    return out
-
 # --------- Extractors ----------
+
 def extract_article_vne(html):
     s = BeautifulSoup(html,"lxml")
     # title
@@ -290,64 +250,129 @@ def extract_article_vnn(html):
 
     return title or "", lead or "", body or "", pub or ""
 
-# --------- Crawl 1 subject x 1 site ----------
-def crawl_subject(site, subject_slug, pattern, list_selectors, pages,
-                  seen_title, seen_bhash):
-    subject_display = CANON[subject_slug]
-    results = []
-
-    for page in range(1, pages+1):
-        url = build_list_url(pattern, page)
-        html = fetch(url)
-        if not html:
-            print(f"[{site}:{subject_slug}] page {page}: lỗi tải"); time.sleep(SLEEP); continue
-
-        pairs = extract_pairs(html, list_selectors)
-        if not pairs:
-            print(f"[{site}:{subject_slug}] page {page}: 0 link → dừng")
-            break
-
-        base = base_from(url)
-        added = 0
-        for _, href in pairs:
-            art = href if href.startswith("http") else urljoin(base, href)
-            ahtml = fetch(art)
-            if not ahtml: continue
-
-            if site == "vnexpress":
-                t,l,b,pub = extract_article_vne(ahtml)
-            else:
-                t,l,b,pub = extract_article_vnn(ahtml)
-
-            if not t or not b or len(b) < 200:
-                continue
-
-            tkey = norm(t).lower()
-            bkey = sha1(norm(b))
-            if tkey in seen_title or bkey in seen_bhash:
-                continue
-
-            seen_title.add(tkey); seen_bhash.add(bkey)
-            results.append({
-                "title": t,
-                "lead": l or "",
-                "body": b,
-                "url": art,
-                "subject": subject_display,
-                "published_at": pub or "",
-                "source": site,
-                "original_subject": subject_display,
-            })
-            added += 1
-            time.sleep(SLEEP/2)
-
-        print(f"[{site}:{subject_slug}] page {page}: +{added} (subj total {len(results)})")
-        time.sleep(SLEEP)
-        if added == 0:
-            print(f"[{site}:{subject_slug}] page {page}: không thêm mới → dừng")
-            break
-
-    return results
+# --------- Checkpoint (resume) ----------
+class Checkpoint:
+    """
+    Checkpoint SQLite cho crawl dataset:
+      - trang (site, subject, page) đã xong và cặp đã dừng (luật "không thêm mới")
+      - trang tải lỗi (failed_pages) → lần chạy sau crawl lại, xoá khi trang đó xong
+      - khoá dedup title / hash body (trên đĩa → RAM không tăng theo corpus)
+      - offset JSONL đã ghi chắc chắn (commit cùng lúc với trang)
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                site TEXT, subject TEXT, page INTEGER, rows INTEGER,
+                PRIMARY KEY (site, subject, page)
+            );
+            CREATE TABLE IF NOT EXISTS failed_pages (
+                site TEXT, subject TEXT, page INTEGER,
+                PRIMARY KEY (site, subject, page)
+            );
+            CREATE TABLE IF NOT EXISTS pairs_done (
+                site TEXT, subject TEXT, PRIMARY KEY (site, subject)
+            );
+            CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);
+        """)
+        self.conn.commit()
+
+    def next_page(self, site, subject):
+        """Trang sau trang lớn nhất đã đi qua (xong hoặc lỗi); trang lỗi lấy qua failed()."""
+        row = self.conn.execute(
+            "SELECT MAX(page) FROM ("
+            " SELECT page FROM pages WHERE site = ? AND subject = ?"
+            " UNION ALL SELECT page FROM failed_pages WHERE site = ? AND subject = ?)",
+            (site, subject, site, subject),
+        ).fetchone()
+        return (row[0] or 0) + 1
+
+    def failed(self, site, subject):
+        return [p for (p,) in self.conn.execute(
+            "SELECT page FROM failed_pages WHERE site = ? AND subject = ? ORDER BY page",
+            (site, subject),
+        )]
+
+    def record_failed(self, site, subject, page):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO failed_pages (site, subject, page) VALUES (?, ?, ?)",
+                (site, subject, page),
+            )
+
+    def pair_done(self, site, subject):
+        return self.conn.execute(
+            "SELECT 1 FROM pairs_done WHERE site = ? AND subject = ?", (site, subject)
+        ).fetchone() is not None
+
+    def has_seen(self, key):
+        return self.conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None
+
+    def jsonl_offset(self):
+        """Offset đã commit; None nếu checkpoint chưa ghi trang nào."""
+        row = self.conn.execute("SELECT v FROM meta WHERE k = 'jsonl_offset'").fetchone()
+        return int(row[0]) if row else None
+
+    def total_rows(self):
+        return self.conn.execute("SELECT COALESCE(SUM(rows), 0) FROM pages").fetchone()[0]
+
+    def failed_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM failed_pages").fetchone()[0]
+
+    def commit_page(self, site, subject, page, keys, n_rows, stop, offset):
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO seen (key) VALUES (?)", [(k,) for k in keys])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (site, subject, page, rows) VALUES (?, ?, ?, ?)",
+                (site, subject, page, n_rows),
+            )
+            self.conn.execute(
+                "DELETE FROM failed_pages WHERE site = ? AND subject = ? AND page = ?",
+                (site, subject, page),
+            )
+            if stop:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO pairs_done (site, subject) VALUES (?, ?)", (site, subject)
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (k, v) VALUES ('jsonl_offset', ?)", (str(offset),)
+            )
+
+
+class SeenKeys:
+    """
+    Tập khoá dedup kiểu set: khoá đã commit nằm trong SQLite, khoá của các trang
+    đang xử lý nằm trong RAM (mất khi crash → trang đó được crawl lại).
+    """
+    def __init__(self, ck, prefix):
+        self.ck, self.prefix, self.pending = ck, prefix, set()
+
+    def __contains__(self, key):
+        return key in self.pending or self.ck.has_seen(self.prefix + key)
+
+    def add(self, key):
+        self.pending.add(key)
+
+
+def row_keys(r):
+    return norm(r["title"]).lower(), sha1(norm(r["body"]))
+
+
+def write_csv_from_jsonl(jsonl_path, csv_path):
+    """Chuyển JSONL → CSV theo từng dòng (không nạp cả file vào RAM)."""
+    n = 0
+    with open(jsonl_path, encoding="utf-8") as src, \
+         open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=[
+            "title","lead","body","url","subject","published_at","source","original_subject"
+        ])
+        w.writeheader()
+        for line in src:
+            if line.strip():
+                w.writerow(ujson.loads(line)); n += 1
+    return n
+
 
 # --------- Main ----------
 def main():
@@ -355,27 +380,116 @@ def main():
     ap.add_argument("--out_jsonl", default="data.jsonl")
     ap.add_argument("--out_csv",   default="data.csv")
     ap.add_argument("--pages_per_cat", type=int, default=20)
+    ap.add_argument("--checkpoint", default="crawl_checkpoint.db")
+    ap.add_argument("--fresh", action="store_true", help="Bỏ checkpoint + JSONL cũ, crawl lại từ đầu")
+    ap.add_argument("--parallel", type=int, default=6, help="Số cặp (site, subject) chạy song song")
+    ap.add_argument("--host_concurrency", type=int, default=4, help="Request đồng thời tối đa / host")
+    ap.add_argument("--host_rps", type=float, default=3.0, help="Request / giây tối đa / host")
+    ap.add_argument("--http_cache", action="store_true",
+                    help="Bật cache HTTP trên đĩa của backend (HTTP_CACHE_PATH, mặc định tắt cho dataset)")
     args = ap.parse_args()
 
-    all_rows, seen_title, seen_bhash = [], set(), set()
+    # Cache HTTP của backend bật mặc định khi import → dataset crawl chỉ dùng khi có --http_cache
+    # (phải đặt trước khi import async_crawler, http_cache đọc biến môi trường lúc import)
+    os.environ["HTTP_CACHE_ENABLED"] = "1" if args.http_cache else "0"
+
+    # Engine async của backend (tải song song, giới hạn theo host), dùng extractor của file này
+    from app.services.async_crawler import AsyncCrawler, CrawlJob
+
+    if args.fresh:
+        for path in (args.checkpoint, args.out_jsonl):
+            if os.path.exists(path):
+                os.remove(path)
+
+    ck = Checkpoint(args.checkpoint)
+    offset = ck.jsonl_offset()
+    size = os.path.getsize(args.out_jsonl) if os.path.exists(args.out_jsonl) else 0
+    if offset is None and size:
+        print(f"[LỖI] {args.out_jsonl} đã có dữ liệu nhưng không có checkpoint "
+              f"({args.checkpoint}). Dùng --fresh để ghi đè hoặc đổi --out_jsonl.")
+        return
+    # Bỏ phần JSONL ghi dở sau lần commit cuối (crash giữa chừng)
+    if offset is not None and size > offset:
+        os.truncate(args.out_jsonl, offset)
+    if offset:
+        print(f"[RESUME] {ck.total_rows()} bài đã có trong {args.out_jsonl}")
+
     SITES = [("vnexpress", LIST_SELECTORS["vnexpress"]),
              ("vietnamnet", LIST_SELECTORS["vietnamnet"])]
-
-    for subject_slug in CANON.keys():
-        for site, list_sels in SITES:
-            pattern = PATTERNS.get(subject_slug, {}).get(site)
-            if not pattern:
-                continue
-            rows = crawl_subject(site, subject_slug, pattern, list_sels,
-                                 args.pages_per_cat, seen_title, seen_bhash)
-            all_rows.extend(rows)
-
-    print(f"[SUMMARY] Tổng: {len(all_rows)} bài (unique theo title & body, body>=200).")
-    write_jsonl(args.out_jsonl, all_rows)
-    write_csv(args.out_csv, all_rows)
-    print(f"- JSONL: {args.out_jsonl}\n- CSV  : {args.out_csv}")
+    jobs = [CrawlJob(site, subject_slug, PATTERNS[subject_slug][site], list_sels)
+            for subject_slug in CANON.keys()
+            for site, list_sels in SITES
+            if PATTERNS.get(subject_slug, {}).get(site)]
+    extractors = {"vnexpress": extract_article_vne, "vietnamnet": extract_article_vnn}
+    seen_title, seen_bhash = SeenKeys(ck, "t:"), SeenKeys(ck, "b:")
+
+    with open(args.out_jsonl, "a", encoding="utf-8") as out:
+
+        async def on_page(job_index, page, rows, stop):
+            # Ghi rows của trang + commit checkpoint liền một mạch (không await ở giữa)
+            job = jobs[job_index]
+            keys = []
+            for r in rows:
+                out.write(ujson.dumps(r, ensure_ascii=False) + "\n")
+                tkey, bkey = row_keys(r)
+                keys += ["t:" + tkey, "b:" + bkey]
+                seen_title.pending.discard(tkey); seen_bhash.pending.discard(bkey)
+            out.flush(); os.fsync(out.fileno())
+            ck.commit_page(job.site, job.subject_slug, page, keys, len(rows), stop, out.tell())
+
+        async def on_page_failed(job_index, page):
+            job = jobs[job_index]
+            ck.record_failed(job.site, job.subject_slug, page)
+
+        async def on_retry_page(job_index, page, rows, stop):
+            # Trang crawl lại riêng lẻ: "không thêm mới" ở đây không dừng cả cặp
+            await on_page(job_index, page, rows, False)
+
+        async def run():
+            sem = asyncio.Semaphore(max(1, args.parallel))
+            async with AsyncCrawler(extractors=extractors,
+                                    host_concurrency=args.host_concurrency,
+                                    host_rps=args.host_rps) as crawler:
+
+                async def run_job(job_index, job):
+                    async with sem:
+                        # Trang lỗi ở lần chạy trước (kể cả khi cặp đã dừng): thử lại từng trang
+                        for page in ck.failed(job.site, job.subject_slug):
+                            if page > args.pages_per_cat:
+                                continue
+                            print(f"[{job.site}:{job.subject_slug}] page {page}: crawl lại trang lỗi")
+                            await crawler.crawl_subject(
+                                job, page, seen_title, seen_bhash,
+                                job_index=job_index, start_page=page,
+                                on_page=on_retry_page, collect=False,
+                                on_page_failed=on_page_failed,
+                            )
+                        if ck.pair_done(job.site, job.subject_slug):
+                            return
+                        start = ck.next_page(job.site, job.subject_slug)
+                        if start > args.pages_per_cat:
+                            return
+                        await crawler.crawl_subject(
+                            job, args.pages_per_cat, seen_title, seen_bhash,
+                            job_index=job_index, start_page=start,
+                            on_page=on_page, collect=False,
+                            on_page_failed=on_page_failed,
+                        )
+
+                await asyncio.gather(*(run_job(i, job) for i, job in enumerate(jobs)))
+                print(f"[async_crawler] {crawler.requests} request ({crawler.failures} lỗi)")
+
+        asyncio.run(run())
+
+    print(f"[SUMMARY] Tổng: {ck.total_rows()} bài (unique theo title & body, body>=200).")
+    n_failed = ck.failed_count()
+    if n_failed:
+        print(f"[SUMMARY] {n_failed} trang danh mục vẫn lỗi → chạy lại cùng lệnh để thử lại")
+    n = write_csv_from_jsonl(args.out_jsonl, args.out_csv)
+    print(f"- JSONL: {args.out_jsonl}\n- CSV  : {args.out_csv} ({n} dòng)")
 
 if __name__ == "__main__":
     main()
 
-#python crawl_news.py --pages_per_cat 20 --out_jsonl data.jsonl --out_csv data.csv
\ No newline at end of file
+#python crawl_news.py --pages_per_cat 20 --out_jsonl data.jsonl --out_csv data.csv
+#Chạy lại cùng lệnh sau khi bị dừng → tiếp tục từ checkpoint; thêm --fresh để crawl lại từ đầu